@@ -1,6 +1,8 @@
 # gunicorn.conf.py
 import multiprocessing
 import os
+import subprocess
+import sys
 
 # Workers: 2-4 workers é bom para começar
 # Fórmula: (2 x $num_cores) + 1
@@ -34,4 +36,27 @@ max_requests = 1000
 max_requests_jitter = 50
 
 # Pre-load da app (economiza memória)
-preload_app = True
\ No newline at end of file
+preload_app = True
+
+# Worker da fila de jobs (JOB_QUEUE_BACKEND=mongo) junto com o gunicorn, para o
+# deploy de um container só. Com o worker em um serviço separado, RUN_JOB_WORKER=false
+_job_worker = None
+
+
+def when_ready(server):
+    global _job_worker
+    if os.environ.get('JOB_QUEUE_BACKEND', 'mongo') != 'mongo':
+        return
+    if os.environ.get('RUN_JOB_WORKER', 'true').lower() != 'true':
+        return
+    _job_worker = subprocess.Popen([sys.executable, '-m', 'flask', '--app', 'run:app', 'jobs', 'worker'])
+    server.log.info(f"Worker da fila de jobs iniciado (pid {_job_worker.pid})")
+
+
+def on_exit(server):
+    if _job_worker is not None and _job_worker.poll() is None:
+        _job_worker.terminate()
+        try:
+            _job_worker.wait(timeout=graceful_timeout)
+        except subprocess.TimeoutExpired:
+            _job_worker.kill()
\ No newline at end of file
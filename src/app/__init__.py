@@ -4,17 +4,28 @@ from flask import Flask, request, Response
 from flask_swagger_ui import get_swaggerui_blueprint
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 from .database.mongo import mongo
+from .database.indexes import ensure_indexes
+from .database.pagination import InvalidCursor
 from .provider.mail import mail
+from .provider.cache import response_cache
+from .provider.expo_push import expo_push
+from .provider.llm import llm
+from .provider.serialization import MongoJSONProvider
 from .routes.routes import routes
+from .services import jobs  # noqa: F401 - registra os handlers da fila de jobs
 from .config import Config
+from .cli import register_commands
 from .services.notification_service import NotificationService
+from .services.push_notification_service import PushNotificationService
 from flask_cors import CORS
 
 
 def create_app():
     app = Flask(__name__)
+    app.json = MongoJSONProvider(app)
     app.config.from_object(Config)
 
     # CORS explícito para Swagger e API (evita "Failed to fetch" no /doc)
@@ -26,6 +37,24 @@ def create_app():
 
     mongo.init_app(app)
     mail.init_app(app)
+    response_cache.init_app(app)
+    expo_push.init_app(app)
+    llm.init_app(app)
+    register_commands(app)
+
+    @app.errorhandler(InvalidCursor)
+    def handle_invalid_cursor(error):
+        return {"error": str(error)}, 400
+
+    # Reconcilia os índices do MongoDB no boot (idempotente; desative com ENSURE_INDEXES=false)
+    if os.environ.get("ENSURE_INDEXES", "true").lower() == "true":
+        _ensure_indexes(app)
+
+    if app.config.get("JOB_QUEUE_BACKEND") == "mongo" and not app.config.get("RUN_JOB_WORKER"):
+        app.logger.warning(
+            "⚠️  JOB_QUEUE_BACKEND=mongo com RUN_JOB_WORKER=false: emails, Stripe e notificações "
+            "só são enviados se `flask --app run:app jobs worker` estiver rodando em outro serviço"
+        )
 
     SWAGGER_URL = "/doc"
     # Usar rota da própria app para o spec (mesma origem, evita CORS no fetch do spec)
@@ -83,13 +112,44 @@ def create_app():
             trigger=CronTrigger(hour=9, minute=0),
             id="daily_study_reminder",
         )
+        scheduler.add_job(
+            func=lambda: _run_push_receipts(app),
+            trigger=IntervalTrigger(minutes=30),
+            id="push_receipts",
+        )
         scheduler.start()
         app.logger.info("✅ APScheduler iniciado no worker principal")
 
     return app
 
 
+def _ensure_indexes(app):
+    """Cria os índices declarados sem impedir o boot se o banco falhar."""
+    try:
+        report = ensure_indexes()
+    except Exception as e:
+        app.logger.warning(f"⚠️  Não foi possível reconciliar os índices: {e}")
+        return
+
+    for collection_name, result in report.items():
+        if result["created"]:
+            app.logger.info(f"Índices criados em {collection_name}: {result['created']}")
+        if result["failed"] or result["conflicting"]:
+            app.logger.warning(
+                f"Índices com problema em {collection_name}: "
+                f"failed={result['failed']} conflicting={result['conflicting']}"
+            )
+        if result["extra"]:
+            app.logger.info(f"Índices extras em {collection_name}: {result['extra']}")
+
+
 def _run_daily_reminders(app):
     """Executa envio de lembretes diários dentro do contexto da app."""
     with app.app_context():
         NotificationService.send_daily_study_notifications()
+
+
+def _run_push_receipts(app):
+    """Processa os receipts do Expo (remove tokens inválidos) dentro do contexto da app."""
+    with app.app_context():
+        PushNotificationService.process_receipts()
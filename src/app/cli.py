@@ -0,0 +1,201 @@
+"""Comandos de linha de comando da aplicação (flask --app run:app <comando>)."""
+
+import json
+import random
+import time
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+from .database.indexes import ensure_indexes
+from .services.notification_service import NotificationService
+from .services.push_notification_service import PushNotificationService
+from .services.job_queue_service import JobQueueService
+from .models.job_model import JobModel
+from .models.generation_cache_model import GenerationCacheModel
+from .models.user_streak_model import UserStreakModel
+from .models.pending_rollup_model import PendingRollupModel
+from .models.collection_model import CollectionModel
+from .models.deck_model import DeckModel
+from .models.deck_subscriber_model import DeckSubscriberModel
+from .models.user_progress_model import UserProgressModel
+from .provider import scheduler as scheduling
+from .database.mongo import mongo
+
+
+db_cli = AppGroup("db", help="Manutenção do banco de dados.")
+
+
+@db_cli.command("indexes")
+@click.option("--check", is_flag=True, help="Apenas relata índices faltando/extras, sem criar nada.")
+@click.option("--prune", is_flag=True, help="Remove índices que não estão declarados no registro.")
+def indexes_command(check, prune):
+    """Cria os índices declarados e relata faltando/extras."""
+    report = ensure_indexes(create=not check, prune=prune)
+    click.echo(json.dumps(report, indent=2))
+
+    problems = any(
+        r["missing"] or r["failed"] or r["conflicting"] for r in report.values()
+    )
+    if problems:
+        raise SystemExit(1)
+
+
+@db_cli.command("rebuild-streaks")
+def rebuild_streaks_command():
+    """Recria os resumos de streak (user_streak_summaries) a partir de user_streaks."""
+    rebuilt = 0
+    for user_id in mongo.db.user_streaks.distinct("user_id"):
+        if UserStreakModel.rebuild_summary(str(user_id)):
+            rebuilt += 1
+    click.echo(f"{rebuilt} resumos de streak recriados")
+
+
+@db_cli.command("rebuild-deck-subscribers")
+@click.option("--batch-size", default=500, show_default=True, help="Usuários processados por lote.")
+@click.option("--restart", is_flag=True, help="Recomeça do início mesmo se já concluído.")
+def rebuild_deck_subscribers_command(batch_size, restart):
+    """Recria o índice deck -> usuários (deck_subscribers) a partir de users.collections."""
+    counters = DeckSubscriberModel.rebuild(batch_size=batch_size, resume=not restart)
+    click.echo(json.dumps(counters))
+
+
+@db_cli.command("repair-card-counts")
+def repair_card_counts_command():
+    """Recalcula `card_count` de decks e collections que divergiram dos arrays."""
+    decks = DeckModel.repair_card_counts()
+    collections = CollectionModel.repair_card_counts()
+    click.echo(f"card_count corrigido em {decks} decks e {collections} collections")
+
+
+@db_cli.command("mark-lazy-decks")
+@click.option("--prune", is_flag=True, help="Remove também os progressos nunca revisados desses decks.")
+def mark_lazy_decks_command(prune):
+    """Marca capítulos de livros e decks de classrooms com progresso criado na primeira revisão."""
+    marked = DeckModel.mark_lazy_decks()
+    click.echo(f"{marked} decks marcados como lazy_progress")
+    if prune:
+        removed = UserProgressModel.prune_unreviewed_lazy()
+        click.echo(f"{removed} progressos nunca revisados removidos")
+
+
+notifications_cli = AppGroup("notifications", help="Envio de notificações em lote.")
+
+
+@notifications_cli.command("daily")
+@click.option("--shard", default=0, show_default=True, help="Índice do shard tratado por este processo.")
+@click.option("--shards", default=1, show_default=True, help="Quantidade total de shards.")
+@click.option("--batch-size", default=NotificationService.DAILY_BATCH_SIZE, show_default=True)
+@click.option("--restart", is_flag=True, help="Ignora o checkpoint de hoje e recomeça do início.")
+def daily_command(shard, shards, batch_size, restart):
+    """Envia o lembrete diário de estudos (retomável, pode rodar em shards)."""
+    result = NotificationService.send_daily_study_notifications(
+        shard=shard, shard_count=shards, batch_size=batch_size, resume=not restart
+    )
+    click.echo(json.dumps(result, indent=2))
+
+
+@notifications_cli.command("receipts")
+@click.option("--limit", default=1000, show_default=True, help="Máximo de tickets consultados.")
+def receipts_command(limit):
+    """Consulta os receipts do Expo e remove tokens DeviceNotRegistered."""
+    click.echo(json.dumps(PushNotificationService.process_receipts(limit=limit), indent=2))
+
+
+jobs_cli = AppGroup("jobs", help="Fila de jobs em background.")
+
+
+@jobs_cli.command("worker")
+@click.option("--worker-id", default=None, help="Identificador do worker (padrão: host:pid).")
+@click.option("--poll-interval", default=1.0, show_default=True, help="Segundos entre consultas com a fila vazia.")
+@click.option("--max-jobs", default=None, type=int, help="Encerra depois de processar N jobs.")
+@click.option("--once", is_flag=True, help="Processa o que estiver na fila e encerra.")
+def worker_command(worker_id, poll_interval, max_jobs, once):
+    """Executa os jobs enfileirados (rode um ou mais processos)."""
+    processed = JobQueueService.run_worker(
+        worker_id=worker_id, poll_interval=poll_interval, max_jobs=max_jobs, stop_when_empty=once
+    )
+    click.echo(f"{processed} jobs processados")
+
+
+@jobs_cli.command("requeue-dead")
+@click.argument("job_ids", nargs=-1)
+def requeue_dead_command(job_ids):
+    """Devolve jobs da dead-letter para a fila (todos, ou só os JOB_IDS informados)."""
+    click.echo(f"{JobModel.requeue_dead(list(job_ids) or None)} jobs devolvidos para a fila")
+
+
+ai_cli = AppGroup("ai", help="Gerações via LLM.")
+
+
+@ai_cli.command("cache-stats")
+def cache_stats_command():
+    """Mostra hits/misses e entradas do cache de gerações por tipo."""
+    click.echo(json.dumps(GenerationCacheModel.stats(), indent=2))
+
+
+@ai_cli.command("cache-clear")
+@click.option("--kind", default=None, help="Limpa apenas um tipo (ex.: subject_cards).")
+def cache_clear_command(kind):
+    """Remove entradas do cache de gerações."""
+    click.echo(f"{GenerationCacheModel.clear(kind)} entradas removidas")
+
+
+progress_cli = AppGroup("progress", help="Agendamento das revisões.")
+
+
+@progress_cli.command("reconcile-rollups")
+@click.option("--batch-size", default=500, show_default=True, help="Usuários recalculados por lote.")
+@click.option("--restart", is_flag=True, help="Ignora o checkpoint de hoje e recomeça do início.")
+def reconcile_rollups_command(batch_size, restart):
+    """Recalcula o rollup de cartas pendentes (pending_rollups) a partir de user_progress."""
+    result = PendingRollupModel.reconcile(batch_size=batch_size, resume=not restart)
+    click.echo(json.dumps(result))
+
+
+@progress_cli.command("bench-scheduler")
+@click.option("--algorithm", type=click.Choice(sorted(scheduling.SCHEDULERS)), default="sm2", show_default=True)
+@click.option("--count", default=100000, show_default=True, help="Revisões agendadas por execução.")
+@click.option("--repeat", default=3, show_default=True, help="Execuções de cada caminho (vale a melhor).")
+def bench_scheduler_command(algorithm, count, repeat):
+    """Compara a vazão do agendamento carta a carta com o em lote (NumPy)."""
+    engine = scheduling.get_scheduler(algorithm)
+    rng = random.Random(42)
+    states = {
+        "attempts": [rng.randint(0, 12) for _ in range(count)],
+        "ease": [rng.uniform(1.3, 3.0) for _ in range(count)],
+        "interval_days": [float(rng.randint(0, 60)) for _ in range(count)],
+        "repetitions": [rng.randint(0, 8) for _ in range(count)],
+    }
+    levels = [rng.randint(0, 3) for _ in range(count)]
+
+    def best(run):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    scalar = best(lambda: [
+        engine.review({field: column[i] for field, column in states.items()}, level)
+        for i, level in enumerate(levels)
+    ])
+    batch = best(lambda: engine.review_batch(states, levels))
+    click.echo(json.dumps({
+        "algorithm": algorithm,
+        "count": count,
+        "numpy": scheduling.np is not None,
+        "scalar_per_second": round(count / scalar),
+        "batch_per_second": round(count / batch),
+        "speedup": round(scalar / batch, 1),
+    }, indent=2))
+
+
+def register_commands(app: Flask):
+    app.cli.add_command(db_cli)
+    app.cli.add_command(notifications_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(ai_cli)
+    app.cli.add_command(progress_cli)
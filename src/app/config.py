@@ -35,5 +35,47 @@ class Config:
     DEBUG = FLASK_ENV == "development"
     PORT = int(environ["PORT"])
 
+    # Cache em memória do usuário autenticado (token_required)
+    AUTH_USER_CACHE_TTL = int(environ.get("AUTH_USER_CACHE_TTL", "60"))
+    AUTH_USER_CACHE_SIZE = int(environ.get("AUTH_USER_CACHE_SIZE", "10000"))
+
+    # Cache de respostas do catálogo: "memory" (por worker) ou "redis" (compartilhado)
+    CACHE_BACKEND = environ.get("CACHE_BACKEND", "memory")
+    CACHE_URL = environ.get("CACHE_URL", "redis://localhost:6379/0")
+    CACHE_DEFAULT_TTL = int(environ.get("CACHE_DEFAULT_TTL", "300"))
+    # Teto do TTL no backend "memory" quando há mais de um worker (invalidação é por processo)
+    CACHE_MEMORY_MAX_TTL = int(environ.get("CACHE_MEMORY_MAX_TTL", "15"))
+    GUNICORN_WORKERS = int(environ.get("GUNICORN_WORKERS", "2"))
+
+    # Cache em memória das contagens de cartas pendentes (rollup por usuário/deck)
+    PENDING_COUNT_CACHE_TTL = int(environ.get("PENDING_COUNT_CACHE_TTL", "30"))
+    PENDING_COUNT_CACHE_SIZE = int(environ.get("PENDING_COUNT_CACHE_SIZE", "10000"))
+
+    # Algoritmo de agendamento das revisões: "doubling" (padrão) ou "sm2"
+    SCHEDULER_ALGORITHM = environ.get("SCHEDULER_ALGORITHM", "doubling")
+    # Grava front/back/audio no progresso na primeira leitura da fila de estudo
+    PROGRESS_CARD_SNAPSHOTS = environ.get("PROGRESS_CARD_SNAPSHOTS", "true").lower() == "true"
+
+    # Fila de jobs em background: "mongo" (worker via `flask jobs worker`) ou "inline" (dev/testes)
+    JOB_QUEUE_BACKEND = environ.get("JOB_QUEUE_BACKEND", "mongo")
+    JOB_MAX_ATTEMPTS = int(environ.get("JOB_MAX_ATTEMPTS", "5"))
+    JOB_LOCK_TIMEOUT = int(environ.get("JOB_LOCK_TIMEOUT", "300"))
+    # O gunicorn.conf.py sobe `flask jobs worker` junto com a API (false = worker em outro serviço)
+    RUN_JOB_WORKER = environ.get("RUN_JOB_WORKER", "true").lower() == "true"
+
+    # LLM do chat/geração de cartas: "gemini" ou "fake" (testes/dev sem chave)
+    LLM_BACKEND = environ.get("LLM_BACKEND", "gemini")
+    LLM_MAX_WORKERS = int(environ.get("LLM_MAX_WORKERS", "8"))
+    LLM_TIMEOUT = float(environ.get("LLM_TIMEOUT", "60"))
+    # Cache das gerações de cartas (segundos; 0 desliga)
+    GENERATION_CACHE_TTL = int(environ.get("GENERATION_CACHE_TTL", str(30 * 24 * 60 * 60)))
+
+    # Push via Expo (as URLs podem apontar para um stub local em testes)
+    EXPO_PUSH_URL = environ.get("EXPO_PUSH_URL", "https://exp.host/--/api/v2/push/send")
+    EXPO_RECEIPTS_URL = environ.get("EXPO_RECEIPTS_URL", "https://exp.host/--/api/v2/push/getReceipts")
+    EXPO_ACCESS_TOKEN = environ.get("EXPO_ACCESS_TOKEN")
+    EXPO_PUSH_MAX_RETRIES = int(environ.get("EXPO_PUSH_MAX_RETRIES", "3"))
+    EXPO_PUSH_TIMEOUT = float(environ.get("EXPO_PUSH_TIMEOUT", "10"))
+
 
 
@@ -4,6 +4,9 @@ from flask import Blueprint, jsonify, request
 from werkzeug.exceptions import BadRequest, Unauthorized
 from src.app.services.books_service import BookService
 from src.app.middlewares.token_required import token_required
+from src.app.provider.cache import response_cache
+from src.app.database.pagination import page_args, paginate
+from src.app.provider.streaming import iter_json_object, stream_json, wants_stream
 from src.app import mongo
 from bson import ObjectId
 
@@ -66,11 +69,21 @@ class BookController:
         if current_user.role != "admin":
             return jsonify({"error": "Unauthorized"}), 403
 
-        books = BookService.get_all_books()
-        return jsonify({"books": books}), 200
+        if wants_stream():
+            return stream_json(
+                iter_json_object("books", BookService.iter_all_books(), {"next_cursor": None})
+            )
+
+        limit, cursor = page_args()
+        books, next_cursor = BookService.get_all_books(limit=limit, cursor=cursor)
+        return jsonify({"books": books, "next_cursor": next_cursor}), 200
 
     @staticmethod
     @token_required
+    @response_cache.cached(
+        tags=lambda current_user, token: ["books", f"user_books:{current_user._id}"],
+        vary=lambda current_user, token: current_user._id,
+    )
     def get_available_books(current_user, token):
         """Retorna livros do usuário e para descobrir."""
         result = BookService.get_available_books(current_user._id)
@@ -135,11 +148,14 @@ class BookController:
         if not book:
             return jsonify({"error": "Book not found"}), 404
 
-        # Busca todos os usuários (id, nome, email)
-        users_cursor = mongo.db.users.find({}, {"name": 1, "email": 1})
+        # Busca uma página de usuários (id, nome, email)
+        limit, cursor = page_args()
+        users_page, next_cursor = paginate(
+            mongo.db.users, projection={"name": 1, "email": 1}, limit=limit, cursor=cursor
+        )
         users = []
         user_ids = []
-        for u in users_cursor:
+        for u in users_page:
             uid = str(u["_id"])
             users.append(
                 {
@@ -150,7 +166,7 @@ class BookController:
             )
             user_ids.append(ObjectId(uid))
 
-        # Busca quais usuários possuem o livro
+        # Busca quais usuários da página possuem o livro
         book_obj_id = ObjectId(book_id)
         user_books_cursor = mongo.db.user_books.find(
             {"book_id": book_obj_id, "user_id": {"$in": user_ids}}
@@ -161,7 +177,7 @@ class BookController:
         for u in users:
             u["has_book"] = u["_id"] in users_with_book
 
-        return jsonify({"book": book, "users": users}), 200
+        return jsonify({"book": book, "users": users, "next_cursor": next_cursor}), 200
 
     @staticmethod
     @token_required
@@ -4,6 +4,8 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, current_user
 from werkzeug.exceptions import BadRequest, Unauthorized
 from src.app.services.card_service import CardService
+from src.app.database.pagination import page_args, paginated_response
+from src.app.provider.streaming import iter_json_array, stream_json, wants_stream
 
 
 class CardController:
@@ -76,9 +78,13 @@ class CardController:
 
     @staticmethod
     def get_all_cards():
-        """This Method get all cards"""
-        result = CardService.get_all_cards()
-        return jsonify(result), 200
+        """This Method get a page of cards (next page cursor in X-Next-Cursor)"""
+        if wants_stream():
+            return stream_json(iter_json_array(CardService.iter_all_cards()))
+
+        limit, cursor = page_args()
+        result, next_cursor = CardService.get_all_cards(limit=limit, cursor=cursor)
+        return paginated_response(result, next_cursor)
 
     @staticmethod
     def update_card(card_id):
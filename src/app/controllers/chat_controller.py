@@ -3,6 +3,10 @@
 from flask import Blueprint, request, jsonify
 from src.app.middlewares.token_required import token_required
 from src.app.services.chat_service import ChatService
+from src.app.database.pagination import page_args
+from src.app.provider.llm import llm_error
+from src.app.provider.streaming import iter_json_object, sse_event, stream_json, stream_sse, wants_stream
+
 
 class ChatController:
     @staticmethod
@@ -17,18 +21,67 @@ class ChatController:
             result = ChatService.chat(
                 current_user._id, id, history, settings, message
             )
+            if result is None:
+                return jsonify({"error": "Chat not found"}), 404
             return jsonify(result), 200
         except Exception as e:
-            if "429" in str(type(e).__name__) or "ResourceExhausted" in str(e):
-                return jsonify({"error": "API quota exceeded"}), 429
-            return jsonify({"error": str(e)}), 500
+            payload, status = llm_error(e)
+            return jsonify(payload), status
+
+    @staticmethod
+    @token_required
+    def chat_stream(current_user, token):
+        """Igual a /talk_to_me, mas devolve a resposta em server-sent events.
+
+        Eventos: `chunk` ({"text"}) a cada pedaço da resposta, `done`
+        ({"reply", "chat_id"}) no final, ou `error` ({"error", "status"}).
+        """
+        data = request.get_json() or {}
+        try:
+            events = ChatService.stream_chat(
+                current_user._id,
+                data.get("id", None),
+                data.get("history", []),
+                data.get("settings", {}),
+                data.get("message", ""),
+            )
+        except Exception as e:
+            payload, status = llm_error(e)
+            return jsonify(payload), status
+        if events is None:
+            return jsonify({"error": "Chat not found"}), 404
+
+        def generate():
+            try:
+                for event, payload in events:
+                    yield sse_event(payload, event=event)
+            except Exception as e:
+                payload, status = llm_error(e)
+                yield sse_event({**payload, "status": status}, event="error")
+
+        return stream_sse(generate())
     
     @staticmethod
     @token_required
     def get_chats_by_user_id(current_user, token):
-        response = ChatService.get_chats_by_user_id(current_user._id)
+        if wants_stream():
+            return stream_json(
+                iter_json_object("chats", ChatService.iter_chats_by_user_id(current_user._id), {"next_cursor": None})
+            )
+
+        limit, cursor = page_args()
+        response = ChatService.get_chats_by_user_id(current_user._id, limit=limit, cursor=cursor)
         return jsonify(response), 200
     
+    @staticmethod
+    @token_required
+    def get_chat_messages(current_user, token, chat_id):
+        limit, cursor = page_args()
+        response = ChatService.get_chat_messages(current_user._id, chat_id, limit=limit, cursor=cursor)
+        if response is None:
+            return jsonify({"error": "Chat not found"}), 404
+        return jsonify(response), 200
+
     def generate_cards_by_chat():
         data = request.get_json() or {}
         response = ChatService.generate_card(
@@ -41,5 +94,7 @@ class ChatController:
 
 chat_blueprint = Blueprint("chat_blueprint", __name__)
 chat_blueprint.route("/talk_to_me", methods=["POST"])(ChatController.chat)
+chat_blueprint.route("/talk_to_me/stream", methods=["POST"])(ChatController.chat_stream)
 chat_blueprint.route("/get_chats_by_user", methods=["GET"])(ChatController.get_chats_by_user_id)
+chat_blueprint.route("/<chat_id>/messages", methods=["GET"])(ChatController.get_chat_messages)
 chat_blueprint.route('/generate_card', methods=["POST"])(ChatController.generate_cards_by_chat)
@@ -5,6 +5,8 @@ from src.app.services.collections_service import CollectionService
 from src.app.services.classroom_service import ClassroomService
 from src.app.services.chat_service import ChatService
 from src.app.middlewares.token_required import token_required
+from src.app.provider.llm import llm_error
+from src.app.provider.streaming import sse_event, stream_sse
 
 class ClassroomController:
     
@@ -88,6 +90,42 @@ class ClassroomController:
                 return jsonify({"error": "API quota exceeded"}), 429
             return jsonify({"error": str(e)}), 500
 
+    def generate_cards_by_subject_stream():
+        """Igual a /generate_cards_by_subject, em server-sent events.
+
+        Eventos: `card` a cada carta completa, `done` ({"flashcards", "partial"})
+        no final, ou `error` ({"error", "status"}).
+        """
+        data = request.get_json() or {}
+
+        if "subject" not in data:
+            return jsonify({"error": "Subject is required!"}), 400
+
+        if "language_front" not in data or "language_back" not in data:
+            return jsonify({"error":"language of cards front and back is required"}), 400
+
+        try:
+            events = ChatService.stream_cards_by_subject(
+                subject=data.get("subject"),
+                amount=data.get("amount", 20),
+                language_front=data.get("language_front"),
+                language_back=data.get("language_back"),
+                format=data.get("format"),
+            )
+        except Exception as e:
+            payload, status = llm_error(e)
+            return jsonify(payload), status
+
+        def generate():
+            try:
+                for event, payload in events:
+                    yield sse_event(payload, event=event)
+            except Exception as e:
+                payload, status = llm_error(e)
+                yield sse_event({**payload, "status": status}, event="error")
+
+        return stream_sse(generate())
+
         
         
         
@@ -96,5 +134,6 @@ classroom_blueprint.route("/create", methods=["POST"])(ClassroomController.creat
 classroom_blueprint.route("/get_classrooms", methods=['GET'])(ClassroomController.getClassrooms)
 classroom_blueprint.route("/add_user_in_classroom", methods=['POST'])(ClassroomController.add_students)
 classroom_blueprint.route("/generate_cards_by_subject", methods=["POST"])(ClassroomController.generate_cards_by_subject)
+classroom_blueprint.route("/generate_cards_by_subject/stream", methods=["POST"])(ClassroomController.generate_cards_by_subject_stream)
 
         
\ No newline at end of file
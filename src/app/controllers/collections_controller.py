@@ -3,6 +3,8 @@
 from flask import Blueprint, jsonify, request, Response, current_app
 from src.app.services.collections_service import CollectionService
 from src.app.middlewares.token_required import token_required
+from src.app.provider.cache import response_cache
+from src.app.database.pagination import page_args, paginated_response
 
 
 class CollectionsController:
@@ -49,11 +51,13 @@ class CollectionsController:
         return jsonify(result), 200
 
     @staticmethod
+    @response_cache.cached(tags=["collections"])
     def get_all_collections():
-        """This Method get all collections"""
+        """This Method get a page of collections (next page cursor in X-Next-Cursor)"""
 
-        result = CollectionService.get_all_collections()
-        return jsonify(result), 200
+        limit, cursor = page_args()
+        result, next_cursor = CollectionService.get_all_collections(limit=limit, cursor=cursor)
+        return paginated_response(result, next_cursor)
 
     @staticmethod
     def add_decks_to_collection(collection_id):
@@ -4,6 +4,8 @@ from flask import Blueprint, jsonify, request
 from werkzeug.exceptions import BadRequest, Unauthorized
 
 from src.app.services.deck_service import DeckService
+from src.app.provider.cache import response_cache
+from src.app.database.pagination import page_args, paginated_response
 
 
 class DecksController:
@@ -31,11 +33,13 @@ class DecksController:
         return jsonify(result), 200
 
     @staticmethod
+    @response_cache.cached(tags=["decks"])
     def get_all_decks():
-        """Get all decks"""
+        """Get a page of decks (next page cursor in X-Next-Cursor)"""
 
-        result = DeckService.get_all_decks()
-        return jsonify(result), 200
+        limit, cursor = page_args()
+        result, next_cursor = DeckService.get_all_decks(limit=limit, cursor=cursor)
+        return paginated_response(result, next_cursor)
 
     @staticmethod
     def get_decks_by_collection_id():
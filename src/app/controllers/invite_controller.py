@@ -3,6 +3,7 @@
 from flask import Blueprint, jsonify, request
 from src.app.middlewares.token_required import token_required
 from src.app.services.invite_service import InviteService
+from src.app.database.pagination import page_args
 
 
 class InviteController:
@@ -28,8 +29,9 @@ class InviteController:
     @staticmethod
     @token_required
     def get_user_invites(current_user, token):
-        """Retorna todos os convites feitos pelo usuário"""
-        return InviteService.get_user_invites(str(current_user._id))
+        """Retorna uma página dos convites feitos pelo usuário"""
+        limit, cursor = page_args()
+        return InviteService.get_user_invites(str(current_user._id), limit=limit, cursor=cursor)
 
     @staticmethod
     @token_required
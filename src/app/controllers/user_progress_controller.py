@@ -2,6 +2,7 @@
 
 from flask import Blueprint, jsonify, request
 from src.app.services.user_progress_service import UserProgressService
+from src.app.database.pagination import page_args
 
 
 class UserProgressController:
@@ -35,6 +36,19 @@ class UserProgressController:
         pending_cards = UserProgressService.get_pending_cards(user_id, deck_id)
         return jsonify({"pending_cards": pending_cards}), 200
 
+    @staticmethod
+    def get_study_queue():
+        """Fila de estudo paginada: cartas vencidas do usuário (ou de um deck) por prioridade"""
+
+        user_id = request.args.get("user_id")
+        deck_id = request.args.get("deck_id")
+
+        if not user_id:
+            return jsonify({"error": "User ID is required"}), 400
+
+        limit, cursor = page_args()
+        return jsonify(UserProgressService.get_study_queue(user_id, deck_id, limit=limit, cursor=cursor)), 200
+
     @staticmethod
     def update_card_status():
         """This method updates the status of multiple cards for a user"""
@@ -46,18 +60,11 @@ class UserProgressController:
         if not user_id or not isinstance(cards, list) or not cards:
             return jsonify({"error": "Missing or invalid required information"}), 400
 
-        updated_progress = []
-        for card in cards:
-            card_id = card.get("card_id")
-            recall_level = card.get("recall_level")
-            
-            if card_id and recall_level is not None:
-                progress = UserProgressService.update_card_status(
-                    user_id, card_id, recall_level
-                )
-                if progress is not None:
-                    updated_progress.append(progress)
-        return jsonify({"updated_progress": updated_progress}), 200
+        results = UserProgressService.update_cards_status(
+            user_id, [card for card in cards if isinstance(card, dict)]
+        )
+        updated_progress = ["ok" for result in results if result["status"] == "ok"]
+        return jsonify({"updated_progress": updated_progress, "results": results}), 200
 
 
 
@@ -68,6 +75,9 @@ user_progress_blueprint = Blueprint("user_progress_blueprint", __name__)
 user_progress_blueprint.route("/", methods=["POST"])(
     UserProgressController.create_or_update_progress
 )
+user_progress_blueprint.route("/queue", methods=["GET"])(
+    UserProgressController.get_study_queue
+)
 user_progress_blueprint.route("/pending", methods=["GET"])(
     UserProgressController.get_pending_cards
 )
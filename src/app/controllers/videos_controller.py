@@ -3,6 +3,7 @@
 from flask import Blueprint, jsonify, request
 from werkzeug.exceptions import BadRequest, Unauthorized
 from src.app.services.video_service import VideoService
+from src.app.provider.cache import response_cache
 
 class VideoController:
     @staticmethod
@@ -16,6 +17,7 @@ class VideoController:
         return jsonify(result), 201
     
     @staticmethod
+    @response_cache.cached(tags=["videos"])
     def get_all_videos():
         language = request.args.get("language")
         if not language:
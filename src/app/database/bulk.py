@@ -0,0 +1,38 @@
+"""Helpers para carregar documentos em lote a partir de listas de ids."""
+
+from bson import ObjectId
+
+
+# Limite de ids por consulta $in (mantém o documento de consulta bem abaixo de 16MB)
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def fetch_by_ids(collection, ids, projection=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Busca documentos por id com consultas `$in` (uma por bloco de `chunk_size`).
+
+    Args:
+        collection: Collection do PyMongo (ex.: `mongo.db.cards`).
+        ids: Lista de ids (str ou ObjectId).
+        projection: Projeção opcional repassada ao `find`.
+        chunk_size: Máximo de ids por consulta.
+
+    Returns:
+        dict: {ObjectId: documento} apenas com os ids encontrados.
+    """
+    object_ids = list(dict.fromkeys(ObjectId(i) for i in ids))
+    docs = {}
+    for chunk in _chunks(object_ids, chunk_size):
+        for doc in collection.find({"_id": {"$in": chunk}}, projection):
+            docs[doc["_id"]] = doc
+    return docs
+
+
+def hydrate(collection, ids, projection=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Como `fetch_by_ids`, mas retorna uma lista na ordem de `ids`, ignorando os inexistentes."""
+    docs = fetch_by_ids(collection, ids, projection, chunk_size)
+    return [docs[ObjectId(i)] for i in ids if ObjectId(i) in docs]
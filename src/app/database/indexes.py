@@ -0,0 +1,226 @@
+"""Registro declarativo dos índices do MongoDB.
+
+Cada collection usada pelos models declara aqui os índices de que as suas
+consultas precisam. `ensure_indexes` reconcilia o que está declarado com o que
+existe no banco: cria o que falta (de forma idempotente), informa índices
+extras e, opcionalmente, remove os extras.
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from .mongo import mongo
+
+
+INDEXES = {
+    # UserModel.find_by_email / token_required / verify_* / reset de senha
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("is_confirmed", ASCENDING)], name="is_confirmed"),
+        # DeckSubscriberModel.add_decks: donos de uma collection
+        IndexModel([("collections", ASCENDING)], name="collections"),
+    ],
+    # DeckSubscriberModel: usuários de um deck (CardModel.get_user_by_deck) e remoção de collections
+    "deck_subscribers": [
+        IndexModel([("deck_id", ASCENDING), ("user_id", ASCENDING)], name="deck_user_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        IndexModel([("via", ASCENDING)], name="via"),
+    ],
+    # UserProgressModel: create_or_update, update_status, count/get_pending_cards, get_study_queue
+    "user_progress": [
+        IndexModel(
+            [("user_id", ASCENDING), ("deck_id", ASCENDING), ("card_id", ASCENDING)],
+            name="user_deck_card_unique",
+            unique=True,
+        ),
+        # Fila de estudo: paginação por (next_review, _id) sem sort em memória
+        IndexModel(
+            [("user_id", ASCENDING), ("next_review", ASCENDING), ("_id", ASCENDING)],
+            name="user_next_review_id",
+        ),
+        IndexModel([("user_id", ASCENDING), ("card_id", ASCENDING)], name="user_card"),
+        IndexModel([("deck_id", ASCENDING), ("card_id", ASCENDING)], name="deck_card"),
+        IndexModel(
+            [("user_id", ASCENDING), ("deck_id", ASCENDING), ("next_review", ASCENDING), ("_id", ASCENDING)],
+            name="user_deck_next_review_id",
+        ),
+        # refresh_card_snapshots: carta editada/removida
+        IndexModel([("card_id", ASCENDING)], name="card_id"),
+        # NotificationService.send_daily_study_notifications: cartas vencidas agrupadas por usuário
+        IndexModel([("next_review", ASCENDING), ("user_id", ASCENDING)], name="next_review_user"),
+    ],
+    # PendingRollupModel: contagem de pendentes por (usuário, deck, dia) e lembrete diário por dia
+    "pending_rollups": [
+        IndexModel(
+            [("user_id", ASCENDING), ("deck_id", ASCENDING), ("day", ASCENDING)],
+            name="user_deck_day_unique",
+            unique=True,
+        ),
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_day"),
+        IndexModel([("day", ASCENDING), ("user_id", ASCENDING)], name="day_user"),
+    ],
+    # NotificationModel.list_by_user / find_last / count_unread
+    "notifications": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_at"),
+        IndexModel(
+            [("user_id", ASCENDING), ("type", ASCENDING), ("created_at", DESCENDING)],
+            name="user_type_created_at",
+        ),
+        IndexModel([("user_id", ASCENDING), ("is_read", ASCENDING)], name="user_is_read"),
+    ],
+    # UserStreakModel.record_study_day / get_streak_info
+    "user_streaks": [
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING)], name="user_date_unique", unique=True),
+    ],
+    # BookModel / BookService: biblioteca e capítulos lidos do usuário
+    "user_books": [
+        IndexModel([("user_id", ASCENDING), ("book_id", ASCENDING)], name="user_book_unique", unique=True),
+        IndexModel([("book_id", ASCENDING)], name="book_id"),
+    ],
+    "books": [
+        # BookModel.get_all: paginação por (created_at, _id)
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        IndexModel([("collection_id", ASCENDING)], name="collection_id"),
+    ],
+    # InviteModel
+    "invites": [
+        IndexModel([("invite_code", ASCENDING)], name="invite_code_unique", unique=True),
+        IndexModel([("inviter_id", ASCENDING), ("_id", ASCENDING)], name="inviter_id_id"),
+        IndexModel([("invited_email", ASCENDING), ("status", ASCENDING)], name="invited_email_status"),
+    ],
+    # PushNotificationModel / PushNotificationService
+    "push_notification": [
+        IndexModel([("user_id", ASCENDING), ("push_token", ASCENDING)], name="user_push_token"),
+        IndexModel([("push_token", ASCENDING)], name="push_token"),
+    ],
+    # PushTicketModel: TTL de 24h (prazo em que o Expo mantém os receipts)
+    "push_tickets": [
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=24 * 60 * 60),
+    ],
+    # Relações collection -> decks -> cards (arrays, índices multikey)
+    "collections": [
+        IndexModel([("decks", ASCENDING)], name="decks"),
+        IndexModel([("book_id", ASCENDING)], name="book_id"),
+    ],
+    "decks": [
+        IndexModel([("cards", ASCENDING)], name="cards"),
+        # UserProgressModel: decks lazy no lembrete diário / mark-lazy-decks --prune
+        IndexModel(
+            [("lazy_progress", ASCENDING)],
+            name="lazy_progress",
+            partialFilterExpression={"lazy_progress": True},
+        ),
+    ],
+    "classrooms": [
+        IndexModel([("teacher", ASCENDING)], name="teacher"),
+        IndexModel([("collection", ASCENDING)], name="collection"),
+        IndexModel([("guests", ASCENDING)], name="guests"),
+    ],
+    # JobModel: próximo job disponível e limpeza dos concluídos após 7 dias
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+        IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl", expireAfterSeconds=7 * 24 * 60 * 60),
+    ],
+    "chats": [
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"),
+    ],
+    "generation_cache": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "chat_messages": [
+        IndexModel([("chat_id", ASCENDING), ("seq", ASCENDING)], name="chat_id_seq", unique=True),
+    ],
+    "user_notification_settings": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+}
+
+
+def _key_of(index):
+    """Retorna a chave de um índice como lista de tuplas (campo, direção)."""
+    return [(field, direction) for field, direction in index["key"].items()]
+
+
+def _options_of(index):
+    """Opções relevantes para comparar um índice declarado com o existente."""
+    return {
+        "unique": bool(index.get("unique", False)),
+        "sparse": bool(index.get("sparse", False)),
+        "expireAfterSeconds": index.get("expireAfterSeconds"),
+        "partialFilterExpression": index.get("partialFilterExpression"),
+    }
+
+
+def ensure_indexes(db=None, create=True, prune=False):
+    """Reconcilia os índices declarados em `INDEXES` com os do banco.
+
+    Args:
+        db: Banco a ser usado (padrão: `mongo.db`).
+        create: Se False, apenas relata o que está faltando (modo check).
+        prune: Se True, remove os índices extras (não declarados).
+
+    Returns:
+        dict: Por collection, listas `created`, `missing`, `present`,
+        `conflicting`, `extra`, `dropped` e `failed`.
+    """
+    db = db if db is not None else mongo.db
+    report = {}
+
+    for collection_name, declared in INDEXES.items():
+        collection = db[collection_name]
+        existing = {ix["name"]: ix for ix in collection.list_indexes()}
+        result = {
+            "created": [],
+            "missing": [],
+            "present": [],
+            "conflicting": [],
+            "extra": [],
+            "dropped": [],
+            "failed": [],
+        }
+        matched = {"_id_"}
+        to_create = []
+
+        for model in declared:
+            spec = model.document
+            name = spec["name"]
+            same_key = next(
+                (ix for ix in existing.values() if _key_of(ix) == _key_of(spec)),
+                None,
+            )
+            current = existing.get(name) or same_key
+
+            if current is None:
+                to_create.append(model)
+                continue
+
+            matched.add(current["name"])
+            if _key_of(current) != _key_of(spec) or _options_of(current) != _options_of(spec):
+                # Mesmo nome/chave com opções diferentes: não recriamos automaticamente
+                result["conflicting"].append(name)
+            else:
+                result["present"].append(name)
+
+        for model in to_create:
+            name = model.document["name"]
+            if not create:
+                result["missing"].append(name)
+                continue
+            try:
+                collection.create_indexes([model])
+                result["created"].append(name)
+            except OperationFailure as e:
+                # Ex.: índice único sobre dados duplicados
+                result["failed"].append({"name": name, "error": str(e)})
+
+        for name in existing:
+            if name in matched:
+                continue
+            result["extra"].append(name)
+            if prune and create:
+                collection.drop_index(name)
+                result["dropped"].append(name)
+
+        report[collection_name] = result
+
+    return report
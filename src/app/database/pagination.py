@@ -0,0 +1,124 @@
+"""Paginação por keyset (cursor opaco) para as listagens.
+
+Em vez de `skip`, cada página continua a partir da última chave de ordenação
+vista (`sort_field` + `_id` como desempate), então o custo de uma página não
+cresce com a quantidade de páginas anteriores e o uso de memória do worker
+fica limitado ao tamanho da página.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+
+from bson import ObjectId, json_util
+from flask import jsonify, request
+from pymongo import ASCENDING
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Documentos por lote do cursor nas exportações em streaming (`?stream=true`)
+STREAM_BATCH_SIZE = 500
+
+
+# Tipos aceitos em `id`/`v`: o cursor vem do cliente e entra como valor de
+# igualdade/comparação na query, então dict (operador) ou list não passam
+_CURSOR_VALUE_TYPES = (str, int, float, bool, datetime, ObjectId, type(None))
+
+
+class InvalidCursor(ValueError):
+    """Cursor ou tamanho de página inválido recebido na query string."""
+
+
+def encode_cursor(doc, sort_field="_id"):
+    """Gera o cursor opaco que aponta para depois de `doc`."""
+    payload = {"id": doc["_id"]}
+    if sort_field != "_id":
+        payload["v"] = doc.get(sort_field)
+    raw = json_util.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decodifica um cursor gerado por `encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(payload, dict) or "id" not in payload:
+        raise InvalidCursor("Invalid cursor")
+    if not all(isinstance(payload.get(key), _CURSOR_VALUE_TYPES) for key in ("id", "v")):
+        raise InvalidCursor("Invalid cursor")
+    return payload
+
+
+def page_args(args=None):
+    """Lê `limit` e `cursor` da query string.
+
+    Returns:
+        tuple: (limit, cursor) com o limite já restrito a MAX_PAGE_SIZE.
+    """
+    args = request.args if args is None else args
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor("Invalid limit") from e
+    if limit < 1:
+        raise InvalidCursor("Invalid limit")
+    return min(limit, MAX_PAGE_SIZE), args.get("cursor") or None
+
+
+def _after(payload, sort_field, direction):
+    op = "$gt" if direction == ASCENDING else "$lt"
+    if sort_field == "_id":
+        return {"_id": {op: payload["id"]}}
+    return {
+        "$or": [
+            {sort_field: {op: payload.get("v")}},
+            {sort_field: payload.get("v"), "_id": {op: payload["id"]}},
+        ]
+    }
+
+
+def paginate(collection, query=None, projection=None, sort_field="_id",
+             direction=ASCENDING, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """Busca uma página de documentos ordenados por (`sort_field`, `_id`).
+
+    Args:
+        collection: Collection do PyMongo.
+        query: Filtro da listagem.
+        projection: Projeção opcional repassada ao `find`.
+        sort_field: Campo de ordenação (o `_id` é usado como desempate).
+        direction: ASCENDING ou DESCENDING.
+        limit: Tamanho da página (restrito a MAX_PAGE_SIZE).
+        cursor: Cursor devolvido pela página anterior.
+
+    Returns:
+        tuple: (documentos, next_cursor), com next_cursor None na última página.
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    filters = dict(query or {})
+    if cursor:
+        after = _after(decode_cursor(cursor), sort_field, direction)
+        filters = {"$and": [filters, after]} if filters else after
+
+    sort = [("_id", direction)]
+    if sort_field != "_id":
+        sort.insert(0, (sort_field, direction))
+
+    # Um documento a mais indica se existe próxima página
+    docs = list(collection.find(filters, projection).sort(sort).limit(limit + 1))
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1], sort_field)
+
+
+
+def paginated_response(items, next_cursor, status=200):
+    """Resposta para listagens cujo corpo é uma lista: o cursor vai no header X-Next-Cursor."""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response, status
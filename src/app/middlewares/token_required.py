@@ -18,7 +18,7 @@ def token_required(f):
             data = jwt.decode(
                 token, current_app.config["SECRET_KEY"], algorithms=["HS256"]
             )
-            current_user = UserModel.find_by_email(data["email"])
+            current_user = UserModel.find_for_auth(data.get("_id"), data.get("email"))
             if not current_user:
                 return jsonify({"message": "User not found!"}), 401
         except jwt.ExpiredSignatureError:
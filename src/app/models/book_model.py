@@ -2,7 +2,12 @@
 
 from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import DESCENDING
 from src.app import mongo
+from src.app.database.pagination import STREAM_BATCH_SIZE, paginate
+from src.app.provider.cache import response_cache
+from .collection_model import CollectionModel
+from .deck_subscriber_model import DeckSubscriberModel
 
 
 class BookModel:
@@ -100,10 +105,19 @@ class BookModel:
         return None
 
     @staticmethod
-    def get_all():
-        """Retorna todos os livros."""
-        books = mongo.db.books.find().sort("created_at", -1)
-        return [BookModel(**book).to_dict() for book in books]
+    def get_all(limit=None, cursor=None):
+        """Retorna uma página de livros (mais recentes primeiro) e o cursor da próxima."""
+        books, next_cursor = paginate(
+            mongo.db.books, sort_field="created_at", direction=DESCENDING, limit=limit, cursor=cursor
+        )
+        return [BookModel(**book).to_dict() for book in books], next_cursor
+
+    @staticmethod
+    def iter_all(batch_size=STREAM_BATCH_SIZE):
+        """Itera sobre todos os livros (mais recentes primeiro) direto do cursor."""
+        books = mongo.db.books.find().sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+        for book in books.batch_size(batch_size):
+            yield BookModel(**book).to_dict()
 
     @staticmethod
     def get_available_books(user_id):
@@ -114,14 +128,17 @@ class BookModel:
         user_books = mongo.db.user_books.find({"user_id": user_obj_id})
         user_book_ids = {str(b["book_id"]) for b in user_books}
 
-        # Busca todos os livros
-        all_books = mongo.db.books.find().sort("created_at", -1)
+        # Catálogo completo (em cache até algum livro ser alterado)
+        all_books = response_cache.memoize(
+            "books:catalog",
+            ["books"],
+            lambda: [BookModel(**book).to_dict() for book in mongo.db.books.find().sort("created_at", -1)],
+        )
         
         available_books = []
         discover_books = []
 
-        for book in all_books:
-            book_dict = BookModel(**book).to_dict()
+        for book_dict in all_books:
             book_id = book_dict["_id"]
 
             if book_dict["is_free"] or book_id in user_book_ids:
@@ -171,10 +188,13 @@ class BookModel:
         # Remove collection e decks do livro (decks órfãos são removidos)
         if collection_id:
             coll = mongo.db.collections.find_one({"_id": collection_id})
+            mongo.db.collections.delete_one({"_id": collection_id})
             if coll and coll.get("decks"):
                 for deck_id in coll["decks"]:
                     mongo.db.decks.delete_one({"_id": deck_id})
-            mongo.db.collections.delete_one({"_id": collection_id})
+                # Collections de usuários que salvaram capítulos do livro
+                CollectionModel.refresh_card_counts(coll["decks"])
+                DeckSubscriberModel.remove_decks(coll["decks"])
 
         # Deleta o livro
         result = mongo.db.books.delete_one({"_id": book_obj_id})
@@ -3,7 +3,10 @@
 from datetime import datetime, timezone
 from bson import ObjectId
 from src.app import mongo
+from src.app.database.bulk import fetch_by_ids, hydrate
+from src.app.database.pagination import STREAM_BATCH_SIZE, paginate
 from src.app.models.deck_model import DeckModel
+from src.app.models.deck_subscriber_model import DeckSubscriberModel
 from src.app.models.user_progress_model import UserProgressModel
 
 
@@ -42,30 +45,18 @@ class CardModel:
         self.deck = deck
         self.user = user
     
-    @staticmethod    
+    @staticmethod
     def get_user_by_deck(deck_id):
-        collection_ids = mongo.db.collections.find(
-            { "decks": ObjectId(deck_id) },
-        )
+        """Ids dos usuários que têm o deck em alguma collection."""
+        if DeckSubscriberModel.is_ready():
+            return DeckSubscriberModel.get_user_ids(deck_id)
 
-        collection_ids = [col['_id'] for col in collection_ids]
-        
-        pipeline = [
-            {
-                "$match": {
-                    "collections": { "$in": collection_ids }
-                }
-            },
-            {
-                "$project": {
-                    "_id": 1 
-                }
-            }
+        # Antes do primeiro `flask db rebuild-deck-subscribers`: collections -> users
+        collection_ids = [
+            col["_id"] for col in mongo.db.collections.find({"decks": ObjectId(deck_id)}, {"_id": 1})
         ]
-
-        user_ids = list(mongo.db.users.aggregate(pipeline))
-        user_ids = [str(user['_id']) for user in user_ids]
-        return(user_ids)
+        users = mongo.db.users.find({"collections": {"$in": collection_ids}}, {"_id": 1})
+        return [str(user["_id"]) for user in users]
 
     def save_to_db(self):
         """Salva ou atualiza a carta no banco de dados MongoDB."""
@@ -77,11 +68,10 @@ class CardModel:
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
-        
-        users = CardModel.get_user_by_deck(self.deck)        
 
         if self._id:
             mongo.db.cards.update_one({"_id": ObjectId(self._id)}, {"$set": card_data})
+            UserProgressModel.refresh_card_snapshots(self._id, card_data)
             return str(self._id)
         result = mongo.db.cards.insert_one(card_data)
         self._id = str(result.inserted_id)
@@ -91,8 +81,10 @@ class CardModel:
                 self.deck, [str(result.inserted_id)]
             )
 
-        for i in users:
-            UserProgressModel.create_or_update(i, self.deck, self._id)
+        # Decks lazy não criam progresso por assinante: a carta aparece como nova
+        users = CardModel.get_user_by_deck(self.deck) if self.deck and not DeckModel.is_lazy(self.deck) else []
+        if users:
+            UserProgressModel.seed_progress(users, {self.deck: [self._id]})
 
         return str(result.inserted_id)
                 
@@ -110,7 +102,8 @@ class CardModel:
             "image": image,
             "created_at": datetime.now(timezone.utc),
             "updated_at": datetime.now(timezone.utc),
-            "cards": []
+            "cards": [],
+            "card_count": 0,
         }
         result = mongo.db.decks.insert_one(deck_data)
         deck_id = str(result.inserted_id)
@@ -131,6 +124,9 @@ class CardModel:
         """Remove a carta do banco de dados MongoDB."""
         if self._id:
             mongo.db.cards.delete_one({"_id": ObjectId(self._id)})
+            deck_ids = DeckModel.remove_card_from_decks(self._id)
+            UserProgressModel.delete_card_progress(self._id, deck_ids)
+            UserProgressModel.refresh_card_snapshots(self._id)
 
     @staticmethod
     def get_by_id(card_id):
@@ -145,21 +141,41 @@ class CardModel:
         deck = DeckModel.get_by_id(deck_id)
         if not deck:
             return {"cards": []}
-        list_cards = []
-        for card_id in deck.get("cards", []):
-            card_doc = mongo.db.cards.find_one({"_id": ObjectId(card_id)})
-            if not card_doc:
-                continue
-            card = CardModel(**card_doc)
-            list_cards.append(card.to_dict())
-            
+        card_docs = hydrate(mongo.db.cards, deck.get("cards", []))
+        list_cards = [CardModel(**card_doc).to_dict() for card_doc in card_docs]
+
         return {'cards':list_cards}
 
     @staticmethod
-    def get_all_cards():
-        """Retorna uma lista de todas as cartas no banco de dados."""
-        cards = mongo.db.cards.find()
-        return [CardModel.from_dict(card) for card in cards]
+    def get_cards_by_decks(decks):
+        """Carrega as cartas de vários decks com consultas $in em lote.
+
+        :param decks: Lista de dicts de deck (com `_id` e `cards`).
+        :return: {deck_id (str): [card dicts na ordem do deck]}; ids inexistentes são ignorados.
+        """
+        all_card_ids = [card_id for deck in decks for card_id in deck.get("cards", [])]
+        card_docs = fetch_by_ids(mongo.db.cards, all_card_ids)
+
+        cards_by_deck = {}
+        for deck in decks:
+            cards_by_deck[str(deck["_id"])] = [
+                CardModel(**card_docs[ObjectId(card_id)]).to_dict()
+                for card_id in deck.get("cards", [])
+                if ObjectId(card_id) in card_docs
+            ]
+        return cards_by_deck
+
+    @staticmethod
+    def get_all_cards(limit=None, cursor=None):
+        """Retorna uma página de cartas e o cursor da próxima página."""
+        cards, next_cursor = paginate(mongo.db.cards, limit=limit, cursor=cursor)
+        return [CardModel.from_dict(card) for card in cards], next_cursor
+
+    @staticmethod
+    def iter_all_cards(batch_size=STREAM_BATCH_SIZE):
+        """Itera sobre todas as cartas direto do cursor (sem carregar a lista inteira)."""
+        for card in mongo.db.cards.find().sort("_id", 1).batch_size(batch_size):
+            yield CardModel.from_dict(card)
 
     @staticmethod
     def from_dict(card_data):
@@ -1,15 +1,32 @@
 from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import ReturnDocument
 from src.app import mongo
+from src.app.database.pagination import STREAM_BATCH_SIZE, paginate
 
 class ChatModel:
-    """Class to handle chat model"""
+    """Class to handle chat model
 
-    def __init__(self, _id=None, user_id="", settings={}, history =[], created_at=None, updated_at=None,):
+    As mensagens ficam em `chat_messages` (uma por documento, com `seq`). O
+    documento do chat guarda só a janela `recent` com as últimas
+    RECENT_WINDOW mensagens, o `summary` das mais antigas e os contadores
+    `message_count` / `summarized_count`. Chats antigos, com o array `history`,
+    são migrados na primeira vez que são lidos ou recebem mensagens.
+    """
+
+    # Mensagens mantidas no documento do chat (e enviadas ao modelo)
+    RECENT_WINDOW = 20
+
+    def __init__(self, _id=None, user_id="", settings={}, history =[], created_at=None, updated_at=None,
+                 recent=None, summary=None, message_count=0, summarized_count=0):
         self._id = str(_id) if _id else None
         self.user_id = ObjectId(user_id)
         self.settings = settings
         self.history = history or []
+        self.recent = recent or []
+        self.summary = summary
+        self.message_count = message_count
+        self.summarized_count = summarized_count
         self.created_at = created_at or datetime.now(timezone.utc)
         self.updated_at = updated_at or datetime.now(timezone.utc)
         
@@ -18,18 +35,148 @@ class ChatModel:
         chat = {
             "user_id": self.user_id,
             "settings": self.settings,
-            "history": self.history,
+            "recent": [],
+            "summary": None,
+            "message_count": 0,
+            "summarized_count": 0,
             "created_at": self.created_at
         }
-        return str(mongo.db.chats.insert_one(chat).inserted_id)
+        chat_id = str(mongo.db.chats.insert_one(chat).inserted_id)
+        if self.history:
+            ChatModel.append_messages(chat_id, self.history)
+        return chat_id
+
+    @staticmethod
+    def _message(role, message):
+        return {"role": role, "parts": [{"text": message}]}
+
+    @staticmethod
+    def _insert_messages(chat_id, messages, first_seq):
+        now = datetime.now(timezone.utc)
+        mongo.db.chat_messages.insert_many([
+            {"chat_id": ObjectId(chat_id), "seq": first_seq + i, "role": m.get("role"),
+             "parts": m.get("parts", []), "created_at": now}
+            for i, m in enumerate(messages)
+        ])
+
+    @staticmethod
+    def _migrate_legacy(chat):
+        """Move o `history` de um chat antigo para `chat_messages` (uma vez só)."""
+        history = chat.get("history") or []
+        result = mongo.db.chats.update_one(
+            {"_id": chat["_id"], "message_count": {"$exists": False}},
+            {
+                "$set": {
+                    "recent": history[-ChatModel.RECENT_WINDOW:],
+                    "summary": None,
+                    "message_count": len(history),
+                    "summarized_count": 0,
+                },
+                "$unset": {"history": ""},
+            },
+        )
+        if result.modified_count and history:
+            ChatModel._insert_messages(chat["_id"], history, 0)
+
+    @staticmethod
+    def get_context(chat_id):
+        """Retorna o que é enviado ao modelo: {summary, recent, message_count, summarized_count}."""
+        projection = {"summary": 1, "recent": 1, "message_count": 1, "summarized_count": 1, "history": 1}
+        chat = mongo.db.chats.find_one({"_id": ObjectId(chat_id)}, projection)
+        if not chat:
+            return None
+        if "message_count" not in chat:
+            ChatModel._migrate_legacy(chat)
+            chat = mongo.db.chats.find_one({"_id": ObjectId(chat_id)}, projection)
+        return {
+            "summary": chat.get("summary"),
+            "recent": chat.get("recent", []),
+            "message_count": chat.get("message_count", 0),
+            "summarized_count": chat.get("summarized_count", 0),
+        }
+
+    @staticmethod
+    def append_messages(chat_id, messages):
+        """Grava as mensagens e atualiza a janela `recent` em um único update.
+
+        Returns:
+            dict: {"message_count", "summarized_count"} depois da inclusão, ou None se o chat não existir.
+        """
+        if not messages:
+            return None
+        chat = mongo.db.chats.find_one({"_id": ObjectId(chat_id)}, {"message_count": 1, "history": 1})
+        if not chat:
+            return None
+        if "message_count" not in chat:
+            ChatModel._migrate_legacy(chat)
+
+        chat = mongo.db.chats.find_one_and_update(
+            {"_id": ObjectId(chat_id)},
+            {
+                "$push": {"recent": {"$each": messages, "$slice": -ChatModel.RECENT_WINDOW}},
+                "$inc": {"message_count": len(messages)},
+                "$set": {"updated_at": datetime.now(timezone.utc)},
+            },
+            projection={"message_count": 1, "summarized_count": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        ChatModel._insert_messages(chat_id, messages, chat["message_count"] - len(messages))
+        return {"message_count": chat["message_count"], "summarized_count": chat.get("summarized_count", 0)}
+
+    @staticmethod
+    def belongs_to(chat_id, user_id):
+        return mongo.db.chats.count_documents({"_id": ObjectId(chat_id), "user_id": ObjectId(user_id)}, limit=1) > 0
+
+    @staticmethod
+    def get_messages(chat_id, start=0, end=None):
+        """Mensagens com `start <= seq < end`, em ordem."""
+        query = {"chat_id": ObjectId(chat_id), "seq": {"$gte": start}}
+        if end is not None:
+            query["seq"]["$lt"] = end
+        cursor = mongo.db.chat_messages.find(query, {"_id": 0, "role": 1, "parts": 1}).sort("seq", 1)
+        return list(cursor)
+
+    @staticmethod
+    def get_messages_page(chat_id, limit=None, cursor=None):
+        messages, next_cursor = paginate(
+            mongo.db.chat_messages,
+            {"chat_id": ObjectId(chat_id)},
+            {"chat_id": 0},
+            sort_field="seq",
+            limit=limit,
+            cursor=cursor,
+        )
+        return messages, next_cursor
+
+    @staticmethod
+    def set_summary(chat_id, summary, summarized_count, previous_summarized_count):
+        """Grava o resumo se ninguém tiver resumido o chat nesse meio tempo."""
+        result = mongo.db.chats.update_one(
+            {"_id": ObjectId(chat_id), "summarized_count": previous_summarized_count},
+            {"$set": {"summary": summary, "summarized_count": summarized_count}},
+        )
+        return result.modified_count > 0
 
     @staticmethod
-    def get_by_user_id(user_id):
-        chats = list(mongo.db.chats.find({"user_id": ObjectId(user_id)}))
+    def get_by_user_id(user_id, limit=None, cursor=None):
+        chats, next_cursor = paginate(
+            mongo.db.chats, {"user_id": ObjectId(user_id)}, limit=limit, cursor=cursor
+        )
         for chat in chats:
             chat["_id"] = str(chat["_id"])
             chat["user_id"] = str(chat["user_id"])
-        return chats
+            # Chats novos só guardam a janela recente; mantém a chave usada pelo app
+            chat.setdefault("history", chat.get("recent", []))
+        return chats, next_cursor
+
+    @staticmethod
+    def iter_by_user_id(user_id, batch_size=STREAM_BATCH_SIZE):
+        chats = mongo.db.chats.find({"user_id": ObjectId(user_id)}).sort("_id", 1)
+        for chat in chats.batch_size(batch_size):
+            chat["_id"] = str(chat["_id"])
+            chat["user_id"] = str(chat["user_id"])
+            chat.setdefault("history", chat.get("recent", []))
+            yield chat
     
     @staticmethod
     def get_by_id(chat_id):
@@ -43,10 +190,7 @@ class ChatModel:
     def add_message(chat_id, role, message):
         if not message or not role:
             return {"error": "Invalid data"}, 400
-        mongo.db.chats.update_one(
-            {"_id": ObjectId(chat_id)},
-            {"$push": {"history": {"role": role, "parts": [{"text": message}]}}}
-        )
+        ChatModel.append_messages(chat_id, [ChatModel._message(role, message)])
         return {"message": "Added successfully"}
 
     @staticmethod
@@ -57,6 +201,7 @@ class ChatModel:
     @staticmethod
     def delete_chat(chat_id):
         mongo.db.chats.delete_one({"_id": ObjectId(chat_id)})
+        mongo.db.chat_messages.delete_many({"chat_id": ObjectId(chat_id)})
         return {"message": "Chat deleted successfully"}
     
     def to_dict(self):
@@ -65,7 +210,9 @@ class ChatModel:
         "_id": self._id,
         "user_id": str(self.user_id),
         "settings": self.settings,
-        "history": self.history,
+        "history": self.history or self.recent,
+        "summary": self.summary,
+        "message_count": self.message_count,
         "created_at": self.created_at,
         "updated_at": self.updated_at
         }
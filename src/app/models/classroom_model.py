@@ -108,6 +108,23 @@ class ClassroomModel:
             
         return classroom
     
+    @staticmethod
+    def get_student_ids(classroom_id):
+        """Retorna os ids (str) dos alunos da classroom, sem carregar os dados dos usuários."""
+        classroom = mongo.db.classrooms.find_one({"_id": ObjectId(classroom_id)}, {"students": 1})
+        if not classroom:
+            return None
+        return [str(student_id) for student_id in classroom.get("students", [])]
+
+    @staticmethod
+    def get_student_ids_by_collection(collection_id):
+        """Retorna {classroom_id: [ids dos alunos]} das classrooms que usam a collection."""
+        cursor = mongo.db.classrooms.find({"collection": ObjectId(collection_id)}, {"students": 1})
+        return {
+            str(classroom["_id"]): [str(student_id) for student_id in classroom.get("students", [])]
+            for classroom in cursor
+        }
+
     @staticmethod
     def add_students(classroom_id, user_id):
         
@@ -121,10 +138,10 @@ class ClassroomModel:
         UserModel.add_collections_to_user(user_id, [classroom.get('collection')])
         
         
-        for item in classroom.get('decks'):
-            deck = DeckModel.get_by_id(item)
-            for card_id in deck.get("cards", []):
-                UserProgressModel.create_or_update(user_id, deck.get('_id'), card_id)
+        UserProgressModel.seed_progress(
+            [user_id],
+            {deck['_id']: deck.get("cards", []) for deck in DeckModel.get_many(classroom.get('decks'))},
+        )
         
         
     @staticmethod
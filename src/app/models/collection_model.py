@@ -1,13 +1,16 @@
 import random
 from bson import ObjectId
+from pymongo import UpdateOne
 from datetime import datetime, timedelta, timezone
 from src.app import mongo
+from src.app.database.pagination import paginate
+from .deck_subscriber_model import DeckSubscriberModel
 from .user_model import UserModel
 from .user_progress_model import UserProgressModel
 
 
 class CollectionModel:
-    def __init__(self, _id=None, name=None, created_at=None, updated_at=None, image=None, decks=None, user=None, classroom=None, book_id=None):
+    def __init__(self, _id=None, name=None, created_at=None, updated_at=None, image=None, decks=None, user=None, classroom=None, book_id=None, card_count=None):
         self._id = str(_id) if _id else None
         self.name = name
         self.created_at = created_at or datetime.now(timezone.utc)
@@ -17,6 +20,7 @@ class CollectionModel:
         self.user = user
         self.classroom = classroom
         self.book_id = str(book_id) if book_id else None
+        self.card_count = card_count
 
     def save_to_db(self):
         """Salva o Masterdeck no banco de dados MongoDB"""
@@ -25,7 +29,8 @@ class CollectionModel:
             'created_at': self.created_at,
             'updated_at': self.updated_at,
             'image': self.image,
-            'decks': self.decks
+            'decks': self.decks,
+            'card_count': CollectionModel._sum_card_counts(self.decks),
         }
         if self.book_id is not None:
             deck_data['book_id'] = ObjectId(self.book_id)
@@ -39,10 +44,10 @@ class CollectionModel:
         return {"collection_id": str(result.inserted_id)}
     
     @staticmethod
-    def get_all_collections():
-        """Retorna todos os collections como uma lista de dicionários"""
-        collections = mongo.db.collections.find()
-        return [CollectionModel(**c).to_dict() for c in collections]
+    def get_all_collections(limit=None, cursor=None):
+        """Retorna uma página de collections (lista de dicionários) e o cursor da próxima"""
+        collections, next_cursor = paginate(mongo.db.collections, limit=limit, cursor=cursor)
+        return [CollectionModel(**c).to_dict() for c in collections], next_cursor
     
     @staticmethod
     def get_by_id(deck_id):
@@ -56,37 +61,39 @@ class CollectionModel:
     
     @staticmethod
     def add_classroom(classroom_id, collection_id):
+        from .deck_model import DeckModel
+
         mongo.db.collections.update_one(
             {"_id": ObjectId(collection_id)},
             {"$set": {"classroom": ObjectId(classroom_id)}}
         )
+        # Decks de classroom são compartilhados pelos alunos: progresso criado na primeira revisão
+        collection = mongo.db.collections.find_one({"_id": ObjectId(collection_id)}, {"decks": 1})
+        if collection:
+            DeckModel.set_lazy_progress(collection.get("decks", []))
 
     
 
     @staticmethod
     def get_collections_by_user(user_id, include_book_collections_for_admin=False):
         """Busca collections do user. Se include_book_collections_for_admin=True, inclui também as collections dos livros (visível só para admin)."""
-        user = UserModel.find_by_id(user_id)
+        user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"collections": 1})
         if not user:
             return {"collections": []}
 
-        user = user.to_dict()
-        collections_list = []
+        collections_list = CollectionModel._get_enriched_collections(
+            user.get("collections", []), user_id
+        )
 
-        for collection_id in user.get("collections", []):
-            collection = CollectionModel.get_by_id(collection_id)
-            if not collection:
-                continue
-            collection = dict(collection)
-            CollectionModel._enrich_collection_with_decks(collection, user_id)
+        book_ids = [ObjectId(c["book_id"]) for c in collections_list if c.get("book_id")]
+        book_titles = {}
+        if book_ids:
+            books = mongo.db.books.find({"_id": {"$in": book_ids}}, {"titulo": 1})
+            book_titles = {str(b["_id"]): b.get("titulo", "") for b in books}
+        for collection in collections_list:
             if collection.get("book_id"):
                 collection["is_book_collection"] = True
-                book = mongo.db.books.find_one(
-                    {"_id": ObjectId(collection["book_id"])},
-                    {"titulo": 1},
-                )
-                collection["book_titulo"] = book.get("titulo", "") if book else ""
-            collections_list.append(collection)
+                collection["book_titulo"] = book_titles.get(collection["book_id"], "")
 
         if include_book_collections_for_admin:
             book_collections = CollectionModel.get_book_collections(user_id)
@@ -95,53 +102,106 @@ class CollectionModel:
         return {"collections": collections_list}
 
     @staticmethod
-    def _enrich_collection_with_decks(collection, user_id):
-        """Enriquece um dict de collection com decks, total_cards, pending_cards e review_collections_cards."""
+    def _get_enriched_collections(collection_ids, user_id):
+        """Carrega as collections (na ordem de `collection_ids`) com seus decks e contagens.
+
+        Usa uma agregação para collections + decks e outra para as cartas pendentes
+        do usuário em todos os decks, em vez de consultar deck a deck.
+        """
         from .deck_model import DeckModel
-        total_cards_in_collection = 0
-        pending_cards_in_collection = 0
-        list_deck_in_collection = []
-        review_collections_cards = []
-        for deck_id in collection.get("decks", []):
-            deck = DeckModel.get_by_id(deck_id)
-            if not deck:
+
+        collection_ids = [ObjectId(c) for c in collection_ids]
+        if not collection_ids:
+            return []
+
+        pipeline = [
+            {"$match": {"_id": {"$in": collection_ids}}},
+            {
+                "$lookup": {
+                    "from": "decks",
+                    "localField": "decks",
+                    "foreignField": "_id",
+                    "as": "deck_docs",
+                }
+            },
+            # Os arrays `cards` não saem do servidor: as contagens vêm de `card_count`
+            {"$project": {"deck_docs.cards": 0}},
+        ]
+        docs = {doc["_id"]: doc for doc in mongo.db.collections.aggregate(pipeline)}
+
+        all_deck_ids = {d["_id"] for doc in docs.values() for d in doc["deck_docs"]}
+        # Decks antigos, ainda sem o contador, são contados no servidor
+        legacy_counts = DeckModel.get_card_counts(
+            [d["_id"] for doc in docs.values() for d in doc["deck_docs"] if "card_count" not in d]
+        )
+        pending_by_deck = (
+            UserProgressModel.get_pending_by_decks(user_id, list(all_deck_ids))
+            if user_id and all_deck_ids
+            else {}
+        )
+
+        collections_list = []
+        for collection_id in collection_ids:
+            doc = docs.get(collection_id)
+            if not doc:
                 continue
-            cards_count = len(deck.get("cards", []))
-            total_cards_in_collection += cards_count
-            pending_count = UserProgressModel.count_pending_cards(user_id, deck_id) if user_id else 0
-            pending_cards_in_collection += pending_count
-            review_cards = UserProgressModel.get_pending_cards(user_id, deck_id) if user_id else []
-            for card in review_cards:
-                review_collections_cards.append(card)
-            deck.update({
-                "total_cards": cards_count,
-                "pending_cards": pending_count,
-                "review_cards": review_cards,
+            deck_docs = {d["_id"]: d for d in doc.pop("deck_docs")}
+            collection = CollectionModel(**doc).to_dict()
+
+            total_cards_in_collection = 0
+            pending_cards_in_collection = 0
+            list_deck_in_collection = []
+            review_collections_cards = []
+            # Mantém a ordem dos decks na collection
+            for deck_id in doc.get("decks", []):
+                deck_doc = deck_docs.get(ObjectId(deck_id))
+                if not deck_doc:
+                    continue
+                deck = DeckModel(**deck_doc).to_dict()
+                deck.pop("cards")
+                pending = pending_by_deck.get(deck_doc["_id"], {"count": 0, "cards": []})
+                cards_count = legacy_counts.get(deck_doc["_id"], deck["card_count"])
+                deck["card_count"] = cards_count
+                total_cards_in_collection += cards_count
+                pending_cards_in_collection += pending["count"]
+                review_collections_cards.extend(pending["cards"])
+                deck.update({
+                    "total_cards": cards_count,
+                    "pending_cards": pending["count"],
+                    "review_cards": pending["cards"],
+                })
+                list_deck_in_collection.append(deck)
+
+            collection.update({
+                "total_cards": total_cards_in_collection,
+                "pending_cards": pending_cards_in_collection,
+                "decks": list_deck_in_collection,
+                "review_collections_cards": review_collections_cards,
             })
-            list_deck_in_collection.append(deck)
-        collection.update({
-            "total_cards": total_cards_in_collection,
-            "pending_cards": pending_cards_in_collection,
-            "decks": list_deck_in_collection,
-            "review_collections_cards": review_collections_cards,
-        })
-        return collection
+            collections_list.append(collection)
+
+        return collections_list
 
     @staticmethod
     def get_book_collections(user_id=None):
         """Retorna as collections dos livros (collection_id dos books). Só para uso admin."""
-        books = mongo.db.books.find({"collection_id": {"$exists": True, "$ne": None}})
+        books = list(
+            mongo.db.books.find(
+                {"collection_id": {"$exists": True, "$ne": None}},
+                {"collection_id": 1, "titulo": 1},
+            )
+        )
+        collections = CollectionModel._get_enriched_collections(
+            [book["collection_id"] for book in books], user_id
+        )
+        collections_by_id = {c["_id"]: c for c in collections}
+
         collections_list = []
         for book in books:
-            collection_id = book.get("collection_id")
-            if not collection_id:
-                continue
-            collection_id_str = str(collection_id)
-            collection = CollectionModel.get_by_id(collection_id_str)
+            collection = collections_by_id.get(str(book["collection_id"]))
             if not collection:
                 continue
             collection = dict(collection)
-            CollectionModel._enrich_collection_with_decks(collection, user_id)
             collection["is_book_collection"] = True
             collection["book_id"] = str(book["_id"])
             collection["book_titulo"] = book.get("titulo") or ""
@@ -150,14 +210,95 @@ class CollectionModel:
 
     @staticmethod
     def add_decks_to_collection(collection_id, deck_ids):
-        """Adiciona uma lista de deck IDs ao Collection especificado (evita duplicatas com $addToSet)."""
-        deck_object_ids = [ObjectId(deck_id) for deck_id in deck_ids]
-        result = mongo.db.collections.update_one(
-            {"_id": ObjectId(collection_id)},
-            {"$addToSet": {"decks": {"$each": deck_object_ids}}, "$set": {"updated_at": datetime.now(timezone.utc)}}
-        )
+        """Adiciona uma lista de deck IDs ao Collection especificado (evita duplicatas).
+
+        Cada deck entra com um update condicional (`decks` sem o deck) que também
+        soma as cartas dele em `card_count`, então o contador nunca conta um deck
+        duas vezes.
+        """
+        from .deck_model import DeckModel
+
+        collection_object_id = ObjectId(collection_id)
+        deck_object_ids = list(dict.fromkeys(ObjectId(deck_id) for deck_id in deck_ids))
+        if not deck_object_ids:
+            return False
+
+        counts = DeckModel.get_card_counts(deck_object_ids)
+        now = datetime.now(timezone.utc)
+        ops = []
+        for deck_id in deck_object_ids:
+            ops.append(UpdateOne(
+                {"_id": collection_object_id, "decks": {"$ne": deck_id}, "card_count": {"$exists": True}},
+                {"$push": {"decks": deck_id}, "$inc": {"card_count": counts.get(deck_id, 0)}, "$set": {"updated_at": now}},
+            ))
+            # Collections antigas (sem contador) ficam para o repair-card-counts
+            ops.append(UpdateOne(
+                {"_id": collection_object_id, "card_count": {"$exists": False}},
+                {"$addToSet": {"decks": deck_id}, "$set": {"updated_at": now}},
+            ))
+        result = mongo.db.collections.bulk_write(ops, ordered=True)
+        if mongo.db.collections.count_documents({"_id": collection_object_id, "classroom": {"$ne": None}}, limit=1):
+            DeckModel.set_lazy_progress(deck_object_ids)
+        DeckSubscriberModel.add_decks(collection_object_id, deck_object_ids)
         return result.modified_count > 0
-    
+
+    @staticmethod
+    def inc_card_count(deck_id, amount):
+        """Soma `amount` ao `card_count` das collections que contêm o deck."""
+        mongo.db.collections.update_many(
+            {"decks": ObjectId(deck_id), "card_count": {"$exists": True}},
+            {"$inc": {"card_count": amount}},
+        )
+
+    @staticmethod
+    def _sum_card_counts(deck_ids):
+        from .deck_model import DeckModel
+
+        counts = DeckModel.get_card_counts(deck_ids)
+        return sum(counts.get(ObjectId(d), 0) for d in dict.fromkeys(deck_ids))
+
+    @staticmethod
+    def refresh_card_counts(deck_ids):
+        """Recalcula `card_count` das collections que contêm algum dos decks (ex.: após remover cartas ou decks)."""
+        deck_object_ids = [ObjectId(d) for d in deck_ids]
+        if not deck_object_ids:
+            return 0
+        collections = mongo.db.collections.find({"decks": {"$in": deck_object_ids}}, {"decks": 1})
+        return CollectionModel._write_card_counts(collections)
+
+    @staticmethod
+    def _write_card_counts(collections, only_drifted=False):
+        from .deck_model import DeckModel
+
+        collections = list(collections)
+        counts = DeckModel.get_card_counts({d for c in collections for d in c.get("decks", [])})
+        ops = []
+        for collection in collections:
+            total = sum(counts.get(ObjectId(d), 0) for d in dict.fromkeys(collection.get("decks", [])))
+            if only_drifted and collection.get("card_count") == total:
+                continue
+            ops.append(UpdateOne({"_id": collection["_id"]}, {"$set": {"card_count": total}}))
+        if not ops:
+            return 0
+        return mongo.db.collections.bulk_write(ops, ordered=False).modified_count
+
+    @staticmethod
+    def repair_card_counts(batch_size=1000):
+        """Recalcula `card_count` de todas as collections (rodar depois de `DeckModel.repair_card_counts`).
+
+        Returns:
+            int: Quantidade de collections corrigidas.
+        """
+        repaired, batch = 0, []
+        for collection in mongo.db.collections.find({}, {"decks": 1, "card_count": 1}).sort("_id", 1):
+            batch.append(collection)
+            if len(batch) >= batch_size:
+                repaired += CollectionModel._write_card_counts(batch, only_drifted=True)
+                batch = []
+        if batch:
+            repaired += CollectionModel._write_card_counts(batch, only_drifted=True)
+        return repaired
+
     @staticmethod
     def update_collection(collection_id: str, name: str | None = None, image: str | None = None) -> bool:
         """Atualiza os dados básicos de uma collection.
@@ -191,15 +332,14 @@ class CollectionModel:
     @staticmethod
     def get_user_collection_by_book_id(user_id, book_id):
         """Retorna a collection do usuário associada ao livro (criada ao salvar cartas de um capítulo)."""
-        user = UserModel.find_by_id(user_id)
+        user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"collections": 1})
         if not user:
             return None
-        user = user.to_dict() if hasattr(user, "to_dict") else user
-        book_id_str = str(book_id)
-        for collection_id in user.get("collections", []):
-            collection = CollectionModel.get_by_id(collection_id)
-            if collection and collection.get("book_id") == book_id_str:
-                return collection
+        collection = mongo.db.collections.find_one(
+            {"_id": {"$in": user.get("collections", [])}, "book_id": ObjectId(book_id)}
+        )
+        if collection:
+            return CollectionModel(**collection).to_dict()
         return None
 
     def to_dict(self):
@@ -210,8 +350,9 @@ class CollectionModel:
             'created_at': self.created_at,
             'updated_at': self.updated_at,
             'image': self.image,
-            'decks': [str(deck_id) for deck_id in self.decks],
-            'classroom': str(self.classroom) if self.classroom else self.classroom,
+            'decks': self.decks,
+            'classroom': self.classroom,
             'book_id': self.book_id,
+            'card_count': self.card_count,
         }
 
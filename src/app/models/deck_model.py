@@ -1,13 +1,18 @@
 import random
 from bson import ObjectId
+from pymongo import UpdateOne
 from datetime import datetime, timedelta, timezone
 from src.app import mongo
+from src.app.database.bulk import hydrate
+from src.app.database.pagination import paginate
 from .collection_model import CollectionModel
-from .user_model import UserModel
 from .user_progress_model import UserProgressModel
 
 
 class DeckModel:
+    # `card_count` com fallback para decks antigos que ainda não têm o contador
+    CARD_COUNT_EXPR = {"$ifNull": ["$card_count", {"$size": {"$ifNull": ["$cards", []]}}]}
+
     def __init__(
         self,
         _id=None,
@@ -17,6 +22,8 @@ class DeckModel:
         collection_id=None,
         image=None,
         cards=None,
+        card_count=None,
+        lazy_progress=False,
     ):
         self.id = str(_id) if _id else None
         self.name = name
@@ -25,6 +32,9 @@ class DeckModel:
         self.collection_id = collection_id
         self.image = image
         self.cards = cards or []
+        self.card_count = card_count if card_count is not None else len(self.cards)
+        # Decks compartilhados (livros, classrooms): o progresso só é criado na primeira revisão
+        self.lazy_progress = lazy_progress
 
     @staticmethod
     def get_by_id(deck_id):
@@ -35,6 +45,11 @@ class DeckModel:
             return result.to_dict()
         return None
 
+    @staticmethod
+    def get_many(deck_ids):
+        """Busca vários decks em lote e retorna dicionários na ordem de `deck_ids` (ignora inexistentes)."""
+        return [DeckModel(**d).to_dict() for d in hydrate(mongo.db.decks, deck_ids)]
+
     def save_to_db(self):
         """Salva o  deck no banco de dados MongoDB"""
         deck_data = {
@@ -43,6 +58,8 @@ class DeckModel:
             "updated_at": self.updated_at,
             "image": self.image,
             "cards": self.cards,
+            "card_count": len(self.cards),
+            "lazy_progress": self.lazy_progress,
         }
         result = mongo.db.decks.insert_one(deck_data)
         self.id = str(result.inserted_id)
@@ -53,63 +70,140 @@ class DeckModel:
         return str(result.inserted_id)
 
     @staticmethod
-    def get_all_decks():
-        """Retorna todos os  decks como uma lista de dicionários"""
-        decks = mongo.db.decks.find()
-        return [DeckModel(**d).to_dict() for d in decks]
+    def get_all_decks(limit=None, cursor=None):
+        """Retorna uma página de decks (lista de dicionários) e o cursor da próxima"""
+        decks, next_cursor = paginate(mongo.db.decks, limit=limit, cursor=cursor)
+        return [DeckModel(**d).to_dict() for d in decks], next_cursor
 
     @staticmethod
     def add_cards_to_deck(deck_id, cards_ids):
-        """Adiciona uma lista de cards IDs ao deck especificado"""
-        # Converte os IDs de decks para ObjectId
+        """Adiciona uma lista de cards IDs ao deck especificado.
+
+        O `card_count` do deck é recalculado na mesma atualização (pipeline) e
+        as collections que contêm o deck recebem `$inc` com o número de cartas.
+        """
         cards_object_ids = [ObjectId(card_id) for card_id in cards_ids]
+        deck_object_id = ObjectId(deck_id)
 
-        # Atualiza o Collection, adicionando os IDs dos decks
         result = mongo.db.decks.update_one(
-            {"_id": ObjectId(deck_id)},
-            {
-                "$push": {"cards": {"$each": cards_object_ids}},
-                "$set": {"updated_at": datetime.now(timezone.utc)},
-            },
+            {"_id": deck_object_id},
+            [
+                {
+                    "$set": {
+                        "cards": {"$concatArrays": [{"$ifNull": ["$cards", []]}, cards_object_ids]},
+                        "updated_at": datetime.now(timezone.utc),
+                    }
+                },
+                {"$set": {"card_count": {"$size": "$cards"}}},
+            ],
         )
+        if result.modified_count and cards_object_ids:
+            CollectionModel.inc_card_count(deck_object_id, len(cards_object_ids))
 
         return result.modified_count > 0
 
     @staticmethod
-    def get_decks_by_collection_id(collection_id, user_id):
-        """ "Busca todos os decks do user e retorna a quantidade de cartas totais e pendentes."""
-        collection = CollectionModel.get_by_id(collection_id)
+    def remove_card_from_decks(card_id):
+        """Tira a carta de todos os decks (e atualiza os contadores). Retorna os ids dos decks."""
+        card_object_id = ObjectId(card_id)
+        deck_ids = [d["_id"] for d in mongo.db.decks.find({"cards": card_object_id}, {"_id": 1})]
+        if not deck_ids:
+            return []
+
+        mongo.db.decks.update_many(
+            {"_id": {"$in": deck_ids}},
+            [
+                {
+                    "$set": {
+                        "cards": {"$filter": {"input": "$cards", "cond": {"$ne": ["$$this", card_object_id]}}},
+                        "updated_at": datetime.now(timezone.utc),
+                    }
+                },
+                {"$set": {"card_count": {"$size": "$cards"}}},
+            ],
+        )
+        CollectionModel.refresh_card_counts(deck_ids)
+        return deck_ids
 
-        decks_list = []
+    @staticmethod
+    def is_lazy(deck_id):
+        """True se o progresso do deck é criado só na primeira revisão (`lazy_progress`)."""
+        return mongo.db.decks.count_documents({"_id": ObjectId(deck_id), "lazy_progress": True}, limit=1) > 0
 
-        for deck_id in collection.get("decks", []):
-            deck = DeckModel.get_by_id(deck_id)
+    @staticmethod
+    def set_lazy_progress(deck_ids):
+        """Marca os decks como `lazy_progress`. Retorna quantos mudaram."""
+        object_ids = [ObjectId(d) for d in deck_ids]
+        if not object_ids:
+            return 0
+        return mongo.db.decks.update_many(
+            {"_id": {"$in": object_ids}, "lazy_progress": {"$ne": True}}, {"$set": {"lazy_progress": True}}
+        ).modified_count
 
-            pending_count = UserProgressModel.count_pending_cards(
-                user_id, deck.get("_id") or deck.get("id")
-            )
+    @staticmethod
+    def mark_lazy_decks():
+        """Marca como `lazy_progress` os capítulos de livros e os decks das collections de classrooms."""
+        deck_ids = {chapter.get("deck_id") for book in mongo.db.books.find({}, {"chapters.deck_id": 1})
+                    for chapter in book.get("chapters", []) if chapter.get("deck_id")}
+        for collection in mongo.db.collections.find({"classroom": {"$exists": True, "$ne": None}}, {"decks": 1}):
+            deck_ids.update(collection.get("decks", []))
+        return DeckModel.set_lazy_progress(deck_ids)
 
-            deck.update(
-                {
-                    "total_cards": len(deck.get("cards", [])),
-                    "pending_cards": pending_count,
+    @staticmethod
+    def get_card_counts(deck_ids):
+        """{ObjectId do deck: quantidade de cartas} sem carregar os arrays `cards`."""
+        object_ids = [ObjectId(d) for d in deck_ids]
+        if not object_ids:
+            return {}
+        pipeline = [
+            {"$match": {"_id": {"$in": object_ids}}},
+            {"$project": {"card_count": DeckModel.CARD_COUNT_EXPR}},
+        ]
+        return {doc["_id"]: doc["card_count"] for doc in mongo.db.decks.aggregate(pipeline)}
+
+    @staticmethod
+    def repair_card_counts(batch_size=1000):
+        """Recalcula `card_count` dos decks a partir de `cards`. Retorna quantos foram corrigidos."""
+        pipeline = [
+            {
+                "$project": {
+                    "card_count": {"$ifNull": ["$card_count", None]},
+                    "actual": {"$size": {"$ifNull": ["$cards", []]}},
                 }
-            )
+            },
+            {"$match": {"$expr": {"$ne": ["$card_count", "$actual"]}}},
+        ]
+        repaired, ops = 0, []
+        for doc in mongo.db.decks.aggregate(pipeline):
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"card_count": doc["actual"]}}))
+            if len(ops) >= batch_size:
+                repaired += mongo.db.decks.bulk_write(ops, ordered=False).modified_count
+                ops = []
+        if ops:
+            repaired += mongo.db.decks.bulk_write(ops, ordered=False).modified_count
+        return repaired
 
-            from .card_model import CardModel
+    @staticmethod
+    def get_decks_by_collection_id(collection_id, user_id):
+        """ "Busca todos os decks do user e retorna a quantidade de cartas totais e pendentes."""
+        from .card_model import CardModel
 
-            cards_list = []
+        collection = CollectionModel.get_by_id(collection_id)
 
-            for card_id in deck.get("cards", []):
-                card = CardModel.get_by_id(card_id)
-                cards_list.append(card.to_dict() if card and hasattr(card, "to_dict") else card)
+        decks_list = DeckModel.get_many(collection.get("decks", []))
+        pending_by_deck = UserProgressModel.count_pending_by_decks(
+            user_id, [deck["_id"] for deck in decks_list]
+        )
+        cards_by_deck = CardModel.get_cards_by_decks(decks_list)
 
+        for deck in decks_list:
             deck.update(
                 {
-                    "cards": cards_list,
+                    "total_cards": deck["card_count"],
+                    "pending_cards": pending_by_deck.get(ObjectId(deck["_id"]), 0),
+                    "cards": cards_by_deck.get(deck["_id"], []),
                 }
             )
-            decks_list.append(deck)
 
         return {"decks": decks_list}
     
@@ -125,26 +219,22 @@ class DeckModel:
             return
 
 
-        for card_id in deck.get("cards", []):
-            UserProgressModel.create_or_update(user_id, deck_id, card_id)
-            
+        UserProgressModel.seed_progress([user_id], {deck_id: deck.get("cards", [])})
+
         return True
     
     @staticmethod
     def check_if_the_user_has_the_deck(user_id, deck_id):
-        user = UserModel.find_by_id(user_id)
+        user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"collections": 1})
         if not user:
             return {"user_has_deck": "false", "error": "User not found"}
-        user = user.to_dict() if hasattr(user, "to_dict") else user
-
-        for collection_id in user.get("collections", []):
-            collection = CollectionModel.get_by_id(collection_id)
-            
-            if not collection:
-                continue  
 
-            if deck_id in collection.get("decks", []):
-                return {"user_has_deck": "true"}
+        has_deck = mongo.db.collections.find_one(
+            {"_id": {"$in": user.get("collections", [])}, "decks": ObjectId(deck_id)},
+            {"_id": 1},
+        )
+        if has_deck:
+            return {"user_has_deck": "true"}
 
         return {"user_has_deck": "false"} 
     
@@ -158,5 +248,7 @@ class DeckModel:
             "created_at": self.created_at,
             "updated_at": self.updated_at,
             "image": self.image,
-            "cards": [str(ObjectId(card_id)) for card_id in self.cards],
+            "cards": self.cards,
+            "card_count": self.card_count,
+            "lazy_progress": self.lazy_progress,
         }
@@ -0,0 +1,176 @@
+"""Model for the deck -> users reverse index (collection `deck_subscribers`)."""
+
+from bson import ObjectId
+from pymongo import DeleteMany, UpdateOne
+from src.app import mongo
+from src.app.provider.cache import TTLCache
+from .job_checkpoint_model import JobCheckpointModel
+
+
+class DeckSubscriberModel:
+    """Usuários que têm cada deck em alguma das suas collections.
+
+    Um documento por (deck_id, user_id) com `via`: as collections do usuário
+    que contêm o deck. Mantido por `UserModel.add_collections_to_user`,
+    `CollectionModel.add_decks_to_collection` e pelas remoções de collections
+    e decks; quando `via` fica vazio o usuário deixa de assinar o deck.
+
+    `get_user_ids` só usa o índice depois que `flask db rebuild-deck-subscribers`
+    terminou uma vez (checkpoint `deck_subscribers:rebuild`); antes disso
+    continua resolvendo por collections -> users.
+    """
+
+    JOB_ID = "deck_subscribers:rebuild"
+
+    _ready = TTLCache(maxsize=1, ttl=60)
+
+    @staticmethod
+    def is_ready():
+        ready = DeckSubscriberModel._ready.get(DeckSubscriberModel.JOB_ID)
+        if ready is None:
+            checkpoint = JobCheckpointModel.get(DeckSubscriberModel.JOB_ID)
+            ready = bool(checkpoint and checkpoint.get("finished_at"))
+            DeckSubscriberModel._ready.set(DeckSubscriberModel.JOB_ID, ready)
+        return ready
+
+    @staticmethod
+    def _subscribe_operations(user_id, collection_id, deck_ids):
+        return [
+            UpdateOne(
+                {"deck_id": ObjectId(deck_id), "user_id": ObjectId(user_id)},
+                {"$addToSet": {"via": ObjectId(collection_id)}},
+                upsert=True,
+            )
+            for deck_id in deck_ids
+        ]
+
+    @staticmethod
+    def _write(operations):
+        if operations:
+            mongo.db.deck_subscribers.bulk_write(operations, ordered=False)
+
+    @staticmethod
+    def add_collections(user_id, collection_ids):
+        """Inscreve o usuário nos decks das collections que ele acabou de receber."""
+        collection_ids = [ObjectId(c) for c in collection_ids]
+        if not collection_ids:
+            return
+        operations = []
+        for collection in mongo.db.collections.find({"_id": {"$in": collection_ids}}, {"decks": 1}):
+            operations += DeckSubscriberModel._subscribe_operations(
+                user_id, collection["_id"], collection.get("decks", [])
+            )
+        DeckSubscriberModel._write(operations)
+
+    @staticmethod
+    def add_decks(collection_id, deck_ids):
+        """Inscreve nos decks novos todos os usuários que têm a collection."""
+        if not deck_ids:
+            return
+        operations = []
+        for user in mongo.db.users.find({"collections": ObjectId(collection_id)}, {"_id": 1}):
+            operations += DeckSubscriberModel._subscribe_operations(user["_id"], collection_id, deck_ids)
+        DeckSubscriberModel._write(operations)
+
+    @staticmethod
+    def remove_collection(collection_id):
+        """Tira a collection de todas as inscrições (e apaga as que ficaram sem nenhuma)."""
+        collection_id = ObjectId(collection_id)
+        mongo.db.deck_subscribers.update_many({"via": collection_id}, {"$pull": {"via": collection_id}})
+        mongo.db.deck_subscribers.delete_many({"via": []})
+
+    @staticmethod
+    def remove_decks(deck_ids):
+        deck_ids = [ObjectId(d) for d in deck_ids]
+        if deck_ids:
+            mongo.db.deck_subscribers.delete_many({"deck_id": {"$in": deck_ids}})
+
+    @staticmethod
+    def get_user_ids(deck_id):
+        """Ids (str) dos usuários que têm o deck, com uma consulta no índice (deck_id, user_id)."""
+        cursor = mongo.db.deck_subscribers.find({"deck_id": ObjectId(deck_id)}, {"_id": 0, "user_id": 1})
+        return [str(row["user_id"]) for row in cursor]
+
+    @staticmethod
+    def get_deck_ids(user_id, deck_ids=None):
+        """Decks (ObjectId) que o usuário tem, opcionalmente restritos a `deck_ids`."""
+        query = {"user_id": ObjectId(user_id)}
+        if deck_ids is not None:
+            query["deck_id"] = {"$in": [ObjectId(d) for d in deck_ids]}
+        if DeckSubscriberModel.is_ready():
+            return {row["deck_id"] for row in mongo.db.deck_subscribers.find(query, {"_id": 0, "deck_id": 1})}
+
+        user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"collections": 1})
+        if not user or not user.get("collections"):
+            return set()
+        owned = {
+            ObjectId(deck_id)
+            for collection in mongo.db.collections.find({"_id": {"$in": user["collections"]}}, {"decks": 1})
+            for deck_id in collection.get("decks", [])
+        }
+        return owned if deck_ids is None else owned & {ObjectId(d) for d in deck_ids}
+
+    @staticmethod
+    def rebuild_users(users):
+        """Recalcula as inscrições de um lote de usuários (`{"_id", "collections"}`)."""
+        user_ids = [user["_id"] for user in users]
+        collection_ids = {c for user in users for c in user.get("collections", [])}
+        decks_by_collection = {
+            collection["_id"]: collection.get("decks", [])
+            for collection in mongo.db.collections.find({"_id": {"$in": list(collection_ids)}}, {"decks": 1})
+        }
+
+        expected = {}
+        for user in users:
+            for collection_id in user.get("collections", []):
+                for deck_id in decks_by_collection.get(collection_id, []):
+                    expected.setdefault((ObjectId(deck_id), user["_id"]), []).append(collection_id)
+
+        operations = [
+            UpdateOne({"deck_id": deck_id, "user_id": user_id}, {"$set": {"via": via}}, upsert=True)
+            for (deck_id, user_id), via in expected.items()
+        ]
+        stale = [
+            row["_id"]
+            for row in mongo.db.deck_subscribers.find({"user_id": {"$in": user_ids}}, {"deck_id": 1, "user_id": 1})
+            if (row["deck_id"], row["user_id"]) not in expected
+        ]
+        if stale:
+            operations.append(DeleteMany({"_id": {"$in": stale}}))
+        DeckSubscriberModel._write(operations)
+        return len(expected)
+
+    @staticmethod
+    def rebuild(batch_size=500, resume=True):
+        """Recria o índice a partir de users.collections, em lotes retomáveis."""
+        job_id = DeckSubscriberModel.JOB_ID
+        if not resume:
+            mongo.db.job_checkpoints.update_one(
+                {"_id": job_id},
+                {"$set": {"status": JobCheckpointModel.STATUS_RUNNING, "last_key": None, "counters": {}}},
+            )
+
+        checkpoint = JobCheckpointModel.start(job_id)
+        if checkpoint["status"] == JobCheckpointModel.STATUS_DONE:
+            return checkpoint.get("counters", {})
+
+        query = {}
+        if checkpoint.get("last_key"):
+            query["_id"] = {"$gt": checkpoint["last_key"]}
+        batch = []
+        for user in mongo.db.users.find(query, {"collections": 1}).sort("_id", 1):
+            batch.append(user)
+            if len(batch) >= batch_size:
+                DeckSubscriberModel._rebuild_batch(job_id, batch)
+                batch = []
+        if batch:
+            DeckSubscriberModel._rebuild_batch(job_id, batch)
+
+        JobCheckpointModel.finish(job_id)
+        DeckSubscriberModel._ready.clear()
+        return JobCheckpointModel.get(job_id).get("counters", {})
+
+    @staticmethod
+    def _rebuild_batch(job_id, users):
+        subscriptions = DeckSubscriberModel.rebuild_users(users)
+        JobCheckpointModel.advance(job_id, users[-1]["_id"], {"users": len(users), "subscriptions": subscriptions})
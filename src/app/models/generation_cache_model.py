@@ -0,0 +1,65 @@
+"""Model for the AI generation cache (collection `generation_cache`)."""
+
+import hashlib
+import re
+from datetime import datetime, timedelta, timezone
+from src.app import mongo
+
+
+class GenerationCacheModel:
+    """Respostas do LLM endereçadas pelo hash do prompt normalizado.
+
+    Cada entrada guarda o texto gerado, `hits` e `expires_at` (índice TTL).
+    Os contadores globais de hit/miss ficam em `generation_cache_stats`, um
+    documento por tipo de geração.
+    """
+
+    _WHITESPACE = re.compile(r"\s+")
+
+    @staticmethod
+    def make_key(kind, prompt, model=""):
+        """sha256 de (tipo, modelo, prompt sem diferença de espaços/maiúsculas)."""
+        normalized = GenerationCacheModel._WHITESPACE.sub(" ", prompt).strip().casefold()
+        return hashlib.sha256(f"{kind}\x00{model}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get(key):
+        """Retorna o texto em cache (e conta o hit na entrada) ou None."""
+        entry = mongo.db.generation_cache.find_one_and_update(
+            {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"$inc": {"hits": 1}},
+            projection={"text": 1},
+        )
+        return entry["text"] if entry else None
+
+    @staticmethod
+    def put(key, kind, text, ttl):
+        now = datetime.now(timezone.utc)
+        mongo.db.generation_cache.update_one(
+            {"_id": key},
+            {
+                "$set": {"kind": kind, "text": text, "created_at": now, "expires_at": now + timedelta(seconds=ttl)},
+                "$setOnInsert": {"hits": 0},
+            },
+            upsert=True,
+        )
+
+    @staticmethod
+    def record(kind, hit):
+        field = "hits" if hit else "misses"
+        mongo.db.generation_cache_stats.update_one({"_id": kind}, {"$inc": {field: 1}}, upsert=True)
+
+    @staticmethod
+    def stats():
+        """{tipo: {"hits", "misses", "entries"}}."""
+        result = {}
+        for doc in mongo.db.generation_cache_stats.find():
+            result[doc["_id"]] = {"hits": doc.get("hits", 0), "misses": doc.get("misses", 0), "entries": 0}
+        for row in mongo.db.generation_cache.aggregate([{"$group": {"_id": "$kind", "entries": {"$sum": 1}}}]):
+            result.setdefault(row["_id"], {"hits": 0, "misses": 0})["entries"] = row["entries"]
+        return result
+
+    @staticmethod
+    def clear(kind=None):
+        query = {"kind": kind} if kind else {}
+        return mongo.db.generation_cache.delete_many(query).deleted_count
@@ -1,4 +1,5 @@
 from src.app import mongo
+from src.app.database.pagination import InvalidCursor, paginate
 from bson import ObjectId
 import string
 import random
@@ -104,10 +105,12 @@ class InviteModel:
         return True
 
     @staticmethod
-    def get_user_invites(user_id):
-        """Retorna todos os convites feitos por um usuário"""
+    def get_user_invites(user_id, limit=None, cursor=None):
+        """Retorna uma página dos convites feitos por um usuário e o cursor da próxima"""
         try:
-            invites = list(mongo.db.invites.find({'inviter_id': ObjectId(user_id)}))
+            invites, next_cursor = paginate(
+                mongo.db.invites, {'inviter_id': ObjectId(user_id)}, limit=limit, cursor=cursor
+            )
             
             result = []
             for invite in invites:
@@ -123,10 +126,12 @@ class InviteModel:
                 }
                 result.append(invite_data)
             
-            return result
+            return result, next_cursor
+        except InvalidCursor:
+            raise
         except Exception as e:
             print(f"Erro ao buscar convites: {str(e)}")
-            return []
+            return [], None
 
     @staticmethod
     def get_user_invited_friends(user_id):
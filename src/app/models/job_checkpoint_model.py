@@ -0,0 +1,60 @@
+"""Model for resumable job checkpoints."""
+
+from datetime import datetime, timezone
+from src.app import mongo
+
+
+class JobCheckpointModel:
+    """Guarda o progresso de jobs em lote para que possam ser retomados.
+
+    Cada execução (ex.: lembrete diário de uma data + shard) tem um documento
+    com a última chave processada (`last_key`), contadores e o status
+    (`running` ou `done`).
+    """
+
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+
+    @staticmethod
+    def get(job_id: str):
+        return mongo.db.job_checkpoints.find_one({"_id": job_id})
+
+    @staticmethod
+    def start(job_id: str, meta=None):
+        """Cria o checkpoint (se ainda não existir) e o retorna."""
+        now = datetime.now(timezone.utc)
+        mongo.db.job_checkpoints.update_one(
+            {"_id": job_id},
+            {
+                "$setOnInsert": {
+                    "status": JobCheckpointModel.STATUS_RUNNING,
+                    "last_key": None,
+                    "counters": {},
+                    "meta": meta or {},
+                    "started_at": now,
+                },
+                "$set": {"updated_at": now},
+            },
+            upsert=True,
+        )
+        return JobCheckpointModel.get(job_id)
+
+    @staticmethod
+    def advance(job_id: str, last_key, counters=None):
+        """Avança o checkpoint para `last_key` e soma os contadores do lote."""
+        update = {"$set": {"last_key": last_key, "updated_at": datetime.now(timezone.utc)}}
+        if counters:
+            update["$inc"] = {f"counters.{name}": value for name, value in counters.items()}
+        mongo.db.job_checkpoints.update_one({"_id": job_id}, update)
+
+    @staticmethod
+    def finish(job_id: str):
+        now = datetime.now(timezone.utc)
+        mongo.db.job_checkpoints.update_one(
+            {"_id": job_id},
+            {"$set": {"status": JobCheckpointModel.STATUS_DONE, "finished_at": now, "updated_at": now}},
+        )
+
+    @staticmethod
+    def reset(job_id: str):
+        mongo.db.job_checkpoints.delete_one({"_id": job_id})
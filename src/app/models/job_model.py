@@ -0,0 +1,116 @@
+"""Model for the background job queue (collection `jobs`)."""
+
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import ReturnDocument
+from src.app import mongo
+
+
+class JobModel:
+    """Fila de jobs persistida no MongoDB.
+
+    Ciclo de vida: `queued` -> `running` -> `done`. Em caso de erro o job volta
+    para `queued` com `run_at` no futuro (backoff) até esgotar `max_attempts`,
+    quando é movido para `jobs_dead_letter`.
+
+    `complete`, `retry` e `dead_letter` só valem para o worker que ainda tem o
+    lock (`locked_by`): se o lock expirou e outro worker reservou o job, o
+    resultado atrasado do primeiro é descartado (retornam False).
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+
+    @staticmethod
+    def enqueue(name, payload=None, max_attempts=5, run_at=None):
+        now = datetime.now(timezone.utc)
+        result = mongo.db.jobs.insert_one({
+            "name": name,
+            "payload": payload or {},
+            "status": JobModel.STATUS_QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": run_at or now,
+            "locked_by": None,
+            "locked_at": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        })
+        return str(result.inserted_id)
+
+    @staticmethod
+    def claim(worker_id, lock_timeout=300):
+        """Reserva atomicamente o próximo job disponível para `worker_id`.
+
+        Jobs `running` cujo lock passou de `lock_timeout` segundos (worker que
+        morreu no meio da execução) também podem ser reservados de novo.
+        """
+        now = datetime.now(timezone.utc)
+        return mongo.db.jobs.find_one_and_update(
+            {
+                "$or": [
+                    {"status": JobModel.STATUS_QUEUED, "run_at": {"$lte": now}},
+                    {
+                        "status": JobModel.STATUS_RUNNING,
+                        "locked_at": {"$lte": now - timedelta(seconds=lock_timeout)},
+                    },
+                ]
+            },
+            {
+                "$set": {
+                    "status": JobModel.STATUS_RUNNING,
+                    "locked_by": worker_id,
+                    "locked_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    @staticmethod
+    def complete(job_id, worker_id):
+        now = datetime.now(timezone.utc)
+        result = mongo.db.jobs.update_one(
+            {"_id": ObjectId(job_id), "locked_by": worker_id},
+            {"$set": {"status": JobModel.STATUS_DONE, "finished_at": now, "updated_at": now,
+                      "locked_by": None, "locked_at": None}},
+        )
+        return result.modified_count > 0
+
+    @staticmethod
+    def retry(job_id, worker_id, error, run_at):
+        result = mongo.db.jobs.update_one(
+            {"_id": ObjectId(job_id), "locked_by": worker_id},
+            {"$set": {"status": JobModel.STATUS_QUEUED, "run_at": run_at, "last_error": error,
+                      "locked_by": None, "locked_at": None, "updated_at": datetime.now(timezone.utc)}},
+        )
+        return result.modified_count > 0
+
+    @staticmethod
+    def dead_letter(job, error):
+        """Move o job para `jobs_dead_letter` depois de esgotar as tentativas."""
+        if mongo.db.jobs.find_one_and_delete({"_id": job["_id"], "locked_by": job["locked_by"]}) is None:
+            return False
+        now = datetime.now(timezone.utc)
+        dead = {**job, "status": "dead", "last_error": error, "failed_at": now, "updated_at": now}
+        mongo.db.jobs_dead_letter.replace_one({"_id": job["_id"]}, dead, upsert=True)
+        return True
+
+    @staticmethod
+    def requeue_dead(job_ids=None):
+        """Devolve jobs da dead-letter para a fila (todos, ou só `job_ids`)."""
+        query = {"_id": {"$in": [ObjectId(j) for j in job_ids]}} if job_ids else {}
+        now = datetime.now(timezone.utc)
+        requeued = 0
+        for job in mongo.db.jobs_dead_letter.find(query):
+            job.update({"status": JobModel.STATUS_QUEUED, "attempts": 0, "run_at": now,
+                        "locked_by": None, "locked_at": None, "updated_at": now})
+            job.pop("failed_at", None)
+            mongo.db.jobs.replace_one({"_id": job["_id"]}, job, upsert=True)
+            mongo.db.jobs_dead_letter.delete_one({"_id": job["_id"]})
+            requeued += 1
+        return requeued
@@ -31,6 +31,51 @@ class NotificationModel:
         doc["_id"] = str(result.inserted_id)
         return doc
 
+    @staticmethod
+    def create_many(notification_type, notifications):
+        """Cria várias notificações do mesmo tipo com um único insert_many.
+
+        Args:
+            notification_type: Tipo das notificações.
+            notifications: Lista de tuplas (user_id, data).
+
+        Returns:
+            int: Quantidade de notificações inseridas.
+        """
+        if not notifications:
+            return 0
+        now = datetime.now(timezone.utc)
+        docs = [
+            {
+                "user_id": str(user_id),
+                "type": notification_type,
+                "data": data or {},
+                "created_at": now,
+                "status": "sent",
+                "is_read": False,
+                "read_at": None,
+            }
+            for user_id, data in notifications
+        ]
+        result = mongo.db.notifications.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+
+    @staticmethod
+    def find_users_notified_since(user_ids, notification_type, since):
+        """Retorna quais de `user_ids` já receberam notificação do tipo desde `since`."""
+        if not user_ids:
+            return set()
+        return set(
+            mongo.db.notifications.distinct(
+                "user_id",
+                {
+                    "user_id": {"$in": [str(user_id) for user_id in user_ids]},
+                    "type": notification_type,
+                    "created_at": {"$gte": since},
+                },
+            )
+        )
+
     @staticmethod
     def find_last(user_id, notification_type):
         return mongo.db.notifications.find_one(
@@ -0,0 +1,341 @@
+"""Model for the per-user pending-card rollup (collection `pending_rollups`)."""
+
+import heapq
+from datetime import date, datetime, time, timedelta, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from src.app import mongo
+from src.app.config import Config
+from src.app.provider.cache import TTLCache
+from .job_checkpoint_model import JobCheckpointModel
+
+
+class PendingRollupModel:
+    """Quantas cartas de cada (usuário, deck) vencem em cada dia.
+
+    Um documento por (user_id, deck_id, day), com `day` em dias desde
+    1970-01-01 (UTC) e `count` = progressos com `next_review` naquele dia.
+    Os caminhos de escrita do progresso (seed, revisões, remoções) aplicam
+    `$inc` nos dias de origem/destino; `flask progress reconcile-rollups`
+    recalcula tudo a partir de `user_progress` e corrige o que divergiu.
+
+    As contagens só são usadas enquanto houver uma passada completa recente do
+    reconciliador (checkpoint `pending_rollup:<dia>` com status `done` nos
+    últimos READY_MAX_AGE_DAYS dias); sem ela as leituras voltam a ir direto em
+    `user_progress`.
+
+    Pendentes agora = soma dos dias anteriores a hoje (rollup) + progressos de
+    hoje com `next_review <= agora` (intervalo pequeno do índice), então o
+    número é o mesmo da consulta direta. O resultado fica num LRU por processo
+    com TTL curto, invalidado pelas escritas do próprio processo. Contagens
+    que não estão no rollup (cartas novas de decks lazy) entram pelo `extra`
+    e ficam no mesmo valor do LRU; cartas adicionadas a um deck lazy só
+    aparecem nelas quando o TTL vence.
+    """
+
+    JOB_PREFIX = "pending_rollup"
+    # O reconciliador roda diariamente; uma falha de um dia ainda é tolerada
+    READY_MAX_AGE_DAYS = 2
+    _EPOCH = date(1970, 1, 1)
+    _EPOCH_DATETIME = datetime(1970, 1, 1)  # sem fuso = UTC no BSON
+    _MS_PER_DAY = 24 * 60 * 60 * 1000
+    # Dia do `next_review` calculado no servidor
+    _DAY_EXPR = {"$floor": {"$divide": [{"$subtract": ["$next_review", _EPOCH_DATETIME]}, _MS_PER_DAY]}}
+
+    _cache = TTLCache(maxsize=Config.PENDING_COUNT_CACHE_SIZE, ttl=Config.PENDING_COUNT_CACHE_TTL)
+    _READY_KEY = ("ready",)
+
+    @staticmethod
+    def _job_id(day):
+        return f"{PendingRollupModel.JOB_PREFIX}:{day.isoformat()}"
+
+    @staticmethod
+    def day_of(moment):
+        """Dia (UTC, desde 1970-01-01) de um datetime; datetimes sem fuso são UTC (como vêm do Mongo)."""
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+        return (moment.date() - PendingRollupModel._EPOCH).days
+
+    @staticmethod
+    def is_ready():
+        """True se uma reconciliação completa terminou nos últimos READY_MAX_AGE_DAYS dias."""
+        ready = PendingRollupModel._cache.get(PendingRollupModel._READY_KEY)
+        if ready is None:
+            today = datetime.now(timezone.utc).date()
+            job_ids = [
+                PendingRollupModel._job_id(today - timedelta(days=age))
+                for age in range(PendingRollupModel.READY_MAX_AGE_DAYS)
+            ]
+            ready = mongo.db.job_checkpoints.find_one(
+                {"_id": {"$in": job_ids}, "status": JobCheckpointModel.STATUS_DONE}, {"_id": 1}
+            ) is not None
+            PendingRollupModel._cache.set(PendingRollupModel._READY_KEY, ready)
+        return ready
+
+    # ----- escrita -----
+
+    @staticmethod
+    def apply(deltas):
+        """Aplica `{(user_id, deck_id, day): delta}` com upserts `$inc` em um único bulk_write."""
+        operations = [
+            UpdateOne(
+                {"user_id": ObjectId(user_id), "deck_id": ObjectId(deck_id), "day": day},
+                {"$inc": {"count": delta}},
+                upsert=True,
+            )
+            for (user_id, deck_id, day), delta in deltas.items()
+            if delta
+        ]
+        if operations:
+            try:
+                mongo.db.pending_rollups.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # Upserts concorrentes no mesmo dia: o documento já existe, então repete o $inc
+                errors = e.details.get("writeErrors", [])
+                if any(err.get("code") != 11000 for err in errors):
+                    raise
+                mongo.db.pending_rollups.bulk_write([operations[err["index"]] for err in errors], ordered=False)
+        PendingRollupModel.invalidate({(user_id, deck_id) for user_id, deck_id, _ in deltas})
+
+    @staticmethod
+    def move(deltas, user_id, deck_id, old_review, new_review):
+        """Acumula em `deltas` a mudança de `next_review` de um progresso (None = não existia)."""
+        if old_review is not None:
+            key = (ObjectId(user_id), ObjectId(deck_id), PendingRollupModel.day_of(old_review))
+            deltas[key] = deltas.get(key, 0) - 1
+        if new_review is not None:
+            key = (ObjectId(user_id), ObjectId(deck_id), PendingRollupModel.day_of(new_review))
+            deltas[key] = deltas.get(key, 0) + 1
+        return deltas
+
+    @staticmethod
+    def remove_progress(query):
+        """Desconta do rollup os progressos de `query` (chamar antes de removê-los)."""
+        pipeline = [
+            {"$match": {**query, "next_review": {"$ne": None}}},
+            {
+                "$group": {
+                    "_id": {"user_id": "$user_id", "deck_id": "$deck_id", "day": PendingRollupModel._DAY_EXPR},
+                    "count": {"$sum": 1},
+                }
+            },
+        ]
+        deltas = {
+            (row["_id"]["user_id"], row["_id"]["deck_id"], int(row["_id"]["day"])): -row["count"]
+            for row in mongo.db.user_progress.aggregate(pipeline)
+        }
+        PendingRollupModel.apply(deltas)
+
+    @staticmethod
+    def invalidate(user_decks):
+        """Descarta do LRU as contagens de cada (user_id, deck_id) e os totais dos usuários."""
+        for user_id, deck_id in user_decks:
+            PendingRollupModel._cache.delete((str(user_id), str(deck_id)))
+            PendingRollupModel._cache.delete((str(user_id), None))
+
+    # ----- leitura -----
+
+    @staticmethod
+    def count_due_by_decks(user_id, deck_ids, now=None, extra=None):
+        """{deck_id (ObjectId): pendentes agora}; decks sem pendências não aparecem.
+
+        `extra(deck_ids)` -> {deck_id: n} é somado às contagens calculadas
+        (só para os decks que não estavam no LRU).
+        """
+        now = now or datetime.now(timezone.utc)
+        user_key = str(user_id)
+        counts, missing = {}, []
+        for deck_id in dict.fromkeys(ObjectId(d) for d in deck_ids):
+            cached = PendingRollupModel._cache.get((user_key, str(deck_id)))
+            if cached is None:
+                missing.append(deck_id)
+            else:
+                counts[deck_id] = cached
+
+        if missing:
+            fresh = PendingRollupModel._count_due(
+                {"user_id": ObjectId(user_id), "deck_id": {"$in": missing}}, "$deck_id", now
+            )
+            for deck_id, count in (extra(missing) if extra else {}).items():
+                fresh[deck_id] = fresh.get(deck_id, 0) + count
+            for deck_id in missing:
+                counts[deck_id] = fresh.get(deck_id, 0)
+                PendingRollupModel._cache.set((user_key, str(deck_id)), counts[deck_id])
+
+        return {deck_id: count for deck_id, count in counts.items() if count}
+
+    @staticmethod
+    def count_due(user_id, now=None, extra=None):
+        """Total de pendentes agora do usuário, em todos os decks (mais `extra()` de todos os decks)."""
+        key = (str(user_id), None)
+        count = PendingRollupModel._cache.get(key)
+        if count is None:
+            count = PendingRollupModel._count_due(
+                {"user_id": ObjectId(user_id)}, None, now or datetime.now(timezone.utc)
+            ).get(None, 0)
+            if extra:
+                count += sum(extra().values())
+            PendingRollupModel._cache.set(key, count)
+        return count
+
+    @staticmethod
+    def _count_due(match, group_key, now):
+        now = now.astimezone(timezone.utc)
+        today_start = datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+        past = mongo.db.pending_rollups.aggregate([
+            {"$match": {**match, "day": {"$lt": PendingRollupModel.day_of(now)}}},
+            {"$group": {"_id": group_key, "count": {"$sum": "$count"}}},
+        ])
+        today = mongo.db.user_progress.aggregate([
+            {"$match": {**match, "next_review": {"$gte": today_start, "$lte": now}}},
+            {"$group": {"_id": group_key, "count": {"$sum": 1}}},
+        ])
+        totals = {}
+        for rows in (past, today):
+            for row in rows:
+                totals[row["_id"]] = totals.get(row["_id"], 0) + row["count"]
+        return {key: max(count, 0) for key, count in totals.items()}
+
+    @staticmethod
+    def iter_due_by_user(after_user_id=None, now=None, batch_size=1000, user_range=None):
+        """Como `UserProgressModel.iter_pending_counts_by_user`, com a mesma divisão de `_count_due`.
+
+        Dias anteriores a hoje vêm do rollup e os progressos de hoje com
+        `next_review <= now` de `user_progress` (índice next_review_user); as
+        duas agregações saem ordenadas por user_id e são somadas em sequência.
+        """
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        today_start = datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+        after = user_id_filter(after_user_id, user_range)
+        options = {"allowDiskUse": True, "batchSize": batch_size}
+        past = mongo.db.pending_rollups.aggregate(
+            [
+                {"$match": {**after, "day": {"$lt": PendingRollupModel.day_of(now)}}},
+                {"$group": {"_id": "$user_id", "pending": {"$sum": "$count"}}},
+                {"$sort": {"_id": 1}},
+            ],
+            **options,
+        )
+        today = mongo.db.user_progress.aggregate(
+            [
+                {"$match": {**after, "next_review": {"$gte": today_start, "$lte": now}}},
+                {"$group": {"_id": "$user_id", "pending": {"$sum": 1}}},
+                {"$sort": {"_id": 1}},
+            ],
+            **options,
+        )
+        return (row for row in merge_counts(past, today) if row["pending"] > 0)
+
+    # ----- reconciliação -----
+
+    @staticmethod
+    def _rollup_counts(user_ids):
+        return {
+            (doc["user_id"], doc["deck_id"], doc["day"]): doc.get("count", 0)
+            for doc in mongo.db.pending_rollups.find({"user_id": {"$in": user_ids}})
+        }
+
+    @staticmethod
+    def rebuild_users(user_ids):
+        """Corrige o rollup dos usuários a partir de `user_progress`. Retorna quantos dias mudaram.
+
+        A correção é aplicada com `$inc` (esperado - atual), nunca com `$set`,
+        para não apagar os `$inc` das escritas concorrentes. O rollup é lido
+        antes e depois de `user_progress`: dias que mudaram entre as duas
+        leituras estão sendo escritos agora e ficam para a próxima passada.
+        """
+        user_ids = [ObjectId(u) for u in user_ids]
+        if not user_ids:
+            return 0
+
+        before = PendingRollupModel._rollup_counts(user_ids)
+        pipeline = [
+            {"$match": {"user_id": {"$in": user_ids}, "next_review": {"$ne": None}}},
+            {
+                "$group": {
+                    "_id": {"user_id": "$user_id", "deck_id": "$deck_id", "day": PendingRollupModel._DAY_EXPR},
+                    "count": {"$sum": 1},
+                }
+            },
+        ]
+        expected = {
+            (row["_id"]["user_id"], row["_id"]["deck_id"], int(row["_id"]["day"])): row["count"]
+            for row in mongo.db.user_progress.aggregate(pipeline, allowDiskUse=True)
+        }
+        current = PendingRollupModel._rollup_counts(user_ids)
+
+        deltas = {
+            key: expected.get(key, 0) - current.get(key, 0)
+            for key in set(expected) | set(current)
+            if before.get(key, 0) == current.get(key, 0)
+        }
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        PendingRollupModel.apply(deltas)
+        # Dias que chegaram a zero (pelos `$inc` ou pela correção) só são limpos
+        mongo.db.pending_rollups.delete_many({"user_id": {"$in": user_ids}, "count": 0})
+        return len(deltas)
+
+    @staticmethod
+    def reconcile(batch_size=500, resume=True):
+        """Passada completa do reconciliador, em lotes de usuários e retomável pelo checkpoint do dia."""
+        job_id = PendingRollupModel._job_id(datetime.now(timezone.utc).date())
+        if not resume:
+            JobCheckpointModel.reset(job_id)
+
+        checkpoint = JobCheckpointModel.start(job_id)
+        if checkpoint["status"] != JobCheckpointModel.STATUS_DONE:
+            query = {}
+            if checkpoint.get("last_key"):
+                query["_id"] = {"$gt": checkpoint["last_key"]}
+            batch = []
+            for user in mongo.db.users.find(query, {"_id": 1}).sort("_id", 1):
+                batch.append(user["_id"])
+                if len(batch) >= batch_size:
+                    PendingRollupModel._reconcile_batch(job_id, batch)
+                    batch = []
+            if batch:
+                PendingRollupModel._reconcile_batch(job_id, batch)
+            JobCheckpointModel.finish(job_id)
+            checkpoint = JobCheckpointModel.get(job_id)
+
+        PendingRollupModel._cache.delete(PendingRollupModel._READY_KEY)
+        counters = checkpoint.get("counters", {})
+        return {
+            "job_id": job_id,
+            "status": checkpoint["status"],
+            "users": counters.get("users", 0),
+            "repaired": counters.get("repaired", 0),
+        }
+
+    @staticmethod
+    def _reconcile_batch(job_id, user_ids):
+        repaired = PendingRollupModel.rebuild_users(user_ids)
+        JobCheckpointModel.advance(job_id, user_ids[-1], {"users": len(user_ids), "repaired": repaired})
+
+
+def user_id_filter(after_user_id=None, user_range=None):
+    """Filtro de `user_id` das agregações por usuário: depois de `after_user_id` e dentro de `[lo, hi)`."""
+    lo, hi = user_range or (None, None)
+    condition = {}
+    if after_user_id:
+        condition["$gt"] = ObjectId(after_user_id)
+    if lo is not None:
+        condition["$gte"] = ObjectId(lo)
+    if hi is not None:
+        condition["$lt"] = ObjectId(hi)
+    return {"user_id": condition} if condition else {}
+
+
+def merge_counts(*sources):
+    """Soma `{"_id": user_id, "pending": n}` de iteradores já ordenados por `_id`, mantendo a ordem."""
+    merged = None
+    for row in heapq.merge(*sources, key=lambda row: row["_id"]):
+        if merged is not None and merged["_id"] == row["_id"]:
+            merged["pending"] += row["pending"]
+            continue
+        if merged is not None:
+            yield merged
+        merged = {"_id": row["_id"], "pending": row["pending"]}
+    if merged is not None:
+        yield merged
@@ -35,6 +35,14 @@ class PushNotificationModel:
                 {"$set": {"updated_at": datetime.utcnow()}}
             )
 
+    @staticmethod
+    def remove_tokens(push_tokens):
+        """Remove tokens inválidos (ex.: DeviceNotRegistered) de todos os usuários."""
+        if not push_tokens:
+            return 0
+        result = mongo.db.push_notification.delete_many({"push_token": {"$in": list(push_tokens)}})
+        return result.deleted_count
+
     @staticmethod
     def remove_tokens_by_user(user_id):
         """Remove todos os tokens de push associados a um usuário (logout global)."""
@@ -0,0 +1,40 @@
+"""Model for Expo push tickets waiting for their receipts."""
+
+from datetime import datetime, timedelta, timezone
+from src.app import mongo
+
+
+class PushTicketModel:
+    """Tickets devolvidos pelo Expo, guardados até o receipt ser consultado.
+
+    O Expo mantém os receipts por 24h; o índice TTL em `created_at` remove os
+    tickets que não forem processados nesse prazo.
+    """
+
+    TTL_SECONDS = 24 * 60 * 60
+
+    @staticmethod
+    def save_many(tickets):
+        """Salva tickets no formato {ticket_id, push_token, user_id}."""
+        if not tickets:
+            return 0
+        now = datetime.now(timezone.utc)
+        docs = [{**ticket, "created_at": now} for ticket in tickets]
+        mongo.db.push_tickets.insert_many(docs, ordered=False)
+        return len(docs)
+
+    @staticmethod
+    def find_ready(min_age_seconds=15 * 60, limit=1000):
+        """Tickets com pelo menos `min_age_seconds` (o Expo recomenda esperar ~15 min)."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_age_seconds)
+        return list(
+            mongo.db.push_tickets.find({"created_at": {"$lte": cutoff}})
+            .sort("created_at", 1)
+            .limit(limit)
+        )
+
+    @staticmethod
+    def delete_many(ids):
+        if not ids:
+            return 0
+        return mongo.db.push_tickets.delete_many({"_id": {"$in": list(ids)}}).deleted_count
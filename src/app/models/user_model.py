@@ -1,4 +1,6 @@
 from src.app import mongo
+from src.app.config import Config
+from src.app.provider.cache import TTLCache
 from src.app.provider.stripe import Stripe
 import random
 from bson import ObjectId
@@ -6,8 +8,13 @@ import string
 from datetime import datetime
 
 from src.app.models.push_notification_model import PushNotificationModel
+from src.app.models.deck_subscriber_model import DeckSubscriberModel
 
 class UserModel:
+    # Usuários autenticados por id, só com os campos usados pelos controllers
+    _auth_cache = TTLCache(maxsize=Config.AUTH_USER_CACHE_SIZE, ttl=Config.AUTH_USER_CACHE_TTL)
+    _AUTH_PROJECTION = {'name': 1, 'email': 1, 'role': 1, 'customer_id': 1}
+
     def __init__(self, _id=None, name = None, email=None, password=None, collections=None, customer_id=None, role='user', **kwargs):
         self._id = str(_id) if _id else None
         self.name = name
@@ -19,16 +26,17 @@ class UserModel:
 
 
     def save_to_db(self):
-        """Salva o usuário no banco de dados MongoDB"""
-        
-        customer = Stripe.create_customer(self.email)
+        """Salva o usuário no banco de dados MongoDB.
+
+        O cliente do Stripe não é criado aqui (ver `ensure_stripe_customer`).
+        """
         user_data = {
             'name': self.name,
             'email': self.email,
             'password': self.password,
             'is_confirmed': False,
             "collections": self.collections,
-            "customer_id": customer.get('id'),
+            "customer_id": self.customer_id,
             "role": self.role
         }
         
@@ -36,6 +44,24 @@ class UserModel:
         mongo.db.users.insert_one(user_data)
         return True
     
+    @staticmethod
+    def ensure_stripe_customer(user_id):
+        """Cria o cliente do Stripe do usuário, se ainda não existir, e retorna o customer_id."""
+        user = mongo.db.users.find_one({'_id': ObjectId(user_id)}, {'email': 1, 'customer_id': 1})
+        if not user:
+            return None
+        if user.get('customer_id'):
+            return user['customer_id']
+
+        # A chave de idempotência evita dois clientes se o job e o pagamento rodarem juntos
+        customer = Stripe.create_customer(user['email'], idempotency_key=f"customer-{user_id}")
+        mongo.db.users.update_one(
+            {'_id': ObjectId(user_id), 'customer_id': None},
+            {'$set': {'customer_id': customer.get('id')}},
+        )
+        UserModel.invalidate_cached_user(user_id)
+        return mongo.db.users.find_one({'_id': ObjectId(user_id)}, {'customer_id': 1}).get('customer_id')
+
     @staticmethod
     def add_collections_to_user(user_id, collection_ids):
         """Adiciona uma lista de collection IDs ao user especificado"""
@@ -47,6 +73,8 @@ class UserModel:
             {"_id": ObjectId(user_id)},
             {"$addToSet": {"collections": {"$each": collection_object_ids}}}
         )
+        UserModel.invalidate_cached_user(user_id)
+        DeckSubscriberModel.add_collections(user_id, collection_object_ids)
         
         return result.modified_count > 0
 
@@ -58,6 +86,33 @@ class UserModel:
             return UserModel(**user_data)
         return None
 
+    @staticmethod
+    def find_for_auth(user_id=None, email=None):
+        """Busca o usuário do token: por id (claim `_id`) com cache em memória, ou por email.
+
+        Carrega apenas nome, email, role e customer_id.
+        """
+        if user_id and ObjectId.is_valid(user_id):
+            cached = UserModel._auth_cache.get(str(user_id))
+            if cached:
+                return cached
+            user_data = mongo.db.users.find_one({'_id': ObjectId(user_id)}, UserModel._AUTH_PROJECTION)
+        elif email:
+            user_data = mongo.db.users.find_one({'email': email}, UserModel._AUTH_PROJECTION)
+        else:
+            return None
+
+        if not user_data:
+            return None
+        user = UserModel(**user_data)
+        UserModel._auth_cache.set(user._id, user)
+        return user
+
+    @staticmethod
+    def invalidate_cached_user(user_id):
+        """Remove o usuário do cache de autenticação (chamar após alterar o documento)."""
+        UserModel._auth_cache.delete(str(user_id))
+
     @staticmethod
     def find_by_id(user_id):
         """Busca um usuário pelo ID"""
@@ -66,6 +121,22 @@ class UserModel:
             return UserModel(**user_data)
         return None
     
+    @staticmethod
+    def filter_confirmed(user_ids):
+        """Retorna o conjunto (ObjectId) dos usuários confirmados dentre `user_ids`."""
+        cursor = mongo.db.users.find(
+            {'_id': {'$in': [ObjectId(user_id) for user_id in user_ids]}, 'is_confirmed': True},
+            {'_id': 1},
+        )
+        return {user['_id'] for user in cursor}
+
+    @staticmethod
+    def iter_confirmed_ids(batch_size=1000):
+        """Itera os ids (str) de todos os usuários confirmados direto do cursor."""
+        cursor = mongo.db.users.find({'is_confirmed': True}, {'_id': 1}).batch_size(batch_size)
+        for user in cursor:
+            yield str(user['_id'])
+
     @staticmethod
     def verify_is_confirmed(email):
         """Verificar se um usuário está confirmado!"""
@@ -146,9 +217,20 @@ class UserModel:
                 {"_id": ObjectId(user_id)},
                 {"$set": {'password': new_password}}
             )
+            UserModel.invalidate_cached_user(user_id)
             return True
         
         return False
+
+    @staticmethod
+    def update_role(user_id, role):
+        """Altera o papel do usuário (user, teacher, admin)."""
+        result = mongo.db.users.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {'role': role}}
+        )
+        UserModel.invalidate_cached_user(user_id)
+        return result.modified_count > 0
     
     @staticmethod
     def verify_user_is_guest(user_id):
@@ -227,7 +309,7 @@ class UserModel:
             '_id': self._id,
             'name': self.name,
             'email': self.email,
-            'collections': [str(ObjectId(collection_id)) for collection_id in self.collections],
+            'collections': self.collections,
             'customer_id':self.customer_id,
             'role': self.role
         }
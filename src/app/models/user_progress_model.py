@@ -1,38 +1,63 @@
 from datetime import datetime, timedelta, timezone
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from src.app import mongo
+from src.app.database.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, decode_cursor, encode_cursor, paginate,
+)
+from src.app.provider.scheduler import get_scheduler
+from .deck_subscriber_model import DeckSubscriberModel
+from .pending_rollup_model import PendingRollupModel, merge_counts, user_id_filter
 
 class UserProgressModel:
-    def __init__(self, _id=None, user_id=None, deck_id=None, card_id=None, attempts=0, last_reviewed=None, next_review=None):
+    def __init__(self, _id=None, user_id=None, deck_id=None, card_id=None, attempts=0, last_reviewed=None, next_review=None,
+                 ease=None, interval_days=None, repetitions=None, card=None):
         self._id = str(_id) if _id else None
         self.user_id = ObjectId(user_id)
         self.deck_id = ObjectId(deck_id)
         self.card_id = ObjectId(card_id)
         self.attempts = attempts
+        # Estado do scheduler (só os algoritmos que usam, como o SM-2, preenchem)
+        self.ease = ease
+        self.interval_days = interval_days
+        self.repetitions = repetitions
+        # Cópia de front/back/audio da carta usada pela fila de estudo
+        self.card = card
         self.last_reviewed = last_reviewed or datetime.now(timezone.utc)
         self.next_review = next_review or self.calculate_next_review()
 
+    def scheduling_state(self):
+        return {
+            "attempts": self.attempts,
+            "ease": self.ease,
+            "interval_days": self.interval_days,
+            "repetitions": self.repetitions,
+        }
+
     def calculate_next_review(self, recall_level=None):
         """Define a próxima revisão com base no recall_level e no número de tentativas."""
-        
-        if recall_level:
-        
-            spacing = {
-                "I don't remember": "",  
-                "Difficult": timedelta(days=1), 
-                "Good": lambda attempts: timedelta(days=1 * (2 ** (attempts - 1))),
-                "Easy": lambda attempts: timedelta(days=2 * (2 ** (attempts - 1))) 
-            }
-            if recall_level in ["I don't remember"]:
-                return datetime.now(timezone.utc)
-            
-            if recall_level in ["Difficult"]:
-                return datetime.now(timezone.utc) + spacing[recall_level]
-            
-            return datetime.now(timezone.utc) + spacing[recall_level](self.attempts)
-        
-        else :
-            return datetime.now(timezone.utc)
+        now = datetime.now(timezone.utc)
+        if not recall_level:
+            return now
+        days, _ = get_scheduler().review(self.scheduling_state(), UserProgressModel._LEVEL_CODES[recall_level])
+        return now + timedelta(days=days)
+
+    def apply_review(self, recall_level, now=None):
+        """Aplica uma revisão com o scheduler configurado e retorna os campos para o `$set`."""
+        now = now or datetime.now(timezone.utc)
+        days, state = get_scheduler().review(self.scheduling_state(), UserProgressModel._LEVEL_CODES[recall_level])
+        for field, value in state.items():
+            setattr(self, field, value)
+        self.last_reviewed = now
+        self.next_review = now + timedelta(days=days)
+        self.attempts += 1
+        return {
+            "attempts": self.attempts,
+            "last_reviewed": self.last_reviewed,
+            "next_review": self.next_review,
+            **state,
+        }
 
 
     def save_to_db(self):
@@ -46,8 +71,12 @@ class UserProgressModel:
             "next_review": datetime.now(timezone.utc)
         }
         mongo.db.user_progress.insert_one(progress_data)
+        PendingRollupModel.apply(
+            PendingRollupModel.move({}, self.user_id, self.deck_id, None, progress_data["next_review"])
+        )
 
     _RECALL_LEVEL_MAP = {0: "I don't remember", 1: "Difficult", 2: "Good", 3: "Easy"}
+    _LEVEL_CODES = {level: code for code, level in _RECALL_LEVEL_MAP.items()}
 
     @staticmethod
     def update_status(user_id, card_id, recall_level):
@@ -63,25 +92,127 @@ class UserProgressModel:
         }
 
         card_progress = mongo.db.user_progress.find_one(query)
+        if not card_progress:
+            # Carta nova de deck lazy: o progresso nasce nesta revisão
+            card_progress = UserProgressModel._lazy_rows(user_id, [ObjectId(card_id)]).get(ObjectId(card_id))
         if not card_progress:
             return None
 
         progress = UserProgressModel(**card_progress)
 
-        attempts = progress.attempts + 1
-        last_reviewed = progress.last_reviewed = datetime.now(timezone.utc)
-        next_review = progress.calculate_next_review(recall_level)
         mongo.db.user_progress.update_one(
             {"user_id": progress.user_id, "deck_id": progress.deck_id, "card_id": progress.card_id},
-            {"$set": {
-                "attempts": attempts,
-                "last_reviewed": last_reviewed,
-                "next_review": next_review
-            }}
+            {"$set": progress.apply_review(recall_level)},
+            upsert=True,
         )
-        
+        PendingRollupModel.apply(
+            PendingRollupModel.move(
+                {}, progress.user_id, progress.deck_id, card_progress.get("next_review"), progress.next_review
+            )
+        )
+
         return "ok"
 
+    @staticmethod
+    def update_status_batch(user_id, reviews):
+        """Aplica várias revisões do usuário com uma leitura e um único bulk_write.
+
+        As revisões são aplicadas em ordem; revisões repetidas da mesma carta
+        se acumulam (tentativas e próxima revisão) como em chamadas sucessivas
+        de `update_status`.
+
+        Args:
+            user_id: Id do usuário.
+            reviews: Lista de {"card_id": str, "recall_level": int | str}.
+
+        Returns:
+            list: Um resultado por revisão, na mesma ordem:
+            {"card_id", "status": "ok" | "not_found" | "invalid", "next_review"}.
+        """
+        parsed = []
+        for review in reviews:
+            card_id = review.get("card_id")
+            recall_level = review.get("recall_level")
+            if isinstance(recall_level, int):
+                recall_level = UserProgressModel._RECALL_LEVEL_MAP.get(recall_level, "Good")
+            valid_level = recall_level in UserProgressModel._RECALL_LEVEL_MAP.values()
+            if not card_id or not valid_level or not ObjectId.is_valid(card_id):
+                parsed.append((card_id, None))
+                continue
+            parsed.append((ObjectId(card_id), recall_level))
+
+        card_ids = list({card_id for card_id, level in parsed if level is not None})
+        progress_by_card = {}
+        if card_ids:
+            cursor = mongo.db.user_progress.find(
+                {"user_id": ObjectId(user_id), "card_id": {"$in": card_ids}}
+            )
+            for row in cursor:
+                # Mesmo critério do find_one em update_status: o primeiro registro da carta
+                progress_by_card.setdefault(row["card_id"], row)
+            missing = [card_id for card_id in card_ids if card_id not in progress_by_card]
+            if missing:
+                progress_by_card.update(UserProgressModel._lazy_rows(user_id, missing))
+
+        # Rodada k = k-ésima revisão de cada carta no lote; cada rodada é agendada
+        # de uma vez (vetorizado) sobre o estado deixado pela rodada anterior.
+        results = [None] * len(parsed)
+        rounds = []
+        occurrences = {}
+        for index, (card_id, recall_level) in enumerate(parsed):
+            if recall_level is None:
+                results[index] = {"card_id": str(card_id) if card_id else None, "status": "invalid", "next_review": None}
+                continue
+            if card_id not in progress_by_card:
+                results[index] = {"card_id": str(card_id), "status": "not_found", "next_review": None}
+                continue
+            k = occurrences.get(card_id, 0)
+            occurrences[card_id] = k + 1
+            if k == len(rounds):
+                rounds.append([])
+            rounds[k].append((index, card_id, UserProgressModel._LEVEL_CODES[recall_level]))
+
+        scheduler = get_scheduler()
+        now = datetime.now(timezone.utc)
+        state = {
+            card_id: {field: row.get(field) for field in ("attempts", *scheduler.state_fields)}
+            for card_id, row in progress_by_card.items() if card_id in occurrences
+        }
+        next_reviews = {}
+        for reviews_in_round in rounds:
+            columns = {
+                field: [state[card_id][field] for _, card_id, _ in reviews_in_round]
+                for field in ("attempts", *scheduler.state_fields)
+            }
+            days, new_state = scheduler.review_batch(columns, [level for _, _, level in reviews_in_round])
+            for i, (index, card_id, _) in enumerate(reviews_in_round):
+                card_state = state[card_id]
+                for field, values in new_state.items():
+                    card_state[field] = values[i].item() if hasattr(values[i], "item") else values[i]
+                card_state["attempts"] = (card_state["attempts"] or 0) + 1
+                next_reviews[card_id] = now + timedelta(days=float(days[i]))
+                results[index] = {"card_id": str(card_id), "status": "ok", "next_review": next_reviews[card_id]}
+
+        if next_reviews:
+            deltas = {}
+            for card_id, next_review in next_reviews.items():
+                row = progress_by_card[card_id]
+                PendingRollupModel.move(deltas, user_id, row["deck_id"], row.get("next_review"), next_review)
+            mongo.db.user_progress.bulk_write(
+                [
+                    UpdateOne(
+                        UserProgressModel._row_filter(progress_by_card[card_id]),
+                        {"$set": {**state[card_id], "last_reviewed": now, "next_review": next_review}},
+                        upsert="_id" not in progress_by_card[card_id],
+                    )
+                    for card_id, next_review in next_reviews.items()
+                ],
+                ordered=False,
+            )
+            PendingRollupModel.apply(deltas)
+
+        return results
+
     @staticmethod
     def get_pending_cards(user_id, deck_id=None):
         """Recupera cartas pendentes de revisão no dia atual, incluindo front e back."""
@@ -108,7 +239,7 @@ class UserProgressModel:
 
         pending_cards = mongo.db.user_progress.aggregate(pipeline)
         
-        return [
+        result = [
             {
                 "card_id": str(card["card_id"]),
                 "last_reviewed": card["last_reviewed"],
@@ -119,22 +250,317 @@ class UserProgressModel:
             }
             for card in pending_cards
         ]
+        lazy_ids = UserProgressModel._lazy_deck_ids(user_id, [deck_id] if deck_id else None)
+        new_cards = UserProgressModel._new_lazy_cards(user_id, lazy_ids)
+        for card in UserProgressModel._lazy_card_entries(new_cards, query["next_review"]["$lte"]):
+            card.pop("deck_id")
+            result.append(card)
+        return result
+
+    CARD_SNAPSHOT_FIELDS = ("front", "back", "audio")
 
     @staticmethod
-    def create_or_update(user_id, deck_id, card_id):
-        """Cria ou atualiza o progresso de um usuário em uma carta específica."""
-        existing_record = mongo.db.user_progress.find_one({
+    def get_study_queue(user_id, deck_id=None, limit=None, cursor=None, store_snapshots=True):
+        """Página da fila de estudo: cartas vencidas, das mais atrasadas para as mais recentes.
+
+        Lê um intervalo dos índices (user_id, next_review) / (user_id, deck_id,
+        next_review). O conteúdo da carta vem do snapshot `card` gravado no
+        próprio progresso; linhas sem snapshot são completadas com uma única
+        busca em `cards` e, com `store_snapshots`, o snapshot é gravado para as
+        próximas leituras. Progressos de cartas removidas são omitidos.
+
+        Depois dos progressos vêm as cartas novas dos decks lazy (sem progresso
+        ainda), em ordem de deck e de posição no deck; o cursor dessa parte da
+        fila é o deck com `"v": "new:<posição>"`.
+
+        Returns:
+            tuple: (cartas, next_cursor)
+        """
+        now = datetime.now(timezone.utc)
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        after = UserProgressModel._new_cards_after(cursor) if cursor else None
+        if after is not None:
+            return UserProgressModel._new_cards_page(user_id, deck_id, [], limit, after, now)
+
+        query = {
             "user_id": ObjectId(user_id),
-            "deck_id": ObjectId(deck_id),
-            "card_id": ObjectId(card_id)
-        })
+            "next_review": {"$lte": now},
+        }
+        if deck_id:
+            query["deck_id"] = ObjectId(deck_id)
+
+        rows, next_cursor = paginate(
+            mongo.db.user_progress,
+            query,
+            {"deck_id": 1, "card_id": 1, "last_reviewed": 1, "next_review": 1, "card": 1},
+            sort_field="next_review",
+            limit=limit,
+            cursor=cursor,
+        )
+
+        missing = [row for row in rows if not row.get("card")]
+        if missing:
+            fields = UserProgressModel.CARD_SNAPSHOT_FIELDS
+            cards = {
+                card["_id"]: {field: card.get(field) for field in fields}
+                for card in mongo.db.cards.find(
+                    {"_id": {"$in": list({row["card_id"] for row in missing})}}, {field: 1 for field in fields}
+                )
+            }
+            for row in missing:
+                row["card"] = cards.get(row["card_id"])
+            if store_snapshots:
+                operations = [
+                    UpdateOne({"_id": row["_id"]}, {"$set": {"card": row["card"]}})
+                    for row in missing if row["card"]
+                ]
+                if operations:
+                    mongo.db.user_progress.bulk_write(operations, ordered=False)
+
+        queue = [
+            {
+                "card_id": str(row["card_id"]),
+                "deck_id": str(row["deck_id"]),
+                "last_reviewed": row["last_reviewed"],
+                "next_review": row["next_review"],
+                "front": row["card"].get("front"),
+                "back": row["card"].get("back"),
+                "audio": row["card"].get("audio", None),
+            }
+            for row in rows if row.get("card")
+        ]
+        if next_cursor is None:
+            return UserProgressModel._new_cards_page(
+                user_id, deck_id, queue, limit - len(rows), UserProgressModel._NEW_CARDS_START, now
+            )
+        return queue, next_cursor
+
+    _NEW_CARDS_CURSOR = "new:"
+    # Cursor do início das cartas novas (antes do primeiro deck)
+    _NEW_CARDS_START = (ObjectId("0" * 24), -1)
+
+    @staticmethod
+    def _new_cards_after(cursor):
+        """(deck_id, posição) de um cursor da parte de cartas novas da fila; None para os outros cursores."""
+        payload = decode_cursor(cursor)
+        value = payload.get("v")
+        if not isinstance(value, str) or not value.startswith(UserProgressModel._NEW_CARDS_CURSOR):
+            return None
+        try:
+            return payload["id"], int(value[len(UserProgressModel._NEW_CARDS_CURSOR):])
+        except ValueError as e:
+            raise InvalidCursor("Invalid cursor") from e
+
+    @staticmethod
+    def _new_cards_page(user_id, deck_id, queue, limit, after, now):
+        """Completa a página da fila com até `limit` cartas novas de decks lazy depois de `after`."""
+        lazy_ids = UserProgressModel._lazy_deck_ids(user_id, [deck_id] if deck_id else None)
+        limit = max(limit, 0)
+        # Uma carta a mais indica se existe próxima página
+        new_cards = UserProgressModel._new_lazy_cards(user_id, lazy_ids, after=after, limit=limit + 1)
+        page = new_cards[:limit]
+        queue = queue + UserProgressModel._lazy_card_entries(page, now)
+        if len(new_cards) <= limit:
+            return queue, None
+        last_deck, last_position = page[-1][:2] if page else UserProgressModel._NEW_CARDS_START
+        cursor = {"_id": last_deck, "v": f"{UserProgressModel._NEW_CARDS_CURSOR}{last_position}"}
+        return queue, encode_cursor(cursor, sort_field="v")
 
-        if existing_record:
+    @staticmethod
+    def refresh_card_snapshots(card_id, card=None):
+        """Atualiza (ou, com `card=None`, remove) o snapshot da carta nos progressos."""
+        query = {"card_id": ObjectId(card_id), "card": {"$exists": True}}
+        if card is None:
+            mongo.db.user_progress.update_many(query, {"$unset": {"card": ""}})
             return
-        else:
-            
-            new_progress = UserProgressModel(user_id=user_id, deck_id=deck_id, card_id=card_id)
-            new_progress.save_to_db()
+        snapshot = {field: card.get(field) for field in UserProgressModel.CARD_SNAPSHOT_FIELDS}
+        mongo.db.user_progress.update_many(query, {"$set": {"card": snapshot}})
+
+    @staticmethod
+    def get_pending_by_decks(user_id, deck_ids):
+        """Cartas pendentes do usuário agrupadas por deck, em uma única agregação.
+
+        Returns:
+            dict: {deck_id (ObjectId): {"count": int, "cards": [...]}} onde `count`
+            segue `count_pending_cards` e `cards` segue `get_pending_cards`.
+        """
+        pipeline = [
+            {
+                "$match": {
+                    "user_id": ObjectId(user_id),
+                    "deck_id": {"$in": [ObjectId(deck_id) for deck_id in deck_ids]},
+                    "next_review": {"$lte": datetime.now(timezone.utc)},
+                }
+            },
+            {
+                "$lookup": {
+                    "from": "cards",
+                    "localField": "card_id",
+                    "foreignField": "_id",
+                    "as": "card_details",
+                }
+            },
+            {
+                "$project": {
+                    "deck_id": 1,
+                    "card_id": 1,
+                    "last_reviewed": 1,
+                    "next_review": 1,
+                    "card_details": {"$arrayElemAt": ["$card_details", 0]},
+                }
+            },
+        ]
+
+        pending = {}
+        for row in mongo.db.user_progress.aggregate(pipeline):
+            deck_pending = pending.setdefault(row["deck_id"], {"count": 0, "cards": []})
+            deck_pending["count"] += 1
+            card = row.get("card_details")
+            if not card:
+                continue
+            deck_pending["cards"].append({
+                "card_id": str(row["card_id"]),
+                "last_reviewed": row["last_reviewed"],
+                "next_review": row["next_review"],
+                "front": card.get("front"),
+                "back": card.get("back"),
+                "audio": card.get("audio", None),
+            })
+
+        # Uma só resolução dos decks lazy e um só anti-join: a contagem é o tamanho da lista
+        lazy_ids = UserProgressModel._lazy_deck_ids(user_id, deck_ids)
+        new_cards = UserProgressModel._new_lazy_cards(user_id, lazy_ids)
+        for deck_id, _, _ in new_cards:
+            pending.setdefault(deck_id, {"count": 0, "cards": []})["count"] += 1
+        for card in UserProgressModel._lazy_card_entries(new_cards, datetime.now(timezone.utc)):
+            pending[ObjectId(card.pop("deck_id"))]["cards"].append(card)
+        return pending
+
+    @staticmethod
+    def count_pending_by_decks(user_id, deck_ids):
+        """Conta as cartas pendentes do usuário por deck com uma única agregação.
+
+        Returns:
+            dict: {deck_id (ObjectId): quantidade}; decks sem pendências não aparecem.
+        """
+        if not deck_ids:
+            return {}
+        if PendingRollupModel.is_ready():
+            return PendingRollupModel.count_due_by_decks(
+                user_id, deck_ids, extra=UserProgressModel._new_card_counter(user_id)
+            )
+        counts = UserProgressModel._count_due_by_decks(user_id, deck_ids)
+        for deck_id, count in UserProgressModel._new_card_counter(user_id)(deck_ids).items():
+            counts[deck_id] = counts.get(deck_id, 0) + count
+        return counts
+
+    @staticmethod
+    def _new_card_counter(user_id):
+        """`deck_ids -> {deck_id: cartas novas}` do usuário (None = todos os decks), para o LRU do rollup."""
+        return lambda deck_ids=None: UserProgressModel._count_new_lazy(
+            user_id, UserProgressModel._lazy_deck_ids(user_id, deck_ids)
+        )
+
+    @staticmethod
+    def _count_due_by_decks(user_id, deck_ids):
+        pipeline = [
+            {
+                "$match": {
+                    "user_id": ObjectId(user_id),
+                    "deck_id": {"$in": [ObjectId(deck_id) for deck_id in deck_ids]},
+                    "next_review": {"$lte": datetime.now(timezone.utc)},
+                }
+            },
+            {"$group": {"_id": "$deck_id", "count": {"$sum": 1}}},
+        ]
+        return {row["_id"]: row["count"] for row in mongo.db.user_progress.aggregate(pipeline)}
+
+    @staticmethod
+    def create_or_update(user_id, deck_id, card_id):
+        """Cria ou atualiza o progresso de um usuário em uma carta específica."""
+        UserProgressModel.seed_progress([user_id], {deck_id: [card_id]}, include_lazy=True)
+
+    _SEED_CHUNK_SIZE = 1000
+
+    @staticmethod
+    def seed_progress(user_ids, deck_cards, include_lazy=False):
+        """Cria em lote o progresso inicial de cada usuário para cada carta, se ainda não existir.
+
+        Usa upserts não ordenados com `$setOnInsert` sobre o índice único
+        (user_id, deck_id, card_id), então registros existentes não são alterados.
+        Decks `lazy_progress` são ignorados (o progresso nasce na primeira
+        revisão), a não ser com `include_lazy`.
+
+        Args:
+            user_ids: Lista de ids de usuários.
+            deck_cards: {deck_id: [card_ids]} com as cartas de cada deck.
+            include_lazy: Cria o progresso também nos decks lazy.
+
+        Returns:
+            dict: {"inserted": int, "existing": int}
+        """
+        if not include_lazy and deck_cards:
+            lazy = {
+                deck["_id"]
+                for deck in mongo.db.decks.find(
+                    {"_id": {"$in": [ObjectId(d) for d in deck_cards]}, "lazy_progress": True}, {"_id": 1}
+                )
+            }
+            deck_cards = {d: cards for d, cards in deck_cards.items() if ObjectId(d) not in lazy}
+        now = datetime.now(timezone.utc)
+        operations = (
+            (
+                (ObjectId(user_id), ObjectId(deck_id)),
+                UpdateOne(
+                    {
+                        "user_id": ObjectId(user_id),
+                        "deck_id": ObjectId(deck_id),
+                        "card_id": ObjectId(card_id),
+                    },
+                    {"$setOnInsert": {"attempts": 0, "last_reviewed": None, "next_review": now}},
+                    upsert=True,
+                ),
+            )
+            for user_id in user_ids
+            for deck_id, card_ids in deck_cards.items()
+            for card_id in card_ids
+        )
+
+        result = {"inserted": 0, "existing": 0}
+        chunk = []
+        for operation in operations:
+            chunk.append(operation)
+            if len(chunk) >= UserProgressModel._SEED_CHUNK_SIZE:
+                UserProgressModel._write_seed_chunk(chunk, result, now)
+                chunk = []
+        if chunk:
+            UserProgressModel._write_seed_chunk(chunk, result, now)
+        return result
+
+    @staticmethod
+    def _write_seed_chunk(chunk, result, now):
+        """Grava um bloco de upserts do seed e soma ao rollup de pendentes os registros criados."""
+        keys = [key for key, _ in chunk]
+        try:
+            write = mongo.db.user_progress.bulk_write([operation for _, operation in chunk], ordered=False)
+            result["inserted"] += write.upserted_count
+            result["existing"] += write.matched_count
+            upserted = list(write.upserted_ids)
+        except BulkWriteError as e:
+            details = e.details
+            # Upserts concorrentes na mesma chave caem no índice único: o registro já existe
+            duplicates = [err for err in details.get("writeErrors", []) if err.get("code") == 11000]
+            if len(duplicates) != len(details.get("writeErrors", [])):
+                raise
+            result["inserted"] += details.get("nUpserted", 0)
+            result["existing"] += details.get("nMatched", 0) + len(duplicates)
+            upserted = [item["index"] for item in details.get("upserted", [])]
+
+        deltas = {}
+        for index in upserted:
+            user_id, deck_id = keys[index]
+            PendingRollupModel.move(deltas, user_id, deck_id, None, now)
+        PendingRollupModel.apply(deltas)
 
     @staticmethod
     def count_pending_cards(user_id, deck_id=None):
@@ -147,6 +573,311 @@ class UserProgressModel:
         if deck_id:
             query["deck_id"] = ObjectId(deck_id)
 
-        
+        new_cards = UserProgressModel._new_card_counter(user_id)
+        if PendingRollupModel.is_ready():
+            if deck_id:
+                return PendingRollupModel.count_due_by_decks(user_id, [deck_id], extra=new_cards).get(ObjectId(deck_id), 0)
+            return PendingRollupModel.count_due(user_id, extra=new_cards)
+
         pending_cards = mongo.db.user_progress.count_documents(query)
-        return pending_cards
\ No newline at end of file
+        return pending_cards + sum(new_cards([deck_id] if deck_id else None).values())
+
+    @staticmethod
+    def iter_pending_counts_by_user(after_user_id=None, now=None, batch_size=1000, user_range=None):
+        """Itera `{"_id": user_id, "pending": n}` para todos os usuários com cartas vencidas.
+
+        Ordenado por user_id, para que o consumidor possa retomar de onde parou
+        passando o último user_id em `after_user_id`; `user_range=(lo, hi)`
+        restringe a `lo <= user_id < hi` já no `$match` (shards do lembrete).
+        Com o rollup pronto, as vencidas vêm de `PendingRollupModel.iter_due_by_user`
+        em vez de `user_progress`. As cartas novas dos decks lazy (sem progresso)
+        entram na soma.
+        """
+        if PendingRollupModel.is_ready():
+            due = PendingRollupModel.iter_due_by_user(
+                after_user_id, now=now, batch_size=batch_size, user_range=user_range
+            )
+        else:
+            match = {
+                "next_review": {"$lte": now or datetime.now(timezone.utc)},
+                **user_id_filter(after_user_id, user_range),
+            }
+            due = mongo.db.user_progress.aggregate(
+                [
+                    {"$match": match},
+                    {"$group": {"_id": "$user_id", "pending": {"$sum": 1}}},
+                    {"$sort": {"_id": 1}},
+                ],
+                allowDiskUse=True,
+                batchSize=batch_size,
+            )
+        new_cards = UserProgressModel._iter_new_counts_by_user(
+            after_user_id, batch_size=batch_size, user_range=user_range
+        )
+        return (row for row in merge_counts(due, new_cards) if row["pending"] > 0)
+
+    @staticmethod
+    def _iter_new_counts_by_user(after_user_id=None, batch_size=1000, user_range=None):
+        """Cartas sem progresso nos decks lazy de cada usuário, em ordem de user_id.
+
+        Por usuário: soma de `card_count` dos decks lazy que ele tem menos os
+        progressos já criados nesses decks.
+        """
+        from .deck_model import DeckModel
+
+        card_counts = DeckModel.get_card_counts(mongo.db.decks.distinct("_id", {"lazy_progress": True}))
+        if not card_counts:
+            return
+        lazy_ids = list(card_counts)
+        after = user_id_filter(after_user_id, user_range)
+
+        materialized = mongo.db.user_progress.aggregate(
+            [
+                {"$match": {**after, "deck_id": {"$in": lazy_ids}}},
+                {"$group": {"_id": "$user_id", "pending": {"$sum": -1}}},
+                {"$sort": {"_id": 1}},
+            ],
+            allowDiskUse=True,
+            batchSize=batch_size,
+        )
+        totals = (
+            {"_id": user_id, "pending": sum(card_counts[deck_id] for deck_id in deck_ids)}
+            for user_id, deck_ids in UserProgressModel._iter_lazy_decks_by_user(lazy_ids, after, batch_size)
+        )
+        for row in merge_counts(totals, materialized):
+            if row["pending"] > 0:
+                yield row
+
+    @staticmethod
+    def _iter_lazy_decks_by_user(lazy_ids, after, batch_size):
+        """(user_id, {deck_ids lazy que o usuário tem}) em ordem de user_id."""
+        if DeckSubscriberModel.is_ready():
+            rows = mongo.db.deck_subscribers.aggregate(
+                [
+                    {"$match": {**after, "deck_id": {"$in": lazy_ids}}},
+                    {"$group": {"_id": "$user_id", "decks": {"$addToSet": "$deck_id"}}},
+                    {"$sort": {"_id": 1}},
+                ],
+                allowDiskUse=True,
+                batchSize=batch_size,
+            )
+            for row in rows:
+                yield row["_id"], set(row["decks"])
+            return
+
+        # Antes do rebuild de deck_subscribers: users.collections -> collections.decks
+        lazy = set(lazy_ids)
+        lazy_by_collection = {
+            collection["_id"]: [deck_id for deck_id in collection.get("decks", []) if deck_id in lazy]
+            for collection in mongo.db.collections.find({"decks": {"$in": lazy_ids}}, {"decks": 1})
+        }
+        query = {"collections": {"$in": list(lazy_by_collection)}}
+        if after:
+            query["_id"] = after["user_id"]
+        users = mongo.db.users.find(query, {"collections": 1}).sort("_id", 1).batch_size(batch_size)
+        for user in users:
+            yield user["_id"], {
+                deck_id for collection_id in user.get("collections", [])
+                for deck_id in lazy_by_collection.get(collection_id, [])
+            }
+
+    # ----- decks lazy (`lazy_progress`): carta sem progresso = nova, vencida agora -----
+
+    @staticmethod
+    def _lazy_deck_ids(user_id, deck_ids=None):
+        """Ids (em ordem) dos decks lazy que o usuário tem, opcionalmente restritos a `deck_ids`."""
+        if deck_ids is None:
+            candidates = DeckSubscriberModel.get_deck_ids(user_id)
+            if not candidates:
+                return []
+            query = {"_id": {"$in": list(candidates)}, "lazy_progress": True}
+            return sorted(deck["_id"] for deck in mongo.db.decks.find(query, {"_id": 1}))
+
+        # Primeiro o filtro barato em `decks`: a maioria das listagens não tem deck lazy
+        query = {"_id": {"$in": [ObjectId(d) for d in deck_ids]}, "lazy_progress": True}
+        lazy = [deck["_id"] for deck in mongo.db.decks.find(query, {"_id": 1})]
+        if not lazy:
+            return []
+        owned = DeckSubscriberModel.get_deck_ids(user_id, lazy)
+        return sorted(deck_id for deck_id in lazy if deck_id in owned)
+
+    @staticmethod
+    def _materialized_expr(user_id, lazy_ids):
+        """Expressão com os card_ids que já têm progresso do usuário no deck do documento (`$_id`)."""
+        by_deck = {}
+        cursor = mongo.db.user_progress.find(
+            {"user_id": ObjectId(user_id), "deck_id": {"$in": lazy_ids}}, {"_id": 0, "deck_id": 1, "card_id": 1}
+        )
+        for row in cursor:
+            by_deck.setdefault(row["deck_id"], []).append(row["card_id"])
+        if not by_deck:
+            return []
+        branches = [{"case": {"$eq": ["$_id", deck_id]}, "then": card_ids} for deck_id, card_ids in by_deck.items()]
+        return {"$switch": {"branches": branches, "default": []}}
+
+    @staticmethod
+    def _count_new_lazy(user_id, lazy_ids):
+        """{deck_id: cartas sem progresso}, com `$setDifference` de `cards` no servidor."""
+        if not lazy_ids:
+            return {}
+        pipeline = [
+            {"$match": {"_id": {"$in": lazy_ids}}},
+            {
+                "$project": {
+                    "count": {
+                        "$size": {
+                            "$setDifference": [
+                                {"$ifNull": ["$cards", []]},
+                                UserProgressModel._materialized_expr(user_id, lazy_ids),
+                            ]
+                        }
+                    }
+                }
+            },
+        ]
+        return {deck["_id"]: deck["count"] for deck in mongo.db.decks.aggregate(pipeline) if deck["count"]}
+
+    @staticmethod
+    def _new_lazy_cards(user_id, lazy_ids, after=None, limit=None):
+        """Cartas sem progresso dos decks lazy: [(deck_id, posição em `cards`, card_id)].
+
+        Em ordem de deck e de posição no deck. O anti-join roda no servidor
+        (`$filter` sobre as posições de `cards`), que devolve só as cartas
+        novas; com `after=(deck_id, posição)` continua depois dessa carta e
+        com `limit` para assim que juntar `limit` cartas.
+        """
+        if not lazy_ids or limit == 0:
+            return []
+        match = {"_id": {"$in": lazy_ids}}
+        start = 0
+        if after is not None:
+            after_deck, after_position = after
+            match["_id"]["$gte"] = after_deck
+            start = {"$cond": [{"$eq": ["$_id", after_deck]}, after_position + 1, 0]}
+
+        materialized = UserProgressModel._materialized_expr(user_id, lazy_ids)
+        positions = {
+            "$filter": {
+                "input": {"$range": [start, {"$size": {"$ifNull": ["$cards", []]}}]},
+                "as": "i",
+                "cond": {"$not": [{"$in": [{"$arrayElemAt": ["$cards", "$$i"]}, materialized]}]},
+            }
+        }
+        if limit is not None:
+            positions = {"$slice": [positions, limit]}
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"_id": 1}},
+            {
+                "$project": {
+                    "new": {
+                        "$map": {
+                            "input": positions,
+                            "as": "i",
+                            "in": {"position": "$$i", "card_id": {"$arrayElemAt": ["$cards", "$$i"]}},
+                        }
+                    }
+                }
+            },
+        ]
+        new_cards = []
+        for deck in mongo.db.decks.aggregate(pipeline):
+            new_cards += [(deck["_id"], card["position"], card["card_id"]) for card in deck["new"]]
+            if limit is not None and len(new_cards) >= limit:
+                return new_cards[:limit]
+        return new_cards
+
+    @staticmethod
+    def _lazy_card_entries(new_cards, now):
+        """Itens da fila (formato de `get_study_queue`) para as cartas novas de `_new_lazy_cards`."""
+        if not new_cards:
+            return []
+        fields = UserProgressModel.CARD_SNAPSHOT_FIELDS
+        cards = {
+            card["_id"]: card
+            for card in mongo.db.cards.find(
+                {"_id": {"$in": list({card_id for _, _, card_id in new_cards})}}, {field: 1 for field in fields}
+            )
+        }
+        return [
+            {
+                "card_id": str(card_id),
+                "deck_id": str(deck_id),
+                "last_reviewed": None,
+                "next_review": now,
+                "front": cards[card_id].get("front"),
+                "back": cards[card_id].get("back"),
+                "audio": cards[card_id].get("audio", None),
+            }
+            for deck_id, _, card_id in new_cards if card_id in cards
+        ]
+
+    @staticmethod
+    def _lazy_rows(user_id, card_ids):
+        """{card_id: progresso ainda não gravado} das cartas que estão em decks lazy do usuário."""
+        pipeline = [
+            {"$match": {"cards": {"$in": card_ids}, "lazy_progress": True}},
+            {"$project": {"cards": {"$filter": {"input": "$cards", "cond": {"$in": ["$$this", card_ids]}}}}},
+        ]
+        decks = list(mongo.db.decks.aggregate(pipeline))
+        if not decks:
+            return {}
+        owned = DeckSubscriberModel.get_deck_ids(user_id, [deck["_id"] for deck in decks])
+        rows = {}
+        for deck in sorted(decks, key=lambda d: d["_id"]):
+            if deck["_id"] not in owned:
+                continue
+            for card_id in deck["cards"]:
+                rows.setdefault(card_id, {
+                    "user_id": ObjectId(user_id),
+                    "deck_id": deck["_id"],
+                    "card_id": card_id,
+                    "attempts": 0,
+                    "last_reviewed": None,
+                    "next_review": None,
+                })
+        return rows
+
+    @staticmethod
+    def _row_filter(row):
+        if "_id" in row:
+            return {"_id": row["_id"]}
+        return {"user_id": row["user_id"], "deck_id": row["deck_id"], "card_id": row["card_id"]}
+
+    @staticmethod
+    def delete_card_progress(card_id, deck_ids):
+        """Remove os progressos da carta nos decks lazy de `deck_ids` (a carta saiu deles).
+
+        Nos decks lazy a contagem de novas é `card_count` - progressos, então um
+        progresso de carta que não está mais no deck deixaria a conta errada.
+        """
+        lazy = [
+            deck["_id"]
+            for deck in mongo.db.decks.find(
+                {"_id": {"$in": [ObjectId(d) for d in deck_ids]}, "lazy_progress": True}, {"_id": 1}
+            )
+        ]
+        if not lazy:
+            return 0
+        query = {"card_id": ObjectId(card_id), "deck_id": {"$in": lazy}}
+        PendingRollupModel.remove_progress(query)
+        return mongo.db.user_progress.delete_many(query).deleted_count
+
+    @staticmethod
+    def prune_unreviewed_lazy(batch_size=100):
+        """Remove os progressos nunca revisados dos decks lazy (equivalem a não ter progresso)."""
+        removed, deck_ids = 0, []
+        for deck in mongo.db.decks.find({"lazy_progress": True}, {"_id": 1}):
+            deck_ids.append(deck["_id"])
+            if len(deck_ids) >= batch_size:
+                removed += UserProgressModel._prune_unreviewed(deck_ids)
+                deck_ids = []
+        if deck_ids:
+            removed += UserProgressModel._prune_unreviewed(deck_ids)
+        return removed
+
+    @staticmethod
+    def _prune_unreviewed(deck_ids):
+        query = {"deck_id": {"$in": deck_ids}, "last_reviewed": None, "attempts": 0}
+        PendingRollupModel.remove_progress(query)
+        return mongo.db.user_progress.delete_many(query).deleted_count
@@ -1,86 +1,196 @@
 """Model for tracking user study streaks (consecutive days)."""
 
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from src.app import mongo
 
 
 class UserStreakModel:
-    """Model for tracking consecutive study days."""
+    """Model for tracking consecutive study days.
+
+    Cada dia estudado continua gravado em `user_streaks` (um documento por
+    dia), mas as leituras usam o resumo materializado em
+    `user_streak_summaries` (um documento por usuário):
+
+    - `current_streak`: dias consecutivos terminando em `last_study_date`;
+    - `longest_streak`: maior sequência já registrada;
+    - `last_study_date` / `last_study_day` (dias desde 1970-01-01);
+    - `week_bits`: bitmap dos 7 dias terminando em `last_study_day`
+      (bit 0 = `last_study_day`, bit 1 = dia anterior, ...).
+
+    Usuários que ainda não têm resumo são migrados a partir dos dias salvos.
+    """
+
+    WEEK_MASK = 0b1111111
+    _EPOCH = date(1970, 1, 1)
+
+    @staticmethod
+    def _day_number(day: date) -> int:
+        return (day - UserStreakModel._EPOCH).days
+
+    @staticmethod
+    def _advance_pipeline(day: date):
+        """Update em pipeline que incorpora `day` ao resumo (idempotente para o mesmo dia)."""
+        day_number = UserStreakModel._day_number(day)
+        gap = {"$subtract": [day_number, "$last_study_day"]}
+        return [
+            {"$set": {"_gap": gap}},
+            {
+                "$set": {
+                    "current_streak": {
+                        "$switch": {
+                            "branches": [
+                                {"case": {"$lte": ["$_gap", 0]}, "then": "$current_streak"},
+                                {"case": {"$eq": ["$_gap", 1]}, "then": {"$add": ["$current_streak", 1]}},
+                            ],
+                            "default": 1,
+                        }
+                    },
+                    "week_bits": {
+                        "$switch": {
+                            "branches": [
+                                {"case": {"$lte": ["$_gap", 0]}, "then": "$week_bits"},
+                                {
+                                    "case": {"$lt": ["$_gap", 7]},
+                                    # (bits << gap) & WEEK_MASK | 1, em aritmética (sem $bitOr)
+                                    "then": {
+                                        "$toInt": {
+                                            "$add": [
+                                                {"$mod": [{"$multiply": ["$week_bits", {"$pow": [2, "$_gap"]}]},
+                                                          UserStreakModel.WEEK_MASK + 1]},
+                                                1,
+                                            ]
+                                        }
+                                    },
+                                },
+                            ],
+                            "default": 1,
+                        }
+                    },
+                    "last_study_day": {"$max": ["$last_study_day", day_number]},
+                    "last_study_date": {
+                        "$cond": [{"$gt": ["$_gap", 0]}, day.isoformat(), "$last_study_date"]
+                    },
+                    "updated_at": "$$NOW",
+                }
+            },
+            {"$set": {"longest_streak": {"$max": ["$longest_streak", "$current_streak"]}}},
+            {"$project": {"_gap": 0}},
+        ]
+
+    @staticmethod
+    def _summary_from_dates(study_dates) -> dict:
+        """Calcula o resumo a partir do conjunto de datas estudadas (migração)."""
+        last = max(study_dates)
+        current = 0
+        check = last
+        while check in study_dates:
+            current += 1
+            check -= timedelta(days=1)
+
+        longest = run = 0
+        previous = None
+        for day in sorted(study_dates):
+            run = run + 1 if previous is not None and (day - previous).days == 1 else 1
+            longest = max(longest, run)
+            previous = day
+
+        week_bits = 0
+        for i in range(7):
+            if last - timedelta(days=i) in study_dates:
+                week_bits |= 1 << i
+
+        return {
+            "current_streak": current,
+            "longest_streak": longest,
+            "last_study_date": last.isoformat(),
+            "last_study_day": UserStreakModel._day_number(last),
+            "week_bits": week_bits,
+        }
+
+    @staticmethod
+    def rebuild_summary(user_id: str):
+        """(Re)cria o resumo do usuário a partir de `user_streaks`. Retorna o resumo ou None."""
+        user_obj_id = ObjectId(user_id)
+        study_dates = {
+            date.fromisoformat(doc["date"])
+            for doc in mongo.db.user_streaks.find({"user_id": user_obj_id}, {"date": 1, "_id": 0})
+            if doc.get("date")
+        }
+        if not study_dates:
+            return None
+
+        summary = UserStreakModel._summary_from_dates(study_dates)
+        summary["updated_at"] = datetime.now(timezone.utc)
+        mongo.db.user_streak_summaries.replace_one({"_id": user_obj_id}, summary, upsert=True)
+        return summary
 
     @staticmethod
-    def record_study_day(user_id: str):
+    def record_study_day(user_id: str, today: Optional[date] = None):
         """Registra um dia de estudo para o usuário. Se já foi registrado hoje, não faz nada."""
-        today = datetime.now(timezone.utc).date()
+        today = today or datetime.now(timezone.utc).date()
         user_obj_id = ObjectId(user_id)
 
-        # Verifica se já existe registro para hoje
-        existing = mongo.db.user_streaks.find_one({
-            "user_id": user_obj_id,
-            "date": today.isoformat()
-        })
+        mongo.db.user_streaks.update_one(
+            {"user_id": user_obj_id, "date": today.isoformat()},
+            {"$setOnInsert": {"created_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
 
-        if not existing:
-            # Insere novo registro para hoje
-            mongo.db.user_streaks.insert_one({
-                "user_id": user_obj_id,
-                "date": today.isoformat(),
-                "created_at": datetime.now(timezone.utc)
-            })
+        result = mongo.db.user_streak_summaries.update_one(
+            {"_id": user_obj_id}, UserStreakModel._advance_pipeline(today)
+        )
+        if result.matched_count:
+            return
+
+        # Primeiro registro com o resumo: migra o histórico (que já inclui hoje)
+        try:
+            UserStreakModel.rebuild_summary(user_id)
+        except DuplicateKeyError:
+            mongo.db.user_streak_summaries.update_one(
+                {"_id": user_obj_id}, UserStreakModel._advance_pipeline(today)
+            )
 
     @staticmethod
-    def get_streak_info(user_id: str) -> dict:
+    def get_streak_info(user_id: str, today: Optional[date] = None) -> dict:
         """Retorna informações sobre o streak atual do usuário.
         
         Returns:
             dict com:
-                - current_streak: int (dias consecutivos)
+                - current_streak: int (dias consecutivos até hoje)
+                - longest_streak: int (maior sequência já feita)
                 - last_study_date: str ou None (última data estudada)
                 - week_study_days: list[bool] (7 dias da semana, True se estudou)
         """
-        user_obj_id = ObjectId(user_id)
-        
-        # Busca todos os registros de estudo do usuário
-        all_studies = list(mongo.db.user_streaks.find(
-            {"user_id": user_obj_id},
-            sort=[("date", -1)]
-        ))
+        summary = mongo.db.user_streak_summaries.find_one({"_id": ObjectId(user_id)})
+        if summary is None:
+            summary = UserStreakModel.rebuild_summary(user_id)
 
-        if not all_studies:
+        if not summary:
             return {
                 "current_streak": 0,
+                "longest_streak": 0,
                 "last_study_date": None,
                 "week_study_days": [False] * 7
             }
 
-        # Converte datas de string ISO para date
-        study_dates = set()
-        for study in all_studies:
-            date_str = study.get("date")
-            if date_str:
-                from datetime import date
-                study_dates.add(date.fromisoformat(date_str))
+        today = UserStreakModel._day_number(today or datetime.now(timezone.utc).date())
+        gap = today - summary["last_study_day"]
 
-        today = datetime.now(timezone.utc).date()
-        last_study_date = max(study_dates) if study_dates else None
+        # O streak só conta se a sequência chega até hoje
+        current_streak = summary["current_streak"] if gap == 0 else 0
 
-        # Calcula streak atual (dias consecutivos até hoje)
-        current_streak = 0
-        check_date = today
-
-        while check_date in study_dates:
-            current_streak += 1
-            check_date -= timedelta(days=1)
-
-        # Calcula dias da semana atual (últimos 7 dias, começando de hoje)
+        # Últimos 7 dias, de 6 dias atrás até hoje
         week_study_days = []
-        for i in range(6, -1, -1):  # 6 dias atrás até hoje (7 dias)
-            day_check = today - timedelta(days=i)
-            week_study_days.append(day_check in study_dates)
+        for i in range(6, -1, -1):
+            offset = i - gap
+            week_study_days.append(0 <= offset < 7 and bool(int(summary["week_bits"]) >> offset & 1))
 
         return {
             "current_streak": current_streak,
-            "last_study_date": last_study_date.isoformat() if last_study_date else None,
+            "longest_streak": summary.get("longest_streak", current_streak),
+            "last_study_date": summary["last_study_date"],
             "week_study_days": week_study_days
         }
-
@@ -53,7 +53,7 @@ class VideoModel:
             "title": self.title,
             "thumbnail": self.thumbnail,
             "video_id": self.video_id,
-            "deck_id": str(ObjectId(self.deck_id)),
+            "deck_id": self.deck_id,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
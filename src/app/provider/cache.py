@@ -0,0 +1,219 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+
+
+class TTLCache:
+    """Cache LRU em memória (por processo) com expiração por tempo.
+
+    Seguro para uso entre threads do mesmo worker. Cada worker do gunicorn
+    tem a sua própria instância, então invalidações são locais ao processo
+    e o TTL limita por quanto tempo os outros workers podem ver dados antigos.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class MemoryCacheBackend:
+    """Backend em memória (LRU por processo) para o `ResponseCache`.
+
+    As versões das tags também são por processo: `invalidate()` só vale no
+    worker que a chamou, e os demais continuam servindo a entrada antiga até
+    ela expirar. `max_ttl` limita esse atraso quando há vários workers.
+    """
+
+    def __init__(self, maxsize=2048, ttl=300, max_ttl=None):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.max_ttl = max_ttl
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value, ttl):
+        if self.max_ttl is not None:
+            ttl = min(ttl, self.max_ttl)
+        self._entries.set(key, value, ttl=ttl)
+
+    def get_counters(self, keys):
+        with self._lock:
+            return [self._counters.get(key, 0) for key in keys]
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisCacheBackend:
+    """Backend compartilhado entre workers, para qualquer servidor que fale o protocolo do Redis.
+
+    Requer o pacote `redis` (importado só quando este backend é usado).
+    """
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requer o pacote 'redis' instalado") from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self._client.get(key)
+
+    def set(self, key, value, ttl):
+        self._client.set(key, value, ex=ttl)
+
+    def get_counters(self, keys):
+        return [int(v) if v is not None else 0 for v in self._client.mget(keys)]
+
+    def incr(self, key):
+        return self._client.incr(key)
+
+
+# Cabeçalhos recalculados a cada resposta servida do cache
+_REGENERATED_HEADERS = {"content-type", "content-length", "etag"}
+
+
+class ResponseCache:
+    """Cache de respostas/dados com chaves versionadas por tag e suporte a ETag.
+
+    Cada entrada é gravada sob uma chave que inclui a versão atual de cada uma
+    das suas tags; `invalidate(tag)` incrementa a versão da tag, de modo que
+    todas as entradas antigas deixam de ser encontradas e expiram pelo TTL.
+    """
+
+    def __init__(self, backend=None, default_ttl=300, prefix="memobelc"):
+        self.backend = backend or MemoryCacheBackend(ttl=default_ttl)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+
+    def init_app(self, app):
+        self.default_ttl = app.config.get("CACHE_DEFAULT_TTL", self.default_ttl)
+        backend = app.config.get("CACHE_BACKEND", "memory")
+        if backend == "redis":
+            self.backend = RedisCacheBackend(app.config["CACHE_URL"])
+        elif backend == "memory":
+            # Com vários workers a invalidação não chega aos outros processos:
+            # o TTL curto é o que limita por quanto tempo eles servem dados antigos
+            max_ttl = app.config.get("CACHE_MEMORY_MAX_TTL") if app.config.get("GUNICORN_WORKERS", 1) > 1 else None
+            self.backend = MemoryCacheBackend(ttl=self.default_ttl, max_ttl=max_ttl)
+        else:
+            raise ValueError(f"CACHE_BACKEND inválido: {backend}")
+        app.extensions["response_cache"] = self
+
+    def _versioned_key(self, key, tags):
+        tag_keys = [f"{self.prefix}:tag:{tag}" for tag in tags]
+        versions = self.backend.get_counters(tag_keys) if tag_keys else []
+        stamp = ".".join(f"{tag}@{version}" for tag, version in zip(tags, versions))
+        return f"{self.prefix}:entry:{stamp}:{key}"
+
+    def invalidate(self, *tags):
+        """Invalida todas as entradas marcadas com qualquer uma das tags."""
+        for tag in tags:
+            self.backend.incr(f"{self.prefix}:tag:{tag}")
+
+    def memoize(self, key, tags, builder, ttl=None):
+        """Retorna o valor em cache (JSON) ou o constrói com `builder()` e guarda."""
+        versioned_key = self._versioned_key(key, tags)
+        cached = self.backend.get(versioned_key)
+        if cached is not None:
+            return json.loads(cached)
+        value = builder()
+        self.backend.set(versioned_key, json.dumps(value), ttl or self.default_ttl)
+        return value
+
+    def cached(self, tags, ttl=None, vary=None):
+        """Decorator de view: guarda a resposta JSON e responde `If-None-Match` com 304.
+
+        Args:
+            tags: Lista de tags ou função `(*args, **kwargs) -> lista` (recebe os
+                argumentos da view, ex.: `current_user` depois do token_required).
+            ttl: Tempo de vida em segundos (padrão: CACHE_DEFAULT_TTL).
+            vary: Função opcional `(*args, **kwargs) -> str` acrescentada à chave
+                (ex.: id do usuário para respostas por usuário).
+        """
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                view_tags = tags(*args, **kwargs) if callable(tags) else list(tags)
+                key = request.full_path
+                if vary:
+                    key = f"{key}|{vary(*args, **kwargs)}"
+                versioned_key = self._versioned_key(key, view_tags)
+
+                cached = self.backend.get(versioned_key)
+                if cached is not None:
+                    entry = json.loads(cached)
+                    response = Response(
+                        entry["body"],
+                        status=entry["status"],
+                        headers=entry.get("headers"),
+                        mimetype="application/json",
+                    )
+                    response.set_etag(entry["etag"])
+                    return response.make_conditional(request)
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code in (200, 201) and response.is_json:
+                    body = response.get_data(as_text=True)
+                    etag = hashlib.sha1(body.encode("utf-8")).hexdigest()
+                    headers = [
+                        (name, value) for name, value in response.headers.items()
+                        if name.lower() not in _REGENERATED_HEADERS
+                    ]
+                    entry = {"body": body, "status": response.status_code, "etag": etag, "headers": headers}
+                    self.backend.set(versioned_key, json.dumps(entry), ttl or self.default_ttl)
+                    response.set_etag(etag)
+                    response = response.make_conditional(request)
+                return response
+
+            return wrapper
+
+        return decorator
+
+
+response_cache = ResponseCache()
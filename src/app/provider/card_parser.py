@@ -0,0 +1,145 @@
+"""Leitura incremental do JSON de cartas gerado pelo LLM.
+
+O modelo responde algo como ```json {"cards": [{"front": ..., "back": ...}], ...} ```,
+às vezes com texto depois, vírgulas sobrando ou cortado no meio (limite de
+tokens). O `CardStreamParser` recebe a resposta em pedaços, emite cada carta
+assim que o objeto dela fecha e, no final, monta o melhor resultado possível:
+o JSON completo quando ele é válido, ou a parte completa com os colchetes
+fechados quando a resposta foi truncada.
+"""
+
+import json
+
+
+class CardStreamParser:
+    """Parser incremental para respostas `{"cards": [...]}` (ou `[...]`) do LLM.
+
+    Uso:
+        parser = CardStreamParser()
+        for chunk in chunks:
+            for card in parser.feed(chunk):
+                ...  # carta completa
+        data, partial = parser.result()
+    """
+
+    _CLOSERS = {"{": "}", "[": "]"}
+
+    def __init__(self):
+        self.cards = []
+        self.done = False
+        # JSON da raiz já "limpo" (sem vírgulas sobrando antes de } e ])
+        self._out = []
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        # Início (em _out) do objeto de carta sendo lido, se houver
+        self._card_start = None
+        # Último ponto em que um container fechou: (tamanho de _out, pilha)
+        self._safe = None
+
+    def feed(self, chunk):
+        """Processa mais um pedaço da resposta. Retorna as cartas completadas nele."""
+        new_cards = []
+        for char in chunk:
+            if self.done:
+                break
+            if not self._stack:
+                # Ignora o que vem antes da raiz (```json, texto solto)
+                if char in self._CLOSERS:
+                    self._open(char)
+                continue
+            if self._in_string:
+                self._out.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._out.append(char)
+            elif char in self._CLOSERS:
+                self._open(char)
+            elif char in "}]":
+                card = self._close(char)
+                if card is not None:
+                    new_cards.append(card)
+            else:
+                self._out.append(char)
+        self.cards.extend(new_cards)
+        return new_cards
+
+    def _open(self, char):
+        if char == "{" and self._is_card_level():
+            self._card_start = len(self._out)
+        self._stack.append(char)
+        self._out.append(char)
+
+    def _is_card_level(self):
+        # Cartas são objetos dentro do array raiz ou do array de `{"cards": [...]}`
+        return self._stack in (["["], ["{", "["])
+
+    def _close(self, char):
+        if self._CLOSERS[self._stack[-1]] != char:
+            return None  # fechamento que não corresponde: ignora
+        self._strip_trailing_comma()
+        self._out.append(char)
+        self._stack.pop()
+        self._safe = (len(self._out), list(self._stack))
+        if not self._stack:
+            self.done = True
+
+        card = None
+        if char == "}" and self._card_start is not None and self._is_card_level():
+            card = self._load("".join(self._out[self._card_start:]))
+            self._card_start = None
+            if not isinstance(card, dict) or "front" not in card or "back" not in card:
+                card = None
+        return card
+
+    def _strip_trailing_comma(self):
+        i = len(self._out) - 1
+        while i >= 0 and self._out[i].isspace():
+            i -= 1
+        if i >= 0 and self._out[i] == ",":
+            del self._out[i:]
+
+    @staticmethod
+    def _load(text):
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+    def result(self):
+        """Resultado final: `(dados, parcial)`.
+
+        `parcial` é True quando a resposta estava truncada/inválida e os dados
+        foram reconstruídos (só com as cartas completas).
+        """
+        data = self._load("".join(self._out)) if self.done else None
+        partial = data is None
+
+        if data is None and self._safe is not None:
+            # Corta no último container fechado e fecha os que ficaram abertos
+            size, stack = self._safe
+            closing = "".join(self._CLOSERS[c] for c in reversed(stack))
+            data = self._load("".join(self._out[:size]) + closing)
+
+        if isinstance(data, list):
+            data = {"cards": data}
+        if not isinstance(data, dict):
+            data = {}
+        if not isinstance(data.get("cards"), list) or (partial and len(data["cards"]) < len(self.cards)):
+            data["cards"] = list(self.cards)
+        return data, partial
+
+
+def parse_cards(text):
+    """Atalho para uma resposta completa: retorna `(dados, parcial)`."""
+    parser = CardStreamParser()
+    parser.feed(text)
+    return parser.result()
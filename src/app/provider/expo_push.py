@@ -0,0 +1,115 @@
+"""Cliente da API de push do Expo com envio em lote, pool de conexões e retries."""
+
+import logging
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExpoPushDispatcher:
+    """Envia mensagens para o Expo em lotes e consulta os receipts.
+
+    - Agrupa até `PUSH_BATCH_SIZE` (100, limite do Expo) mensagens por requisição;
+    - Reutiliza um `requests.Session` com pool de conexões (um por processo);
+    - Refaz a requisição com backoff exponencial em erros de rede, 429 e 5xx.
+    """
+
+    DEFAULT_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+    DEFAULT_RECEIPTS_URL = "https://exp.host/--/api/v2/push/getReceipts"
+    # Limites da API do Expo
+    PUSH_BATCH_SIZE = 100
+    RECEIPTS_BATCH_SIZE = 1000
+
+    def __init__(self, push_url=None, receipts_url=None, access_token=None,
+                 max_retries=3, backoff=0.5, timeout=10, pool_size=10):
+        self.push_url = push_url or self.DEFAULT_PUSH_URL
+        self.receipts_url = receipts_url or self.DEFAULT_RECEIPTS_URL
+        self.access_token = access_token
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = None
+
+    def init_app(self, app):
+        self.push_url = app.config.get("EXPO_PUSH_URL", self.push_url)
+        self.receipts_url = app.config.get("EXPO_RECEIPTS_URL", self.receipts_url)
+        self.access_token = app.config.get("EXPO_ACCESS_TOKEN", self.access_token)
+        self.max_retries = app.config.get("EXPO_PUSH_MAX_RETRIES", self.max_retries)
+        self.timeout = app.config.get("EXPO_PUSH_TIMEOUT", self.timeout)
+        self._session = None
+        app.extensions["expo_push"] = self
+
+    @property
+    def session(self):
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+                "Content-Type": "application/json",
+            })
+            if self.access_token:
+                session.headers["Authorization"] = f"Bearer {self.access_token}"
+            self._session = session
+        return self._session
+
+    def _post(self, url, payload):
+        """POST com retries; retorna o JSON da resposta ou None se todas as tentativas falharem."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise requests.HTTPError(f"Expo respondeu {response.status_code}", response=response)
+                response.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                retryable = e.response is None or e.response.status_code == 429 or e.response.status_code >= 500
+                if not retryable or attempt == self.max_retries:
+                    logger.warning(f"Falha ao chamar o Expo ({url}): {e}")
+                    return None
+                time.sleep(self.backoff * (2 ** attempt))
+                continue
+            try:
+                return response.json()
+            except ValueError as e:
+                # Corpo que não é JSON (ex.: página HTML de um proxy): lote com falha, sem retry,
+                # para não reenviar mensagens que talvez já tenham saído
+                logger.warning(f"Resposta inválida do Expo ({url}): {e}")
+                return None
+        return None
+
+    def send(self, messages):
+        """Envia as mensagens e retorna um ticket por mensagem (mesma ordem).
+
+        Lotes que falharem depois de todos os retries recebem tickets
+        `{"status": "error", "details": {"error": "RequestFailed"}}`.
+        """
+        tickets = []
+        for i in range(0, len(messages), self.PUSH_BATCH_SIZE):
+            chunk = messages[i:i + self.PUSH_BATCH_SIZE]
+            body = self._post(self.push_url, chunk)
+            data = body.get("data") if isinstance(body, dict) else None
+            if not isinstance(data, list) or len(data) != len(chunk):
+                data = [{"status": "error", "details": {"error": "RequestFailed"}}] * len(chunk)
+            tickets.extend(data)
+        return tickets
+
+    def get_receipts(self, ticket_ids):
+        """Busca os receipts dos tickets. Retorna {ticket_id: receipt} (só os já disponíveis)."""
+        receipts = {}
+        for i in range(0, len(ticket_ids), self.RECEIPTS_BATCH_SIZE):
+            chunk = ticket_ids[i:i + self.RECEIPTS_BATCH_SIZE]
+            body = self._post(self.receipts_url, {"ids": chunk})
+            if isinstance(body, dict) and isinstance(body.get("data"), dict):
+                receipts.update(body["data"])
+        return receipts
+
+
+expo_push = ExpoPushDispatcher()
@@ -0,0 +1,234 @@
+"""Cliente de LLM usado pelo chat e pela geração de cartas.
+
+As chamadas ao modelo rodam em um pool de threads próprio (`LLM_MAX_WORKERS`),
+fora das threads de requisição do gunicorn, e o número de chamadas simultâneas
+é limitado: quando o pool está cheio a requisição falha na hora com
+`LLMBusyError` em vez de ocupar mais uma thread esperando.
+
+Backends (config `LLM_BACKEND`):
+- `gemini`: Google Generative AI, com um `GenerativeModel` em cache por
+  system instruction (ou seja, por par de idiomas do chat);
+- `fake`: respostas fixas, para testes e desenvolvimento sem chave de API.
+
+Um backend é qualquer objeto com `name`, `generate(prompt, system_instruction)`
+e os geradores de texto `stream_generate(prompt, system_instruction)` e
+`stream_chat(history, message, system_instruction)`.
+"""
+
+import logging
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBusyError(RuntimeError):
+    """Todas as vagas do pool de chamadas ao LLM estão ocupadas."""
+
+
+def llm_error(e):
+    """Mapeia uma exceção da chamada ao LLM para `(payload, status)` da resposta HTTP."""
+    if isinstance(e, LLMBusyError):
+        return {"error": "Chat busy, try again"}, 503
+    if "429" in str(type(e).__name__) or "ResourceExhausted" in str(e):
+        return {"error": "API quota exceeded"}, 429
+    return {"error": str(e)}, 500
+
+
+class GeminiBackend:
+    """Backend do Google Gemini com cache de `GenerativeModel` por system instruction."""
+
+    MAX_CACHED_MODELS = 64
+
+    def __init__(self, api_key, model_name):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self.model_name = model_name
+        self.name = f"gemini:{model_name}"
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _model(self, system_instruction=None):
+        with self._lock:
+            model = self._models.get(system_instruction)
+            if model is not None:
+                self._models.move_to_end(system_instruction)
+                return model
+        model = self._genai.GenerativeModel(self.model_name, system_instruction=system_instruction)
+        with self._lock:
+            self._models[system_instruction] = model
+            while len(self._models) > self.MAX_CACHED_MODELS:
+                self._models.popitem(last=False)
+        return model
+
+    def generate(self, prompt, system_instruction=None):
+        response = self._model(system_instruction).generate_content(prompt)
+        return response.text
+
+    def stream_generate(self, prompt, system_instruction=None):
+        for chunk in self._model(system_instruction).generate_content(prompt, stream=True):
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
+    def stream_chat(self, history, message, system_instruction=None):
+        chat = self._model(system_instruction).start_chat(history=history)
+        for chunk in chat.send_message(message, stream=True):
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
+
+class FakeLLMBackend:
+    """Backend determinístico para testes: devolve as respostas configuradas em ordem.
+
+    As respostas do chat são emitidas palavra por palavra, simulando o streaming.
+    """
+
+    name = "fake"
+
+    def __init__(self, replies=None, default_reply="Olá! Vamos praticar?"):
+        self.replies = list(replies or [])
+        self.default_reply = default_reply
+        self.calls = []
+
+    def _next_reply(self):
+        return self.replies.pop(0) if self.replies else self.default_reply
+
+    def generate(self, prompt, system_instruction=None):
+        self.calls.append({"prompt": prompt, "system_instruction": system_instruction})
+        return self._next_reply()
+
+    @staticmethod
+    def _words(reply):
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            yield word if i == len(words) - 1 else word + " "
+
+    def stream_generate(self, prompt, system_instruction=None):
+        self.calls.append({"prompt": prompt, "system_instruction": system_instruction})
+        yield from self._words(self._next_reply())
+
+    def stream_chat(self, history, message, system_instruction=None):
+        self.calls.append({"history": history, "message": message, "system_instruction": system_instruction})
+        yield from self._words(self._next_reply())
+
+
+class LLMClient:
+    """Executa as chamadas do backend configurado no pool de threads do LLM."""
+
+    BACKEND_GEMINI = "gemini"
+    BACKEND_FAKE = "fake"
+
+    # Marca o fim do stream na fila entre a thread do pool e a da requisição
+    _END = object()
+
+    def __init__(self, max_workers=8, timeout=60):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.backend = None
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def init_app(self, app):
+        self.max_workers = app.config.get("LLM_MAX_WORKERS", self.max_workers)
+        self.timeout = app.config.get("LLM_TIMEOUT", self.timeout)
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+        backend = app.config.get("LLM_BACKEND", self.BACKEND_GEMINI)
+        if backend == self.BACKEND_FAKE:
+            self.backend = FakeLLMBackend()
+        else:
+            self.backend = GeminiBackend(app.config.get("GENAI_API_KEY"), app.config.get("GENAI_MODEL"))
+        app.extensions["llm"] = self
+
+    def use_backend(self, backend):
+        """Troca o backend (ex.: `FakeLLMBackend` nos testes). Retorna o anterior."""
+        previous, self.backend = self.backend, backend
+        return previous
+
+    @property
+    def cache_namespace(self):
+        """Identifica backend/modelo nas chaves do cache de gerações."""
+        return getattr(self.backend, "name", type(self.backend).__name__)
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm")
+        return self._executor
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            raise LLMBusyError("Muitas chamadas simultâneas ao LLM")
+
+    def generate(self, prompt, system_instruction=None):
+        """Gera um texto completo a partir do prompt."""
+        self._acquire()
+        try:
+            future = self.executor.submit(self.backend.generate, prompt, system_instruction)
+        except Exception:
+            self._slots.release()
+            raise
+        # A vaga só volta quando a chamada termina de fato: depois de um timeout a
+        # thread do pool continua ocupada e não pode ser contada como livre
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=self.timeout)
+
+    def stream_chat(self, history, message, system_instruction=None):
+        """Envia a mensagem e gera os pedaços da resposta conforme chegam do modelo.
+
+        A chamada ao modelo roda no pool; a vaga é reservada antes do primeiro
+        `next()` para que um pool cheio falhe com `LLMBusyError` já na chamada.
+        """
+        return self._stream(self.backend.stream_chat, history, message, system_instruction=system_instruction)
+
+    def stream_generate(self, prompt, system_instruction=None):
+        """Como `generate`, mas gera os pedaços do texto conforme chegam do modelo."""
+        return self._stream(self.backend.stream_generate, prompt, system_instruction=system_instruction)
+
+    def _stream(self, backend_stream, *args, **kwargs):
+        self._acquire()
+        chunks = queue.Queue()
+
+        def produce():
+            try:
+                for text in backend_stream(*args, **kwargs):
+                    chunks.put(text)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(self._END)
+                self._slots.release()
+
+        try:
+            self.executor.submit(produce)
+        except Exception:
+            self._slots.release()
+            raise
+        return self._drain(chunks)
+
+    def _drain(self, chunks):
+        while True:
+            try:
+                item = chunks.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError(f"LLM sem resposta em {self.timeout}s") from None
+            if item is self._END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def chat(self, history, message, system_instruction=None):
+        """Versão não-streaming de `stream_chat`: retorna a resposta inteira."""
+        return "".join(self.stream_chat(history, message, system_instruction=system_instruction))
+
+
+llm = LLMClient()
@@ -0,0 +1,155 @@
+"""Algoritmos de agendamento das revisões (repetição espaçada).
+
+Cada scheduler recebe o estado de uma carta (`attempts` e, se usar, `ease`,
+`interval_days`, `repetitions`) e o nível de lembrança (0..3, mesma ordem de
+`UserProgressModel._RECALL_LEVEL_MAP`) e devolve quantos dias faltam para a
+próxima revisão e o novo estado. Há duas APIs com o mesmo resultado:
+
+- `review(state, level)`: uma carta (usada por `update_status`);
+- `review_batch(states, levels)`: colunas inteiras de uma vez, vetorizado com
+  NumPy (importações, reagendamentos, lotes grandes). O NumPy é dependência do
+  projeto e é importado junto com este módulo; sem ele `review_batch` cai no
+  loop carta a carta (`_scalar_batch`).
+
+O algoritmo ativo vem da config `SCHEDULER_ALGORITHM` ("doubling" ou "sm2").
+"""
+
+import math
+
+from flask import current_app, has_app_context
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+
+# Teto do intervalo (evita overflow do timedelta em cartas com muitas tentativas)
+MAX_INTERVAL_DAYS = 36500
+
+LEVEL_FORGOT, LEVEL_DIFFICULT, LEVEL_GOOD, LEVEL_EASY = 0, 1, 2, 3
+
+
+class DoublingScheduler:
+    """Algoritmo original: intervalo dobra a cada tentativa.
+
+    - 0 (não lembrei): revisar agora;
+    - 1 (difícil): 1 dia;
+    - 2 (bom): 2^(attempts-1) dias;
+    - 3 (fácil): 2 * 2^(attempts-1) dias.
+    """
+
+    name = "doubling"
+    state_fields = ()
+
+    def review(self, state, level):
+        attempts = state.get("attempts", 0)
+        if level == LEVEL_FORGOT:
+            days = 0.0
+        elif level == LEVEL_DIFFICULT:
+            days = 1.0
+        else:
+            factor = 2.0 if level == LEVEL_EASY else 1.0
+            days = factor * 2.0 ** min(attempts - 1, 64)
+        return min(days, MAX_INTERVAL_DAYS), {}
+
+    def review_batch(self, states, levels):
+        if np is None:
+            return _scalar_batch(self, states, levels)
+        attempts = np.asarray(states["attempts"], dtype=np.float64)
+        levels = np.asarray(levels)
+        good = np.exp2(np.minimum(attempts - 1, 64))
+        days = np.select(
+            [levels == LEVEL_FORGOT, levels == LEVEL_DIFFICULT, levels == LEVEL_EASY],
+            [0.0, 1.0, 2.0 * good],
+            default=good,
+        )
+        return np.minimum(days, MAX_INTERVAL_DAYS), {}
+
+
+class SM2Scheduler:
+    """SM-2 (SuperMemo 2) com fator de facilidade (`ease`) por carta.
+
+    Os níveis 0..3 viram as notas de qualidade 1, 3, 4 e 5 do SM-2. Errar
+    zera as repetições e a carta volta para revisão imediata.
+    """
+
+    name = "sm2"
+    state_fields = ("ease", "interval_days", "repetitions")
+
+    DEFAULT_EASE = 2.5
+    MIN_EASE = 1.3
+    _QUALITY = (1, 3, 4, 5)
+
+    def review(self, state, level):
+        ease = state.get("ease") or self.DEFAULT_EASE
+        interval = state.get("interval_days") or 0.0
+        repetitions = state.get("repetitions") or 0
+        quality = self._QUALITY[level]
+
+        if quality < 3:
+            repetitions, interval = 0, 0.0
+        else:
+            repetitions += 1
+            if repetitions == 1:
+                interval = 1.0
+            elif repetitions == 2:
+                interval = 6.0
+            else:
+                interval = float(math.floor(interval * ease + 0.5))
+        ease = max(self.MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        interval = min(interval, MAX_INTERVAL_DAYS)
+        return interval, {"ease": ease, "interval_days": interval, "repetitions": repetitions}
+
+    def review_batch(self, states, levels):
+        if np is None:
+            return _scalar_batch(self, states, levels)
+        count = len(levels)
+        ease = _column(states, "ease", count, self.DEFAULT_EASE)
+        interval = _column(states, "interval_days", count, 0.0)
+        repetitions = _column(states, "repetitions", count, 0.0)
+        quality = np.asarray(self._QUALITY, dtype=np.float64)[np.asarray(levels)]
+
+        passed = quality >= 3
+        repetitions = np.where(passed, repetitions + 1, 0)
+        interval = np.select(
+            [~passed, repetitions == 1, repetitions == 2],
+            [0.0, 1.0, 6.0],
+            default=np.floor(interval * ease + 0.5),
+        )
+        ease = np.maximum(self.MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        interval = np.minimum(interval, MAX_INTERVAL_DAYS)
+        return interval, {"ease": ease, "interval_days": interval, "repetitions": repetitions.astype(np.int64)}
+
+
+def _column(states, field, count, default):
+    """Coluna float do estado, trocando None/ausente pelo valor padrão."""
+    values = states.get(field)
+    if values is None:
+        return np.full(count, default, dtype=np.float64)
+    return np.array([default if v is None else v for v in values], dtype=np.float64)
+
+
+def _scalar_batch(scheduler, states, levels):
+    """Fallback sem NumPy: aplica `review` carta a carta e devolve listas."""
+    fields = list(states)
+    days, new_state = [], {field: [] for field in scheduler.state_fields}
+    for i, level in enumerate(levels):
+        d, s = scheduler.review({field: states[field][i] for field in fields}, level)
+        days.append(d)
+        for field, value in s.items():
+            new_state[field].append(value)
+    return days, new_state
+
+
+SCHEDULERS = {
+    DoublingScheduler.name: DoublingScheduler(),
+    SM2Scheduler.name: SM2Scheduler(),
+}
+
+
+def get_scheduler(name=None):
+    """Scheduler pelo nome ou, sem nome, o configurado em `SCHEDULER_ALGORITHM`."""
+    if name is None:
+        name = current_app.config.get("SCHEDULER_ALGORITHM") if has_app_context() else None
+    return SCHEDULERS.get(name or DoublingScheduler.name, SCHEDULERS[DoublingScheduler.name])
@@ -0,0 +1,51 @@
+"""Provider JSON da aplicação (`app.json`) com suporte nativo aos tipos do BSON.
+
+Serializa `ObjectId` (como string), `datetime` (mesmo formato HTTP date do
+provider padrão do Flask) e `Decimal128` diretamente, então os `to_dict` dos
+models podem devolver os valores crus do MongoDB. Usa o `orjson` quando ele
+estiver instalado e cai para o `json` da stdlib caso contrário.
+"""
+
+import decimal
+from datetime import date, datetime
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+class MongoJSONProvider(DefaultJSONProvider):
+    """`DefaultJSONProvider` que entende ObjectId/Decimal128 e usa orjson se disponível."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        if isinstance(o, Decimal128):
+            return str(o.to_decimal())
+        if isinstance(o, (date, datetime)):
+            return http_date(o)
+        if isinstance(o, decimal.Decimal):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs.get("cls") is not None:
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode("utf-8")
+        except orjson.JSONEncodeError:
+            # Ex.: inteiros acima de 64 bits, que só a stdlib aceita
+            return super().dumps(obj, **kwargs)
@@ -0,0 +1,78 @@
+"""Respostas JSON em streaming para listagens grandes (exportações de admin).
+
+Os itens são lidos de um iterável (normalmente um cursor do PyMongo) e
+serializados um a um pelo `app.json` (que já trata ObjectId/datetime), então
+o worker mantém em memória apenas o bloco que está sendo enviado, e não a
+lista inteira e as suas cópias serializadas.
+"""
+
+from flask import Response, current_app, request, stream_with_context
+
+
+# Tamanho aproximado (em caracteres) de cada bloco escrito na resposta
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def wants_stream(args=None):
+    """Indica se o cliente pediu a resposta em streaming (`?stream=true`)."""
+    args = request.args if args is None else args
+    return args.get("stream", "false").lower() == "true"
+
+
+def _dumps(obj):
+    return current_app.json.dumps(obj, separators=(",", ":"))
+
+
+def iter_json_array(items, chunk_size=STREAM_CHUNK_SIZE):
+    """Gera um array JSON em blocos de ~`chunk_size` caracteres a partir de `items`."""
+    buffer = ["["]
+    size = 1
+    first = True
+    for item in items:
+        encoded = _dumps(item)
+        if not first:
+            buffer.append(",")
+            size += 1
+        buffer.append(encoded)
+        size += len(encoded)
+        first = False
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    buffer.append("]")
+    yield "".join(buffer)
+
+
+def iter_json_object(items_key, items, extra=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Gera `{"<items_key>": [...], **extra}` com o array em streaming."""
+    yield "{" + _dumps(items_key) + ":"
+    yield from iter_json_array(items, chunk_size)
+    for key, value in (extra or {}).items():
+        yield "," + _dumps(key) + ":" + _dumps(value)
+    yield "}"
+
+
+def stream_json(chunks, status=200):
+    """Embrulha um gerador de blocos JSON em uma resposta do Flask em streaming."""
+    return Response(
+        stream_with_context(chunks),
+        status=status,
+        mimetype="application/json",
+    )
+
+
+def sse_event(data, event=None):
+    """Formata um evento server-sent (`text/event-stream`) com `data` em JSON."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {_dumps(data)}\n\n"
+
+
+def stream_sse(events, status=200):
+    """Resposta `text/event-stream` a partir de um gerador de eventos já formatados."""
+    return Response(
+        stream_with_context(events),
+        status=status,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
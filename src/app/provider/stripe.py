@@ -8,8 +8,8 @@ endpoint_secret=Config.STRIPE_WHSEC
 
 class Stripe:
     @staticmethod
-    def create_customer(email):
-        customer = stripe.Customer.create(email=email)
+    def create_customer(email, idempotency_key=None):
+        customer = stripe.Customer.create(email=email, idempotency_key=idempotency_key)
         return customer
     
     
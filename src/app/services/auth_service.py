@@ -9,6 +9,7 @@ from src.app import mail
 from src.app.models.user_model import UserModel
 from src.app.models.classroom_model import ClassroomModel
 from src.app.models.push_notification_model import PushNotificationModel
+from src.app.services.job_queue_service import JobQueueService
 from src.app.config import Config
 
 
@@ -26,6 +27,9 @@ class AuthService:
 
         user = UserModel.find_by_email(email)
         if user:
+            # Cliente no Stripe é criado em background (PaymentService cria sob demanda se faltar)
+            JobQueueService.enqueue(JobQueueService.CREATE_STRIPE_CUSTOMER, {"user_id": str(user._id)})
+
             # Se houver código de convite, processa o convite
             if invite_code:
                 from src.app.models.invite_model import InviteModel
@@ -48,7 +52,7 @@ class AuthService:
                 current_app.config["SECRET_KEY"],
                 algorithm="HS256",
             )
-            AuthService.send_confirm_email(email, UserModel.generate_code(email))
+            AuthService.queue_confirm_email(email, UserModel.generate_code(email))
             return jsonify({"message": "User created successfully", "token": token}), 201
 
         return BadRequest(description="An error has occurred!")
@@ -61,7 +65,7 @@ class AuthService:
             is_confirmed = UserModel.verify_is_confirmed(user.email)
             
             if not is_confirmed:
-                AuthService.send_confirm_email(email, UserModel.generate_code(email))
+                AuthService.queue_confirm_email(email, UserModel.generate_code(email))
             expiration = timedelta(hours=72 if is_confirmed else 0.25)
 
             token = jwt.encode(
@@ -132,6 +136,11 @@ class AuthService:
 
         return None
 
+    @staticmethod
+    def queue_confirm_email(email, code):
+        """Enfileira o envio do email de confirmação (executado pelo worker de jobs)."""
+        JobQueueService.enqueue(JobQueueService.SEND_CONFIRM_EMAIL, {"email": email, "code": code})
+
     @staticmethod
     def send_confirm_email(email, code):
         """Sends a confirmation email with a verification code."""
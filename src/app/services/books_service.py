@@ -8,6 +8,7 @@ from src.app.models.collection_model import CollectionModel
 from src.app.models.deck_model import DeckModel
 from src.app.models.user_model import UserModel
 from src.app.models.user_progress_model import UserProgressModel
+from src.app.provider.cache import response_cache
 from src.app.services.user_streak_service import UserStreakService
 
 
@@ -33,6 +34,7 @@ class BookService:
                 name=chapter_title,
                 collection_id=collection_id,
                 image=capa,
+                lazy_progress=True,
             )
             deck_id = deck.save_to_db()
             chapter_data = {
@@ -62,7 +64,9 @@ class BookService:
             collection_id=collection_id,
             created_by=admin_id,
         )
-        return book.save_to_db()
+        result = book.save_to_db()
+        response_cache.invalidate("books", "collections", "decks")
+        return result
 
     @staticmethod
     def update_book(book_id, data):
@@ -107,6 +111,7 @@ class BookService:
                 name=chapter_title,
                 collection_id=collection_id,
                 image=capa,
+                lazy_progress=True,
             )
             deck_id = deck.save_to_db()
             chapter_data = {
@@ -137,12 +142,19 @@ class BookService:
             collection_id=collection_id,
             created_at=book.get("created_at"),
         )
-        return book_obj.update_to_db()
+        updated = book_obj.update_to_db()
+        response_cache.invalidate("books", "collections", "decks")
+        return updated
 
     @staticmethod
-    def get_all_books():
-        """Retorna todos os livros."""
-        return BookModel.get_all()
+    def get_all_books(limit=None, cursor=None):
+        """Retorna uma página de livros e o cursor da próxima."""
+        return BookModel.get_all(limit=limit, cursor=cursor)
+
+    @staticmethod
+    def iter_all_books():
+        """Itera sobre todos os livros (para respostas em streaming)."""
+        return BookModel.iter_all()
 
     @staticmethod
     def get_available_books(user_id):
@@ -173,6 +185,22 @@ class BookService:
         read_ordens = set(user_book.get("read_chapters_ordem", [])) if user_book else set()
 
         chapters = book.get("chapters", [])
+        chapter_deck_ids = [ch.get("deck_id") for ch in chapters if ch.get("deck_id")]
+        card_counts = DeckModel.get_card_counts(chapter_deck_ids)
+
+        # Decks dos capítulos que o usuário já salvou (uma consulta para todos)
+        user = mongo.db.users.find_one({"_id": user_obj_id}, {"collections": 1})
+        saved_deck_ids = set()
+        if user and chapter_deck_ids:
+            saved_collections = mongo.db.collections.find(
+                {
+                    "_id": {"$in": user.get("collections", [])},
+                    "decks": {"$in": [ObjectId(d) for d in chapter_deck_ids]},
+                },
+                {"decks": 1},
+            )
+            saved_deck_ids = {str(d) for c in saved_collections for d in c.get("decks", [])}
+
         enriched = []
         # Usa índice (1-based) como referência estável de capítulo para progresso,
         # inclusive para livros antigos que não têm campo "ordem".
@@ -191,12 +219,8 @@ class BookService:
                     }
                 )
                 continue
-            deck = DeckModel.get_by_id(deck_id)
-            cards_count = len(deck.get("cards", [])) if deck else 0
-            has_cards = cards_count > 0
-            user_has_saved = (
-                DeckModel.check_if_the_user_has_the_deck(user_id, deck_id).get("user_has_deck") == "true"
-            )
+            has_cards = card_counts.get(ObjectId(deck_id), 0) > 0
+            user_has_saved = str(deck_id) in saved_deck_ids
             enriched.append(
                 {
                     **ch,
@@ -234,6 +258,7 @@ class BookService:
                 name=chapter_title,
                 collection_id=collection_id,
                 image=capa,
+                lazy_progress=True,
             )
             deck_id = deck.save_to_db()
             chapter_data = dict(ch)
@@ -264,6 +289,7 @@ class BookService:
             created_at=book.get("created_at"),
         )
         book_obj.update_to_db()
+        response_cache.invalidate("books", "collections", "decks")
         return {"collection_id": collection_id, "message": "Collection and decks generated"}
 
     @staticmethod
@@ -279,6 +305,7 @@ class BookService:
             name=title or "Chapter",
             collection_id=collection_id,
             image=book.get("capa"),
+            lazy_progress=True,
         )
         deck_id = deck.save_to_db()
         chapters = list(book.get("chapters", []))
@@ -303,6 +330,7 @@ class BookService:
             created_at=book.get("created_at"),
         )
         book_obj.update_to_db()
+        response_cache.invalidate("books", "collections", "decks")
         return {"deck_id": deck_id, "chapter": chapters[-1]}
 
     @staticmethod
@@ -314,6 +342,7 @@ class BookService:
         for ch in book.get("chapters", []):
             if ch.get("deck_id") == deck_id:
                 DeckModel.add_cards_to_deck(deck_id, card_ids)
+                response_cache.invalidate("decks", "collections")
                 return True
         return False
 
@@ -346,21 +375,24 @@ class BookService:
 
         CollectionModel.add_decks_to_collection(collection_id, [deck_id])
         # Se a collection foi criada agora, save_to_db já a adicionou ao user
+        response_cache.invalidate("collections")
 
-        for card_id in deck.get("cards", []):
-            UserProgressModel.create_or_update(user_id, deck_id, str(card_id))
+        progress = UserProgressModel.seed_progress([user_id], {deck_id: deck.get("cards", [])})
 
-        return {"message": "Chapter cards saved", "collection_id": collection_id}
+        return {"message": "Chapter cards saved", "collection_id": collection_id, "progress": progress}
 
     @staticmethod
     def delete_book(book_id):
         """Deleta um livro."""
-        return BookModel.delete_book(book_id)
+        deleted = BookModel.delete_book(book_id)
+        response_cache.invalidate("books", "collections", "decks")
+        return deleted
 
     @staticmethod
     def add_book_to_user(user_id, book_id):
         """Adiciona um livro à biblioteca do usuário."""
         BookModel.add_book_to_user(user_id, book_id)
+        response_cache.invalidate(f"user_books:{user_id}")
 
     @staticmethod
     def mark_chapter_read(user_id, book_id, chapter_ordem: int, read: bool = True):
@@ -397,6 +429,7 @@ class BookService:
                 "read_chapters_ordem": [],
             }
             mongo.db.user_books.insert_one(user_book)
+            response_cache.invalidate(f"user_books:{user_id}")
 
         # Atualiza lista de capítulos lidos
         update_query = {}
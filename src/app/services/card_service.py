@@ -3,8 +3,9 @@ from src.app.models.deck_model import DeckModel
 from datetime import datetime, timezone
 from bson import ObjectId
 from src.app import mongo
+from src.app.provider.cache import response_cache
 
-from src.app.services.notification_service import NotificationService
+from src.app.services.job_queue_service import JobQueueService
 
 
 class CardService:
@@ -21,10 +22,14 @@ class CardService:
         )
         card.save_to_db()
         card_dict = card.to_dict()
+        if deck_id:
+            response_cache.invalidate("decks", "collections")
 
-        # notifica alunos de classrooms vinculadas a este deck
+        # notifica alunos de classrooms vinculadas a este deck (em background)
         if deck_id:
-            NotificationService.notify_students_new_cards(deck_id=str(deck_id), amount=1)
+            JobQueueService.enqueue(
+                JobQueueService.NOTIFY_STUDENTS_NEW_CARDS, {"deck_id": str(deck_id), "amount": 1}
+            )
 
         return card_dict
 
@@ -37,10 +42,13 @@ class CardService:
     @staticmethod
     def create_card_in_lots(name, image, cards):
         deck_id = CardModel.create_card_in_lots(name, image, cards)
+        response_cache.invalidate("decks", "collections")
 
-        # notifica alunos que há novas cartas neste deck
+        # notifica alunos que há novas cartas neste deck (em background)
         if deck_id and isinstance(deck_id, str):
-            NotificationService.notify_students_new_cards(deck_id=deck_id, amount=len(cards))
+            JobQueueService.enqueue(
+                JobQueueService.NOTIFY_STUDENTS_NEW_CARDS, {"deck_id": deck_id, "amount": len(cards)}
+            )
 
         return "ok"
     
@@ -51,10 +59,15 @@ class CardService:
         return CardModel.get_cards_by_deck(deck_id)
 
     @staticmethod
-    def get_all_cards():
-        """Retorna todos os cards como uma lista de dicionários."""
-        cards = CardModel.get_all_cards()
-        return [card.to_dict() for card in cards]
+    def get_all_cards(limit=None, cursor=None):
+        """Retorna uma página de cards (lista de dicionários) e o cursor da próxima."""
+        cards, next_cursor = CardModel.get_all_cards(limit=limit, cursor=cursor)
+        return [card.to_dict() for card in cards], next_cursor
+
+    @staticmethod
+    def iter_all_cards():
+        """Itera sobre todos os cards como dicionários (para respostas em streaming)."""
+        return (card.to_dict() for card in CardModel.iter_all_cards())
 
     @staticmethod
     def update_card(card_id, data):
@@ -82,6 +95,7 @@ class CardService:
         if isinstance(card, dict):
             card = CardModel(**card)
         card.delete_from_db()
+        response_cache.invalidate("decks", "collections")
         return True
 
     @staticmethod
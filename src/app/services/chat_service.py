@@ -1,24 +1,94 @@
-from src.app.models.chat_model import ChatModel
+from bson import ObjectId
 from flask import current_app
-from datetime import datetime, timezone
-import google.generativeai as genai
-from src.app.config import Config
-import json
-import re
+from src.app.models.chat_model import ChatModel
+from src.app.models.generation_cache_model import GenerationCacheModel
+from src.app.provider.card_parser import CardStreamParser, parse_cards
+from src.app.provider.llm import llm
+from src.app.services.job_queue_service import JobQueueService
+from functools import lru_cache
 
 
-genai.configure(api_key=Config.GENAI_API_KEY)
+class ChatService:
+    # Mensagens fora da janela recente acumuladas antes de atualizar o resumo
+    SUMMARY_BATCH = 10
 
+    # Tipos de geração no cache de respostas do LLM
+    CACHE_KIND_CHAT_CARDS = "chat_cards"
+    CACHE_KIND_SUBJECT_CARDS = "subject_cards"
 
-class ChatService:
     @staticmethod
-    def chat(user_id, id,  history, settings, message):
+    def _cache_lookup(kind, prompt):
+        """Retorna `(key, texto em cache ou None)`; key é None com o cache desligado."""
+        if not current_app.config.get("GENERATION_CACHE_TTL", 0):
+            return None, None
+        key = GenerationCacheModel.make_key(kind, prompt, llm.cache_namespace)
+        text = GenerationCacheModel.get(key)
+        GenerationCacheModel.record(kind, hit=text is not None)
+        return key, text
 
-        
-        conversation_language = settings.get("language_conversation", "en")  
-        explanation_language = settings.get("explanation_language", conversation_language)
-        
+    @staticmethod
+    def _cache_store(key, kind, text, partial):
+        # Respostas truncadas/reparadas não entram no cache
+        if key and not partial:
+            GenerationCacheModel.put(key, kind, text, current_app.config["GENERATION_CACHE_TTL"])
+
+    @staticmethod
+    def _parse_cards(text):
+        data, partial = parse_cards(text)
+        if partial and not data["cards"]:
+            raise ValueError("Resposta do modelo sem cartas válidas")
+        return data, partial
+
+    @staticmethod
+    def _generate_json(kind, prompt):
+        """Gera (ou busca no cache) o JSON de cartas do LLM para o prompt.
+
+        O cache é endereçado pelo hash do prompt normalizado. A resposta passa
+        pelo `CardStreamParser`, que tolera texto extra e truncamento.
+
+        Returns:
+            tuple: (dados, parcial)
+        """
+        key, text = ChatService._cache_lookup(kind, prompt)
+        cached = text is not None
+        if not cached:
+            text = llm.generate(prompt)
+
+        data, partial = ChatService._parse_cards(text)
+        if not cached:
+            ChatService._cache_store(key, kind, text, partial)
+        return data, partial
+
+    @staticmethod
+    def _stream_json(kind, prompt):
+        """Versão em streaming de `_generate_json`: eventos `card` conforme cada carta
+        fica completa e `done` com `{"flashcards", "partial"}` no final.
+
+        A chamada ao LLM (e o LLMBusyError) acontece antes do primeiro evento.
+        """
+        key, cached_text = ChatService._cache_lookup(kind, prompt)
+        chunks = [cached_text] if cached_text is not None else llm.stream_generate(prompt)
+
+        def events():
+            parser = CardStreamParser()
+            parts = []
+            for text in chunks:
+                parts.append(text)
+                for card in parser.feed(text):
+                    yield "card", card
+
+            text = "".join(parts)
+            data, partial = ChatService._parse_cards(text)
+            if cached_text is None:
+                ChatService._cache_store(key, kind, text, partial)
+            yield "done", {"flashcards": data, "partial": partial}
 
+        return events()
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _tutor_prompt(conversation_language, explanation_language):
+        """System prompt do tutor (um por par de idiomas, reaproveitado entre requisições)."""
         pre_prompt_template = """
             You are a friendly and engaging language tutor in Memobelc, a spaced repetition language learning app. Your goal is to teach through short and dynamic conversations, which will be converted into flashcards.
             Keep responses short, fun, and encouraging, avoiding long texts.
@@ -51,42 +121,149 @@ class ChatService:
             Keep the conversation engaging and dynamic, making it feel like a natural learning experience.
             """
 
-        pre_prompt = pre_prompt_template.format(
+        return pre_prompt_template.format(
             conversation_language=conversation_language,
             explanation_language=explanation_language,
         )
 
+    @staticmethod
+    def _system_instruction(settings):
+        conversation_language = settings.get("language_conversation", "en")
+        explanation_language = settings.get("explanation_language", conversation_language)
+        return ChatService._tutor_prompt(conversation_language, explanation_language)
+
+    @staticmethod
+    def _context_history(context):
+        """Histórico enviado ao modelo: o resumo (se houver) seguido da janela recente."""
+        history = []
+        if context.get("summary"):
+            history.append({"role": "user", "parts": [{"text": f"Summary of our conversation so far: {context['summary']}"}]})
+            history.append({"role": "model", "parts": [{"text": "Got it, let's continue."}]})
+        return history + list(context.get("recent", []))
 
-        model = genai.GenerativeModel(Config.GENAI_MODEL, system_instruction=pre_prompt)
+    @staticmethod
+    def _model_history(id, history):
+        """Chats existentes usam o contexto salvo (tamanho constante), não o histórico do cliente."""
+        if id:
+            context = ChatModel.get_context(id)
+            if context is not None:
+                return ChatService._context_history(context)
+        return history
 
-        chat = model.start_chat(history=history)
-        response = chat.send_message(message)
-        reply = response.text if response else "Erro ao gerar resposta."
-        
+    @staticmethod
+    def _save_exchange(user_id, id, history, settings, message, reply):
+        """Persiste a troca de mensagens e retorna o id do chat."""
         if not id:
             chat = ChatModel(user_id=user_id, settings=settings, history=history)
             chat_id = chat.save_to_db()
-            chat.add_message(chat_id=chat_id, role='model', message=response.text)
-            return {"reply": reply, "chat_id": chat_id}
-            
-        else:
-            ChatModel.add_message(chat_id=id, role='user', message=message)
-            ChatModel.add_message(chat_id=id, role='model', message=response.text)
-            
-
-            return {"reply": reply, "chat_id": id}
+            chat.add_message(chat_id=chat_id, role='model', message=reply)
+            return chat_id
+
+        counts = ChatModel.append_messages(
+            id, [ChatModel._message('user', message), ChatModel._message('model', reply)]
+        )
+        if counts and ChatService._pending_summary(counts) >= ChatService.SUMMARY_BATCH:
+            JobQueueService.enqueue(JobQueueService.SUMMARIZE_CHAT, {"chat_id": str(id)})
+        return id
+
+    @staticmethod
+    def _pending_summary(counts):
+        """Mensagens que já saíram da janela recente e ainda não entraram no resumo."""
+        return counts["message_count"] - ChatModel.RECENT_WINDOW - counts["summarized_count"]
+
+    @staticmethod
+    def summarize_chat(chat_id):
+        """Incorpora ao resumo as mensagens que saíram da janela recente.
+
+        Returns:
+            bool: True se o resumo foi atualizado.
+        """
+        context = ChatModel.get_context(chat_id)
+        if not context or ChatService._pending_summary(context) <= 0:
+            return False
+
+        start = context["summarized_count"]
+        end = context["message_count"] - ChatModel.RECENT_WINDOW
+        turns = "\n".join(
+            f"{m.get('role')}: {' '.join(part.get('text', '') for part in m.get('parts', []))}"
+            for m in ChatModel.get_messages(chat_id, start=start, end=end)
+        )
+        prompt = (
+            "Update the summary of a language-learning conversation between a tutor (model) and a student (user). "
+            "Keep the topics covered, vocabulary taught, recurring mistakes and the student's details. "
+            "Answer only with the new summary, in at most 150 words.\n\n"
+            f"Current summary:\n{context.get('summary') or '(empty)'}\n\n"
+            f"New messages:\n{turns}"
+        )
+        summary = llm.generate(prompt).strip()
+        return ChatModel.set_summary(chat_id, summary, end, start)
+
+    @staticmethod
+    def _can_use_chat(user_id, id):
+        """Sem id é um chat novo; com id, o chat precisa ser do usuário."""
+        return not id or (ObjectId.is_valid(str(id)) and ChatModel.belongs_to(id, user_id))
+
+    @staticmethod
+    def chat(user_id, id,  history, settings, message):
+        """Responde a mensagem. Retorna None se `id` não for um chat do usuário."""
+        if not ChatService._can_use_chat(user_id, id):
+            return None
+        history = ChatService._model_history(id, history)
+        reply = llm.chat(history, message, system_instruction=ChatService._system_instruction(settings))
+        reply = reply or "Erro ao gerar resposta."
+
+        chat_id = ChatService._save_exchange(user_id, id, history, settings, message, reply)
+        return {"reply": reply, "chat_id": chat_id}
+
+    @staticmethod
+    def stream_chat(user_id, id, history, settings, message):
+        """Versão em streaming de `chat`: gera eventos `chunk` e, ao final, `done`.
+
+        Cada evento é uma tupla `(nome, dados)`. A chamada ao modelo é feita no
+        pool do LLM; o chat só é persistido depois da resposta completa.
+        Retorna None se `id` não for um chat do usuário.
+        """
+        if not ChatService._can_use_chat(user_id, id):
+            return None
+        # Chamado fora do gerador para que LLMBusyError aconteça antes da resposta começar
+        chunks = llm.stream_chat(ChatService._model_history(id, history), message, system_instruction=ChatService._system_instruction(settings))
+
+        def events():
+            parts = []
+            for text in chunks:
+                parts.append(text)
+                yield "chunk", {"text": text}
+
+            reply = "".join(parts) or "Erro ao gerar resposta."
+            chat_id = ChatService._save_exchange(user_id, id, history, settings, message, reply)
+            yield "done", {"reply": reply, "chat_id": chat_id}
+
+        return events()
         
     @staticmethod
-    def get_chats_by_user_id(user_id):
-        result = ChatModel.get_by_user_id(user_id)
+    def get_chats_by_user_id(user_id, limit=None, cursor=None):
+        result, next_cursor = ChatModel.get_by_user_id(user_id, limit=limit, cursor=cursor)
         
-        return {"chats": result}
+        return {"chats": result, "next_cursor": next_cursor}
+
+    @staticmethod
+    def iter_chats_by_user_id(user_id):
+        return ChatModel.iter_by_user_id(user_id)
+
+    @staticmethod
+    def get_chat_messages(user_id, chat_id, limit=None, cursor=None):
+        """Histórico completo do chat, paginado por `seq`. Retorna None se o chat não for do usuário."""
+        if not ChatModel.belongs_to(chat_id, user_id):
+            return None
+        ChatModel.get_context(chat_id)  # migra chats antigos antes de listar
+        messages, next_cursor = ChatModel.get_messages_page(chat_id, limit=limit, cursor=cursor)
+        return {"messages": messages, "next_cursor": next_cursor}
         
         
     @staticmethod   
     def generate_card(chat_id, settings):
-        chat = ChatModel.get_by_id(chat_id=chat_id)
-        if not chat:
+        context = ChatModel.get_context(chat_id)
+        if not context:
             return None
         settings = settings or {}
         settings_collection_id = settings.get("collection_id", None)
@@ -118,7 +295,7 @@ class ChatService:
         conversation list:
         {history}
         """
-        history = chat['history']
+        history = ChatService._context_history(context)
 
 
         pre_prompt = pre_prompt_template.format(
@@ -130,19 +307,11 @@ class ChatService:
 
 
 
-        model = genai.GenerativeModel(Config.GENAI_MODEL)
-        response = model.generate_content(pre_prompt)
-        
-        json_str = re.sub(r'^```json|```$', '', response.text.strip(), flags=re.MULTILINE).strip()
-
-        
-        data = json.loads(json_str)
-        return {"flashcards": data}
+        data, partial = ChatService._generate_json(ChatService.CACHE_KIND_CHAT_CARDS, pre_prompt)
+        return {"flashcards": data, "partial": partial}
     
     @staticmethod
-    def generate_cards_by_subject(subject, amount, language_front, language_back, deck_id=None, deck_name=None, format=None):
-        print(subject, amount, deck_id, deck_name, language_front, language_back, format)
-        
+    def _subject_prompt(subject, amount, language_front, language_back, format=None):
         pre_prompt_template = """
         You must create a set of flashcards with {amount} cards, based on {subject}, {format}.
         
@@ -162,19 +331,24 @@ class ChatService:
         
         pre_prompt = pre_prompt_template.format(
             amount=amount, 
-            subject=subject,
-            language_front=language_front,
-            language_back=language_back,
-            format=format
+            subject=str(subject).strip(),
+            language_front=str(language_front).strip(),
+            language_back=str(language_back).strip(),
+            format=str(format).strip() if format is not None else None
         )
         
-        model = genai.GenerativeModel(Config.GENAI_MODEL)
-        response = model.generate_content(pre_prompt)
-        
-        json_str = re.sub(r'^```json|```$', '', response.text.strip(), flags=re.MULTILINE).strip()
+        return pre_prompt
 
-        
-        data = json.loads(json_str)
-        return {"flashcards": data}
+    @staticmethod
+    def generate_cards_by_subject(subject, amount, language_front, language_back, deck_id=None, deck_name=None, format=None):
+        print(subject, amount, deck_id, deck_name, language_front, language_back, format)
 
-        
+        pre_prompt = ChatService._subject_prompt(subject, amount, language_front, language_back, format)
+        data, partial = ChatService._generate_json(ChatService.CACHE_KIND_SUBJECT_CARDS, pre_prompt)
+        return {"flashcards": data, "partial": partial}
+
+    @staticmethod
+    def stream_cards_by_subject(subject, amount, language_front, language_back, format=None):
+        """Como `generate_cards_by_subject`, mas gera as cartas em eventos conforme o modelo responde."""
+        pre_prompt = ChatService._subject_prompt(subject, amount, language_front, language_back, format)
+        return ChatService._stream_json(ChatService.CACHE_KIND_SUBJECT_CARDS, pre_prompt)
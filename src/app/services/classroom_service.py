@@ -1,7 +1,8 @@
 from src.app.models.classroom_model import ClassroomModel
 from src.app.models.collection_model import CollectionModel
 from src.app.models.user_model import UserModel
-from src.app.services.notification_service import NotificationService
+from src.app.provider.cache import response_cache
+from src.app.services.job_queue_service import JobQueueService
 
 class ClassroomService:
     
@@ -12,6 +13,7 @@ class ClassroomService:
         result = classrooms.save_to_db()
         
         CollectionModel.add_classroom(result.get('class_id'), classrooms.collection)
+        response_cache.invalidate("collections")
         return result
     
     @staticmethod
@@ -25,9 +27,10 @@ class ClassroomService:
         
         if user:
             ClassroomModel.add_students(classroom_id, user._id)
-            # notifica o usuário que foi adicionado à classroom
-            NotificationService.notify_user_added_to_classroom(
-                classroom_id=classroom_id, user_id=str(user._id)
+            # notifica o usuário que foi adicionado à classroom (em background)
+            JobQueueService.enqueue(
+                JobQueueService.NOTIFY_USER_ADDED_TO_CLASSROOM,
+                {"classroom_id": classroom_id, "user_id": str(user._id)},
             )
             
         else:
@@ -6,6 +6,9 @@ from src.app.models.collection_model import CollectionModel
 from src.app.models.deck_model import DeckModel
 from src.app.models.card_model import CardModel
 from src.app.models.classroom_model import ClassroomModel
+from src.app.models.deck_subscriber_model import DeckSubscriberModel
+from src.app.models.pending_rollup_model import PendingRollupModel
+from src.app.provider.cache import response_cache
 
 
 class CollectionService:
@@ -14,6 +17,7 @@ class CollectionService:
         """Cria um novo mastdeck e o salva no banco de dados"""
         deck = CollectionModel(name=name, image=image, user=user)
         result = deck.save_to_db()
+        response_cache.invalidate("collections")
         return result
 
     @staticmethod
@@ -30,17 +34,21 @@ class CollectionService:
         )
 
     @staticmethod
-    def get_all_collections():
-        return CollectionModel.get_all_collections()
+    def get_all_collections(limit=None, cursor=None):
+        return CollectionModel.get_all_collections(limit=limit, cursor=cursor)
 
     @staticmethod
     def add_decks_to_collection(collection_id, deck_ids):
-        return CollectionModel.add_decks_to_collection(collection_id, deck_ids)
+        result = CollectionModel.add_decks_to_collection(collection_id, deck_ids)
+        response_cache.invalidate("collections")
+        return result
     
     @staticmethod
     def update_collection(collection_id, name=None, image=None):
         """Atualiza os dados de uma collection"""
-        return CollectionModel.update_collection(collection_id, name=name, image=image)
+        result = CollectionModel.update_collection(collection_id, name=name, image=image)
+        response_cache.invalidate("collections")
+        return result
 
     @staticmethod
     def delete_collection(collection_id):
@@ -91,11 +99,8 @@ class CollectionService:
                 decks_to_delete.append(deck_obj_id)
         
         # 2. Para cada deck a ser deletado, identificar cards que pertencem APENAS a ele
-        for deck_id in decks_to_delete:
-            deck = DeckModel.get_by_id(str(deck_id))
-            if not deck:
-                continue
-            
+        for deck in DeckModel.get_many(decks_to_delete):
+            deck_id = deck["_id"]
             card_ids = deck.get("cards", [])
             for card_id in card_ids:
                 card_obj_id = ObjectId(card_id) if not isinstance(card_id, ObjectId) else card_id
@@ -109,7 +114,12 @@ class CollectionService:
                 if decks_with_card == 1:
                     cards_to_delete.append((str(deck_id), card_obj_id))
         
-        # 3. Deletar user_progress dos cards que serão deletados
+        # 3. Deletar user_progress dos cards que serão deletados (descontando do rollup de pendentes)
+        cards_by_deck = {}
+        for deck_id_str, card_obj_id in cards_to_delete:
+            cards_by_deck.setdefault(ObjectId(deck_id_str), []).append(card_obj_id)
+        for deck_obj_id, card_obj_ids in cards_by_deck.items():
+            PendingRollupModel.remove_progress({"deck_id": deck_obj_id, "card_id": {"$in": card_obj_ids}})
         for deck_id_str, card_obj_id in cards_to_delete:
             mongo.db.user_progress.delete_many({
                 "deck_id": ObjectId(deck_id_str),
@@ -125,6 +135,7 @@ class CollectionService:
             mongo.db.decks.delete_one({"_id": deck_id})
 
         # 6. Remover a collection da lista de collections de todos os usuários
+        DeckSubscriberModel.remove_collection(collection_obj_id)
         mongo.db.users.update_many(
             {"collections": collection_obj_id},
             {"$pull": {"collections": collection_obj_id}}
@@ -132,5 +143,6 @@ class CollectionService:
         
         # 7. Deletar a collection
         result = mongo.db.collections.delete_one({"_id": collection_obj_id})
+        response_cache.invalidate("collections", "decks")
         
         return result.deleted_count > 0
@@ -3,6 +3,7 @@
 from src.app.models.deck_model import DeckModel
 from src.app.models.card_model import CardModel
 from src.app.models.user_progress_model import UserProgressModel
+from src.app.provider.cache import response_cache
 
 
 class DeckService:
@@ -24,16 +25,15 @@ class DeckService:
 
             users = CardModel.get_user_by_deck(deck_id)
 
-            for user_id in users:
-                for card_id in card_ids:
-                    UserProgressModel.create_or_update(user_id, deck_id, card_id)
+            UserProgressModel.seed_progress(users, {deck_id: card_ids})
 
+        response_cache.invalidate("decks", "collections")
         return {"message": "Deck criado com sucesso", "deck_id": deck_id}
 
 
     @staticmethod
-    def get_all_decks():
-        return DeckModel.get_all_decks()
+    def get_all_decks(limit=None, cursor=None):
+        return DeckModel.get_all_decks(limit=limit, cursor=cursor)
 
     @staticmethod
     def get_decks_by_collection_id(collection_id, user_id):
@@ -45,7 +45,9 @@ class DeckService:
     def save_deck(user_id, deck_id, collection_id):
         """This method is responsible for save deck in user"""
     
-        return DeckModel.save_deck(user_id, deck_id, collection_id)
+        result = DeckModel.save_deck(user_id, deck_id, collection_id)
+        response_cache.invalidate("collections")
+        return result
     
     @staticmethod
     def check_if_the_user_has_the_deck(user_id, deck_id):
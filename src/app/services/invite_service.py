@@ -4,6 +4,7 @@ from src.app import mail
 from src.app.models.invite_model import InviteModel
 from src.app.models.user_model import UserModel
 from src.app.config import Config
+from src.app.database.pagination import InvalidCursor
 
 
 class InviteService:
@@ -97,11 +98,13 @@ class InviteService:
             return jsonify({"error": f"Erro ao gerar link: {str(e)}"}), 500
 
     @staticmethod
-    def get_user_invites(user_id):
-        """Retorna todos os convites feitos por um usuário"""
+    def get_user_invites(user_id, limit=None, cursor=None):
+        """Retorna uma página dos convites feitos por um usuário"""
         try:
-            invites = InviteModel.get_user_invites(user_id)
-            return jsonify({"invites": invites}), 200
+            invites, next_cursor = InviteModel.get_user_invites(user_id, limit=limit, cursor=cursor)
+            return jsonify({"invites": invites, "next_cursor": next_cursor}), 200
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             current_app.logger.error(f"Erro ao buscar convites: {str(e)}")
             return jsonify({"error": str(e)}), 500
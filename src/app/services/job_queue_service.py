@@ -0,0 +1,124 @@
+"""Fila de jobs em background para tirar efeitos colaterais lentos da thread da requisição."""
+
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+
+from src.app.models.job_model import JobModel
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueService:
+    """Enfileira e executa jobs registrados por nome.
+
+    Backends (config `JOB_QUEUE_BACKEND`):
+    - `mongo`: o job é gravado em `jobs` e executado por `flask jobs worker`;
+    - `inline`: substituto local (dev/testes), executa o handler na hora.
+    """
+
+    BACKEND_MONGO = "mongo"
+    BACKEND_INLINE = "inline"
+
+    # Jobs conhecidos (handlers em src/app/services/jobs.py)
+    SEND_CONFIRM_EMAIL = "send_confirm_email"
+    CREATE_STRIPE_CUSTOMER = "create_stripe_customer"
+    NOTIFY_STUDENTS_NEW_CARDS = "notify_students_new_cards"
+    NOTIFY_USER_ADDED_TO_CLASSROOM = "notify_user_added_to_classroom"
+    SEND_PUSH_BATCH = "send_push_batch"
+    SUMMARIZE_CHAT = "summarize_chat"
+
+    # Backoff: RETRY_BASE_SECONDS * 2^(tentativa - 1), limitado a RETRY_MAX_SECONDS
+    RETRY_BASE_SECONDS = 30
+    RETRY_MAX_SECONDS = 60 * 60
+
+    _handlers: Dict[str, Callable[..., Any]] = {}
+
+    @staticmethod
+    def handler(name: str):
+        """Decorator que registra a função que executa os jobs `name` (recebe o payload como kwargs)."""
+
+        def decorator(func):
+            JobQueueService._handlers[name] = func
+            return func
+
+        return decorator
+
+    @staticmethod
+    def enqueue(name: str, payload: Optional[Dict[str, Any]] = None, max_attempts: Optional[int] = None) -> Optional[str]:
+        """Enfileira um job. Retorna o id do job (None no backend inline)."""
+        if name not in JobQueueService._handlers:
+            raise ValueError(f"Job sem handler registrado: {name}")
+
+        config = current_app.config
+        if config.get("JOB_QUEUE_BACKEND", JobQueueService.BACKEND_MONGO) == JobQueueService.BACKEND_INLINE:
+            try:
+                JobQueueService._handlers[name](**(payload or {}))
+            except Exception:
+                logger.exception(f"Job inline '{name}' falhou")
+            return None
+
+        return JobModel.enqueue(
+            name,
+            payload,
+            max_attempts=max_attempts or config.get("JOB_MAX_ATTEMPTS", 5),
+        )
+
+    @staticmethod
+    def _backoff(attempts: int) -> timedelta:
+        seconds = JobQueueService.RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+        return timedelta(seconds=min(seconds, JobQueueService.RETRY_MAX_SECONDS))
+
+    @staticmethod
+    def process_next(worker_id: str) -> bool:
+        """Executa o próximo job disponível. Retorna False se a fila estiver vazia."""
+        job = JobModel.claim(worker_id, lock_timeout=current_app.config.get("JOB_LOCK_TIMEOUT", 300))
+        if not job:
+            return False
+
+        handler = JobQueueService._handlers.get(job["name"])
+        try:
+            if handler is None:
+                raise LookupError(f"Job sem handler registrado: {job['name']}")
+            handler(**job.get("payload", {}))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"
+            if job["attempts"] >= job.get("max_attempts", 1):
+                logger.error(f"Job {job['_id']} ({job['name']}) movido para a dead-letter: {e}")
+                saved = JobModel.dead_letter(job, error)
+            else:
+                run_at = datetime.now(timezone.utc) + JobQueueService._backoff(job["attempts"])
+                logger.warning(f"Job {job['_id']} ({job['name']}) falhou, nova tentativa em {run_at}: {e}")
+                saved = JobModel.retry(job["_id"], worker_id, error, run_at)
+        else:
+            saved = JobModel.complete(job["_id"], worker_id)
+
+        if not saved:
+            logger.warning(f"Job {job['_id']} ({job['name']}) foi reservado por outro worker; resultado descartado")
+        return True
+
+    @staticmethod
+    def run_worker(worker_id: Optional[str] = None, poll_interval: float = 1.0,
+                   max_jobs: Optional[int] = None, stop_when_empty: bool = False) -> int:
+        """Loop do worker: executa jobs até `max_jobs` (ou para sempre).
+
+        Returns:
+            int: Quantidade de jobs processados.
+        """
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            if JobQueueService.process_next(worker_id):
+                processed += 1
+                continue
+            if stop_when_empty:
+                break
+            time.sleep(poll_interval)
+        return processed
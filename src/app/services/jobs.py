@@ -0,0 +1,46 @@
+"""Handlers dos jobs em background.
+
+Importado no `create_app` (e, portanto, pelo worker `flask jobs worker`) para
+registrar os handlers no `JobQueueService`. Cada handler recebe o payload do
+job como argumentos nomeados e deve ser idempotente, já que pode rodar de novo
+em um retry.
+"""
+
+from src.app.models.user_model import UserModel
+from src.app.services.auth_service import AuthService
+from src.app.services.chat_service import ChatService
+from src.app.services.job_queue_service import JobQueueService
+from src.app.services.notification_service import NotificationService
+from src.app.services.push_notification_service import PushNotificationService
+
+
+@JobQueueService.handler(JobQueueService.SEND_CONFIRM_EMAIL)
+def send_confirm_email(email, code):
+    AuthService.send_confirm_email(email, code)
+
+
+@JobQueueService.handler(JobQueueService.CREATE_STRIPE_CUSTOMER)
+def create_stripe_customer(user_id):
+    UserModel.ensure_stripe_customer(user_id)
+
+
+@JobQueueService.handler(JobQueueService.NOTIFY_STUDENTS_NEW_CARDS)
+def notify_students_new_cards(deck_id, amount):
+    NotificationService.notify_students_new_cards(deck_id=deck_id, amount=amount)
+
+
+@JobQueueService.handler(JobQueueService.NOTIFY_USER_ADDED_TO_CLASSROOM)
+def notify_user_added_to_classroom(classroom_id, user_id):
+    NotificationService.notify_user_added_to_classroom(classroom_id=classroom_id, user_id=user_id)
+
+
+@JobQueueService.handler(JobQueueService.SEND_PUSH_BATCH)
+def send_push_batch(user_ids, title, body, data=None):
+    PushNotificationService.send_batch(
+        [{"user_id": user_id, "title": title, "body": body, "data": data} for user_id in user_ids]
+    )
+
+
+@JobQueueService.handler(JobQueueService.SUMMARIZE_CHAT)
+def summarize_chat(chat_id):
+    ChatService.summarize_chat(chat_id)
@@ -1,14 +1,18 @@
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional
 from bson import ObjectId
-from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, time, timezone
 
 from src.app import mongo
 from src.app.models.notification.notification_model import NotificationModel
+from src.app.models.job_checkpoint_model import JobCheckpointModel
 from src.app.models.user_model import UserModel
 from src.app.models.user_progress_model import UserProgressModel
 from src.app.models.classroom_model import ClassroomModel
 from src.app.models.deck_model import DeckModel
 from src.app.services.push_notification_service import PushNotificationService
+from src.app.services.job_queue_service import JobQueueService
 
 
 class NotificationService:
@@ -20,6 +24,11 @@ class NotificationService:
     TYPE_TEACHER_CUSTOM = "teacher_custom"
     TYPE_ADMIN_CUSTOM = "admin_custom"
 
+    # Usuários processados por lote no lembrete diário
+    DAILY_BATCH_SIZE = 1000
+    # Destinatários por insert_many / job de push nos broadcasts
+    BROADCAST_CHUNK_SIZE = 1000
+
     # ---------- Funções utilitárias ----------
     @staticmethod
     def _create_and_push(
@@ -36,8 +45,47 @@ class NotificationService:
         # Cria registro interno
         NotificationModel.create(user_id=user_id, notification_type=notification_type, data=data)
 
-        # Dispara push (se houver token cadastrado)
-        PushNotificationService.send_to_user(user_id=user_id, title=title, body=body, data=extra_data or {})
+        # Push (se houver token cadastrado) pelo job `send_push_batch`: os retries
+        # do Expo ficam no worker, nunca na thread da requisição
+        JobQueueService.enqueue(
+            JobQueueService.SEND_PUSH_BATCH,
+            {"user_ids": [user_id], "title": title, "body": body, "data": extra_data or {}},
+        )
+
+    @staticmethod
+    def broadcast(
+        user_ids: Iterable[str],
+        notification_type: str,
+        title: str,
+        body: str,
+        extra_data: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """Cria a mesma notificação para vários usuários e agenda os pushes em lote.
+
+        As notificações são gravadas com insert_many em blocos de
+        BROADCAST_CHUNK_SIZE e cada bloco vira um job `send_push_batch`, então a
+        requisição não espera pelo Expo. `user_ids` pode ser um gerador.
+
+        Returns:
+            int: Quantidade de destinatários.
+        """
+        data = {"title": title, "body": body}
+        if extra_data:
+            data.update(extra_data)
+
+        sent = 0
+        iterator = iter(user_ids)
+        while True:
+            chunk = [str(user_id) for user_id in islice(iterator, NotificationService.BROADCAST_CHUNK_SIZE)]
+            if not chunk:
+                break
+            NotificationModel.create_many(notification_type, [(user_id, data) for user_id in chunk])
+            JobQueueService.enqueue(
+                JobQueueService.SEND_PUSH_BATCH,
+                {"user_ids": chunk, "title": title, "body": body, "data": extra_data or {}},
+            )
+            sent += len(chunk)
+        return sent
 
     # ---------- API para controllers ----------
     @staticmethod
@@ -54,42 +102,129 @@ class NotificationService:
 
     # ---------- Casos de uso específicos ----------
     @staticmethod
-    def send_daily_study_notifications() -> Dict[str, Any]:
-        """Envia notificação diária de estudos para usuários com cartas pendentes."""
-        users_cursor = mongo.db.users.find({"is_confirmed": True})
-        notified_users: List[str] = []
+    def send_daily_study_notifications(
+        shard: int = 0,
+        shard_count: int = 1,
+        batch_size: int = DAILY_BATCH_SIZE,
+        resume: bool = True,
+    ) -> Dict[str, Any]:
+        """Envia notificação diária de estudos para usuários com cartas pendentes.
+
+        Pipeline em lotes de `batch_size` usuários:
+          1. uma agregação em user_progress com a contagem de pendentes por usuário;
+          2. filtro de usuários confirmados e dedupe contra as notificações de hoje;
+          3. insert_many das notificações;
+          4. envio dos pushes em lote.
+
+        O progresso fica em `job_checkpoints` (uma entrada por dia e shard), então
+        uma execução interrompida continua do último lote concluído. Com
+        `shard_count > 1`, cada processo trata uma faixa contígua de user_id
+        (`_shard_range`), filtrada já no `$match` das agregações.
+        """
+        if shard_count < 1 or not 0 <= shard < shard_count:
+            raise ValueError("shard must be in [0, shard_count)")
+
+        now = datetime.now(timezone.utc)
+        job_id = f"{NotificationService.TYPE_DAILY_STUDY}:{now.date().isoformat()}:{shard}/{shard_count}"
+        if not resume:
+            JobCheckpointModel.reset(job_id)
+
+        checkpoint = JobCheckpointModel.start(job_id, meta={"shard": shard, "shard_count": shard_count})
+        if checkpoint["status"] != JobCheckpointModel.STATUS_DONE:
+            today_start = datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+            pending_by_user = UserProgressModel.iter_pending_counts_by_user(
+                after_user_id=checkpoint.get("last_key"),
+                now=now,
+                batch_size=batch_size,
+                user_range=NotificationService._shard_range(now.date(), shard, shard_count),
+            )
 
-        for user in users_cursor:
-            user_id = str(user["_id"])
-            pending = UserProgressModel.count_pending_cards(user_id)
+            batch = []
+            for row in pending_by_user:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    NotificationService._process_daily_batch(job_id, batch, today_start)
+                    batch = []
+            if batch:
+                NotificationService._process_daily_batch(job_id, batch, today_start)
+
+            JobCheckpointModel.finish(job_id)
+            checkpoint = JobCheckpointModel.get(job_id)
+
+        counters = checkpoint.get("counters", {})
+        return {
+            "job_id": job_id,
+            "status": checkpoint["status"],
+            "processed": counters.get("processed", 0),
+            "notified": counters.get("notified", 0),
+            "pushed": counters.get("pushed", 0),
+        }
 
-            if pending <= 0:
-                continue
+    @staticmethod
+    def _shard_range(day, shard: int, shard_count: int):
+        """Faixa `(lo, hi)` de user_id do shard (None = sem limite).
 
-            # Garante no máximo UMA notificação "daily_study" por dia por usuário
-            last = NotificationModel.find_last(
-                user_id=user_id, notification_type=NotificationService.TYPE_DAILY_STUDY
-            )
-            if last and isinstance(last.get("created_at"), datetime):
-                last_date = last["created_at"].date()
-                today_date = datetime.now(timezone.utc).date()
-                if last_date == today_date:
-                    # Já foi enviada hoje, pula este usuário
-                    continue
-
-            title = "Hora de estudar!"
-            body = f"Você tem {pending} cartas para revisar hoje. Vamos continuar sua jornada?"
-
-            NotificationService._create_and_push(
-                user_id=user_id,
-                notification_type=NotificationService.TYPE_DAILY_STUDY,
-                title=title,
-                body=body,
-                extra_data={"pending_cards": pending},
-            )
-            notified_users.append(user_id)
+        Os limites são quantis de `users` por _id, calculados pelo primeiro
+        shard que roda no dia e gravados em `job_checkpoints`, então todos os
+        shards (e as retomadas) usam a mesma divisão. As faixas cobrem todo o
+        espaço de ids: usuários criados depois caem no último shard.
+        """
+        if shard_count == 1:
+            return None
+        bounds_id = f"{NotificationService.TYPE_DAILY_STUDY}:{day.isoformat()}:bounds/{shard_count}"
+        doc = mongo.db.job_checkpoints.find_one({"_id": bounds_id})
+        if doc is None:
+            total = mongo.db.users.estimated_document_count()
+            bounds = []
+            for k in range(1, shard_count):
+                user = next(
+                    mongo.db.users.find({}, {"_id": 1}).sort("_id", 1).skip(total * k // shard_count).limit(1), None
+                )
+                # Menos usuários que shards: os últimos ficam com uma faixa vazia
+                bounds.append(user["_id"] if user else ObjectId("f" * 24))
+            try:
+                mongo.db.job_checkpoints.update_one(
+                    {"_id": bounds_id},
+                    {"$setOnInsert": {"bounds": bounds, "started_at": datetime.now(timezone.utc)}},
+                    upsert=True,
+                )
+            except DuplicateKeyError:
+                pass  # outro shard gravou ao mesmo tempo; vale o que foi gravado
+            doc = mongo.db.job_checkpoints.find_one({"_id": bounds_id})
+        bounds = [None, *doc["bounds"], None]
+        return bounds[shard], bounds[shard + 1]
 
-        return {"notified_users": notified_users}
+    @staticmethod
+    def _process_daily_batch(job_id: str, rows: List[Dict[str, Any]], today_start: datetime):
+        """Processa um lote do lembrete diário e avança o checkpoint."""
+        confirmed = UserModel.filter_confirmed([row["_id"] for row in rows])
+        candidates = [(str(row["_id"]), row["pending"]) for row in rows if row["_id"] in confirmed]
+
+        # Garante no máximo UMA notificação "daily_study" por dia por usuário
+        already_notified = NotificationModel.find_users_notified_since(
+            [user_id for user_id, _ in candidates], NotificationService.TYPE_DAILY_STUDY, today_start
+        )
+
+        notifications = []
+        for user_id, pending in candidates:
+            if user_id in already_notified:
+                continue
+            notifications.append({
+                "user_id": user_id,
+                "title": "Hora de estudar!",
+                "body": f"Você tem {pending} cartas para revisar hoje. Vamos continuar sua jornada?",
+                "data": {"pending_cards": pending},
+            })
+
+        NotificationModel.create_many(
+            NotificationService.TYPE_DAILY_STUDY,
+            [(n["user_id"], {"title": n["title"], "body": n["body"], **n["data"]}) for n in notifications],
+        )
+        # O checkpoint avança antes do push: numa retomada o dedupe já cobre este lote,
+        # então um push pode se perder, mas nunca é enviado duas vezes.
+        JobCheckpointModel.advance(job_id, rows[-1]["_id"], {"processed": len(rows), "notified": len(notifications)})
+        pushed = PushNotificationService.send_batch(notifications)
+        JobCheckpointModel.advance(job_id, rows[-1]["_id"], {"pushed": pushed})
 
     @staticmethod
     def notify_user_added_to_classroom(classroom_id: str, user_id: str):
@@ -117,63 +252,43 @@ class NotificationService:
             return
 
         # Descobre quais collections possuem esse deck
-        collection_doc = mongo.db.collections.find_one({"decks": ObjectId(deck_id)})
+        collection_doc = mongo.db.collections.find_one({"decks": ObjectId(deck_id)}, {"_id": 1})
         if not collection_doc:
             return
 
         collection_id = str(collection_doc["_id"])
+        title = "Novas cartas disponíveis!"
+        body = f"Foram adicionadas {amount} novas cartas no deck '{deck.get('name')}'."
 
         # Turmas que usam essa collection
-        classrooms_cursor = mongo.db.classrooms.find({"collection": collection_doc["_id"]})
-
-        for classroom in classrooms_cursor:
-            classroom_id = str(classroom["_id"])
-            students = classroom.get("students", [])
-
-            for student_id in students:
-                student_id_str = str(student_id)
-                title = "Novas cartas disponíveis!"
-                body = f"Foram adicionadas {amount} novas cartas no deck '{deck.get('name')}'."
-
-                NotificationService._create_and_push(
-                    user_id=student_id_str,
-                    notification_type=NotificationService.TYPE_NEW_CARDS,
-                    title=title,
-                    body=body,
-                    extra_data={
-                        "deck_id": deck_id,
-                        "classroom_id": classroom_id,
-                        "collection_id": collection_id,
-                    },
-                )
+        for classroom_id, student_ids in ClassroomModel.get_student_ids_by_collection(collection_id).items():
+            NotificationService.broadcast(
+                student_ids,
+                NotificationService.TYPE_NEW_CARDS,
+                title,
+                body,
+                extra_data={
+                    "deck_id": deck_id,
+                    "classroom_id": classroom_id,
+                    "collection_id": collection_id,
+                },
+            )
 
     @staticmethod
     def teacher_custom_notification(teacher_id: str, classroom_id: str, title: str, body: str):
         """Professor envia uma notificação de texto livre para todos os alunos da turma."""
-        classroom = ClassroomModel.get_by_id(classroom_id)
-        if not classroom:
+        student_ids = ClassroomModel.get_student_ids(classroom_id)
+        if student_ids is None:
             return {"error": "Classroom not found"}
 
-        students = classroom.get("students", [])
-        for student in students:
-            # no to_dict de ClassroomModel, students são dicionários com name/email
-            # portanto precisamos buscar o user_id via email
-            email = student.get("email")
-            if not email:
-                continue
-            user = UserModel.find_by_email(email)
-            if not user:
-                continue
-
-            NotificationService._create_and_push(
-                user_id=user._id,
-                notification_type=NotificationService.TYPE_TEACHER_CUSTOM,
-                title=title,
-                body=body,
-                extra_data={"classroom_id": classroom_id, "from_teacher_id": teacher_id},
-            )
-
-        return {"sent_to": len(students)}
+        sent_to = NotificationService.broadcast(
+            student_ids,
+            NotificationService.TYPE_TEACHER_CUSTOM,
+            title,
+            body,
+            extra_data={"classroom_id": classroom_id, "from_teacher_id": teacher_id},
+        )
+        return {"sent_to": sent_to}
 
     @staticmethod
     def admin_custom_notification(admin_id: str, title: str, body: str, user_ids: Optional[List[str]] = None):
@@ -182,21 +297,13 @@ class NotificationService:
         - Se user_ids for informado: envia apenas para esses usuários.
         - Caso contrário: envia para todos usuários confirmados.
         """
-        if user_ids:
-            target_users = [str(uid) for uid in user_ids]
-        else:
-            cursor = mongo.db.users.find({"is_confirmed": True})
-            target_users = [str(u["_id"]) for u in cursor]
-
-        for uid in target_users:
-            NotificationService._create_and_push(
-                user_id=uid,
-                notification_type=NotificationService.TYPE_ADMIN_CUSTOM,
-                title=title,
-                body=body,
-                extra_data={"from_admin_id": admin_id},
-            )
-
-        return {"sent_to": len(target_users)}
-
-
+        target_users = [str(uid) for uid in user_ids] if user_ids else UserModel.iter_confirmed_ids()
+
+        sent_to = NotificationService.broadcast(
+            target_users,
+            NotificationService.TYPE_ADMIN_CUSTOM,
+            title,
+            body,
+            extra_data={"from_admin_id": admin_id},
+        )
+        return {"sent_to": sent_to}
@@ -14,15 +14,16 @@ class PaymentService:
         user = UserModel.find_by_id(user_id)
         price_id = Config.PRICE_ID
         
-        
-        user = user.to_dict()
-        
         if not user:
             return BadRequest(description="error: user not found!")
         
+        user = user.to_dict()
+        
+        # O cliente é criado em background no cadastro; se o job ainda não rodou, cria agora
+        customer_id = user.get('customer_id') or UserModel.ensure_stripe_customer(user_id)
         
         subscription = stripe.Subscription.create(
-        customer= user.get('customer_id'),
+        customer= customer_id,
         items=[{"price": price_id}],
         payment_behavior="default_incomplete",
         expand=["latest_invoice.payment_intent"],
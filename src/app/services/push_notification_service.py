@@ -1,42 +1,113 @@
-import requests
-
 from src.app import mongo
+from src.app.models.push_notification_model import PushNotificationModel
+from src.app.models.push_ticket_model import PushTicketModel
+from src.app.provider.expo_push import expo_push
 
 
 class PushNotificationService:
     """Serviço responsável por enviar notificações push via Expo."""
 
-    EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+    # Erro do Expo para tokens que não devem mais ser usados
+    DEVICE_NOT_REGISTERED = "DeviceNotRegistered"
 
     @staticmethod
     def _get_tokens_for_user(user_id: str):
         cursor = mongo.db.push_notification.find({"user_id": str(user_id)})
         return [doc.get("push_token") for doc in cursor if doc.get("push_token")]
 
+    @staticmethod
+    def _get_tokens_for_users(user_ids):
+        cursor = mongo.db.push_notification.find(
+            {"user_id": {"$in": [str(user_id) for user_id in user_ids]}},
+            {"user_id": 1, "push_token": 1},
+        )
+        tokens = {}
+        for doc in cursor:
+            if doc.get("push_token"):
+                tokens.setdefault(doc["user_id"], []).append(doc["push_token"])
+        return tokens
+
+    @staticmethod
+    def _is_device_not_registered(result) -> bool:
+        details = result.get("details") or {}
+        return details.get("error") == PushNotificationService.DEVICE_NOT_REGISTERED
+
     @staticmethod
     def send_to_user(user_id: str, title: str, body: str, data=None) -> bool:
-        tokens = PushNotificationService._get_tokens_for_user(user_id)
-        if not tokens:
-            return False
-
-        messages = [
-            {
-                "to": token,
-                "sound": "default",
-                "title": title,
-                "body": body,
-                "data": data or {},
-            }
-            for token in tokens
-        ]
-
-        try:
-            response = requests.post(
-                PushNotificationService.EXPO_PUSH_URL, json=messages, timeout=5
-            )
-            return response.ok
-        except Exception:
-            # Em produção, seria interessante logar o erro
-            return False
+        sent = PushNotificationService.send_batch(
+            [{"user_id": user_id, "title": title, "body": body, "data": data}]
+        )
+        return sent > 0
+
+    @staticmethod
+    def send_batch(notifications) -> int:
+        """Envia várias notificações, agrupando até 100 mensagens por requisição.
+
+        Os tickets aceitos ficam em `push_tickets` para a consulta dos receipts
+        (`process_receipts`); tokens recusados com DeviceNotRegistered são removidos.
+
+        Args:
+            notifications: Lista de dicts com user_id, title, body e data.
+
+        Returns:
+            int: Quantidade de mensagens aceitas pelo Expo.
+        """
+        tokens_by_user = PushNotificationService._get_tokens_for_users(
+            [n["user_id"] for n in notifications]
+        )
+        messages = []
+        recipients = []
+        for n in notifications:
+            user_id = str(n["user_id"])
+            for token in tokens_by_user.get(user_id, []):
+                messages.append({
+                    "to": token,
+                    "sound": "default",
+                    "title": n["title"],
+                    "body": n["body"],
+                    "data": n.get("data") or {},
+                })
+                recipients.append((user_id, token))
+        if not messages:
+            return 0
+
+        tickets = expo_push.send(messages)
+
+        pending_receipts = []
+        dead_tokens = set()
+        for (user_id, token), ticket in zip(recipients, tickets):
+            if ticket.get("status") == "ok" and ticket.get("id"):
+                pending_receipts.append({"ticket_id": ticket["id"], "push_token": token, "user_id": user_id})
+            elif PushNotificationService._is_device_not_registered(ticket):
+                dead_tokens.add(token)
+
+        PushTicketModel.save_many(pending_receipts)
+        PushNotificationModel.remove_tokens(dead_tokens)
+        return sum(1 for ticket in tickets if ticket.get("status") == "ok")
+
+    @staticmethod
+    def process_receipts(limit: int = 1000):
+        """Consulta os receipts dos tickets pendentes e remove os tokens DeviceNotRegistered."""
+        tickets = PushTicketModel.find_ready(limit=limit)
+        if not tickets:
+            return {"checked": 0, "errors": 0, "pruned_tokens": 0}
+
+        receipts = expo_push.get_receipts([t["ticket_id"] for t in tickets])
 
+        done = []
+        errors = 0
+        dead_tokens = set()
+        for ticket in tickets:
+            receipt = receipts.get(ticket["ticket_id"])
+            if receipt is None:
+                # Ainda não disponível; o TTL de 24h descarta se nunca chegar
+                continue
+            done.append(ticket["_id"])
+            if receipt.get("status") == "error":
+                errors += 1
+                if PushNotificationService._is_device_not_registered(receipt):
+                    dead_tokens.add(ticket["push_token"])
 
+        PushTicketModel.delete_many(done)
+        pruned = PushNotificationModel.remove_tokens(dead_tokens)
+        return {"checked": len(done), "errors": errors, "pruned_tokens": pruned}
@@ -1,4 +1,5 @@
 from datetime import datetime
+from flask import current_app
 from src.app.models.user_progress_model import UserProgressModel
 from src.app.services.user_streak_service import UserStreakService
 
@@ -15,6 +16,18 @@ class UserProgressService:
         """Obtém todas as cartas pendentes para revisão no dia atual."""
         return UserProgressModel.get_pending_cards(user_id, deck_id)
 
+    @staticmethod
+    def get_study_queue(user_id, deck_id=None, limit=None, cursor=None):
+        """Página da fila de estudo (cartas vencidas, mais atrasadas primeiro)."""
+        cards, next_cursor = UserProgressModel.get_study_queue(
+            user_id,
+            deck_id,
+            limit=limit,
+            cursor=cursor,
+            store_snapshots=current_app.config.get("PROGRESS_CARD_SNAPSHOTS", True),
+        )
+        return {"cards": cards, "next_cursor": next_cursor}
+
     @staticmethod
     def update_card_status(user_id, card_id, recall_level):
         """Atualiza o status de uma carta específica no progresso do usuário.
@@ -24,6 +37,15 @@ class UserProgressService:
         UserStreakService.record_study(user_id)
         return progress
 
+    @staticmethod
+    def update_cards_status(user_id, reviews):
+        """Aplica um lote de revisões (ex.: sessão sincronizada pelo app) de uma vez.
+        O dia de estudo é registrado uma única vez por lote."""
+        results = UserProgressModel.update_status_batch(user_id, reviews)
+        if any(result["status"] != "invalid" for result in results):
+            UserStreakService.record_study(user_id)
+        return results
+
     @staticmethod
     def get_progress_for_card(user_id, deck_id, card_id):
         """Recupera o progresso de um usuário para uma carta específica."""
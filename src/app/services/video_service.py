@@ -1,4 +1,5 @@
 from src.app.models.video_model import VideoModel
+from src.app.provider.cache import response_cache
 from datetime import datetime, timezone
 
 class VideoService:
@@ -12,6 +13,7 @@ class VideoService:
             video_id=data.get("video_id")
         )
         video.save_to_db()
+        response_cache.invalidate("videos")
         return video.to_dict()
     
     @staticmethod
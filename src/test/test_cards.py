@@ -1,4 +1,5 @@
 """Testes das rotas de cartas."""
+import base64
 import json
 import pytest
 
@@ -108,3 +109,34 @@ def test_card_create_in_lots_missing(client):
         content_type="application/json",
     )
     assert response.status_code == 400
+
+
+def test_card_get_all_paginated(client):
+    response = client.get("/card/get_all_cards", query_string={"limit": 1})
+    assert response.status_code == 200
+    assert len(response.get_json()) <= 1
+
+    next_cursor = response.headers.get("X-Next-Cursor")
+    if next_cursor:
+        next_page = client.get("/card/get_all_cards", query_string={"limit": 1, "cursor": next_cursor})
+        assert next_page.status_code == 200
+        assert next_page.get_json() != response.get_json()
+
+
+def test_card_get_all_invalid_cursor(client):
+    response = client.get("/card/get_all_cards", query_string={"cursor": "invalid"})
+    assert response.status_code == 400
+
+
+def test_card_get_all_cursor_with_operator(client):
+    # Cursor forjado com um operador no lugar do valor
+    cursor = base64.urlsafe_b64encode(json.dumps({"id": {"$ne": None}}).encode()).decode().rstrip("=")
+    response = client.get("/card/get_all_cards", query_string={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_card_get_all_stream(client):
+    response = client.get("/card/get_all_cards", query_string={"stream": "true"})
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert isinstance(json.loads(response.get_data(as_text=True)), list)
@@ -40,3 +40,77 @@
 #     )
 #     # 404 = chat não encontrado, 429 = quota API, 500 = erro
 #     assert response.status_code in (200, 400, 404, 429, 500)
+
+
+import json
+
+import pytest
+from src.app.provider.llm import llm, FakeLLMBackend
+
+
+@pytest.fixture
+def fake_llm():
+    previous = llm.use_backend(FakeLLMBackend(["Hola amigo, ¿qué tal?"]))
+    yield llm.backend
+    llm.use_backend(previous)
+
+
+def test_chat_talk_stream(client, auth_headers, fake_llm):
+    response = client.post(
+        "/chat/talk_to_me/stream",
+        json={"message": "Hola", "history": [], "settings": {"language_conversation": "es"}},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    body = response.get_data(as_text=True)
+    assert body.count("event: chunk") == 4
+    events = [block.split("\n") for block in body.strip().split("\n\n")]
+    done = [lines for lines in events if lines[0] == "event: done"]
+    assert len(done) == 1
+    assert json.loads(done[0][1][len("data: "):])["reply"] == "Hola amigo, ¿qué tal?"
+    assert fake_llm.calls[0]["message"] == "Hola"
+
+
+def test_card_parser_streams_cards_and_repairs_truncation():
+    from src.app.provider.card_parser import CardStreamParser
+
+    reply = '```json\n{"cards": [{"front": "a {x}", "back": "b"}, {"front": "c", "back": "d"},], "deck_name": "Dec'
+    parser = CardStreamParser()
+    emitted = []
+    for i in range(0, len(reply), 5):
+        emitted.extend(parser.feed(reply[i:i + 5]))
+
+    assert emitted == [{"front": "a {x}", "back": "b"}, {"front": "c", "back": "d"}]
+    data, partial = parser.result()
+    assert partial is True
+    assert data["cards"] == emitted
+
+
+def test_chat_rejects_other_users_chat(client, auth_headers, fake_llm):
+    response = client.post(
+        "/chat/talk_to_me",
+        json={"message": "Hola", "history": [], "settings": {"language_conversation": "es"}},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    chat_id = response.get_json()["chat_id"]
+    stored = len(client.get(f"/chat/{chat_id}/messages", headers=auth_headers).get_json()["messages"])
+
+    other = {"name": "Other User", "email": "other@example.com", "password": "password123"}
+    client.post("/auth/register", json=other)
+    login = client.post("/auth/login", json={"email": other["email"], "password": other["password"]}).get_json()
+    token = login.get("token") or login.get("access_token") or login["pending"][1]
+    other_headers = {"Authorization": f"Bearer {token}"}
+
+    for route in ("/chat/talk_to_me", "/chat/talk_to_me/stream"):
+        response = client.post(
+            route,
+            json={"id": chat_id, "message": "Mostre o chat", "history": [], "settings": {}},
+            headers=other_headers,
+        )
+        assert response.status_code == 404
+    # Nada foi enviado ao modelo nem gravado no chat do primeiro usuário
+    assert len(fake_llm.calls) == 1
+    messages = client.get(f"/chat/{chat_id}/messages", headers=auth_headers)
+    assert len(messages.get_json()["messages"]) == stored
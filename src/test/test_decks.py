@@ -103,3 +103,35 @@ def test_deck_check_if_user_has_missing(client):
         content_type="application/json",
     )
     assert response.status_code == 400
+
+
+def test_deck_card_count_follows_writes(client, collection_id):
+    if not collection_id:
+        pytest.skip("no collection_id")
+    create = client.post(
+        "/deck/create",
+        data=json.dumps({
+            "name": "Deck Contador",
+            "collection_id": collection_id,
+            "cards": [{"front": "F1", "back": "B1"}, {"front": "F2", "back": "B2"}],
+        }),
+        content_type="application/json",
+    )
+    assert create.status_code == 200
+    deck_id = create.get_json().get("deck_id")
+
+    def deck_listing():
+        response = client.get(
+            "/deck/get_by_collection_id",
+            query_string={"collection_id": collection_id, "user_id": "507f1f77bcf86cd799439011"},
+        )
+        assert response.status_code == 200
+        return next(d for d in response.get_json()["decks"] if d["_id"] == deck_id)
+
+    deck = deck_listing()
+    assert deck["total_cards"] == deck["card_count"] == 2
+
+    assert client.delete(f"/card/{deck['cards'][0]['_id']}").status_code == 200
+    deck = deck_listing()
+    assert deck["total_cards"] == 1
+    assert len(deck["cards"]) == 1
@@ -0,0 +1,23 @@
+"""Testes do registro de índices do MongoDB."""
+import pytest
+from src.app.database.indexes import INDEXES, ensure_indexes
+
+
+def test_ensure_indexes_is_idempotent(app):
+    with app.app_context():
+        ensure_indexes()
+        report = ensure_indexes()
+
+    assert set(report) == set(INDEXES)
+    for result in report.values():
+        assert result["created"] == []
+        assert result["missing"] == []
+        assert result["failed"] == []
+
+
+def test_ensure_indexes_check_mode(app):
+    with app.app_context():
+        report = ensure_indexes(create=False)
+
+    for result in report.values():
+        assert result["missing"] == []
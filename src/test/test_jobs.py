@@ -0,0 +1,127 @@
+"""Testes da fila de jobs em background (JobModel / JobQueueService)."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from src.app.database.mongo import mongo
+from src.app.models.job_model import JobModel
+from src.app.services.job_queue_service import JobQueueService
+
+
+TEST_OK = "test_ok"
+TEST_FAIL = "test_fail"
+executed = []
+
+
+@JobQueueService.handler(TEST_OK)
+def _ok_handler(value=None):
+    executed.append(value)
+
+
+@JobQueueService.handler(TEST_FAIL)
+def _fail_handler():
+    raise RuntimeError("falhou")
+
+
+@pytest.fixture
+def queue(app):
+    with app.app_context():
+        backend = app.config.get("JOB_QUEUE_BACKEND")
+        app.config["JOB_QUEUE_BACKEND"] = JobQueueService.BACKEND_MONGO
+        mongo.db.jobs.delete_many({})
+        mongo.db.jobs_dead_letter.delete_many({})
+        executed.clear()
+        yield
+        app.config["JOB_QUEUE_BACKEND"] = backend
+
+
+def _make_due(job_id):
+    """Antecipa o `run_at` do job (pula o backoff)."""
+    mongo.db.jobs.update_one({"_id": ObjectId(job_id)}, {"$set": {"run_at": datetime.now(timezone.utc)}})
+
+
+def test_claim_follows_run_at(queue):
+    now = datetime.now(timezone.utc)
+    late = JobModel.enqueue(TEST_OK, {"value": "late"}, run_at=now - timedelta(minutes=1))
+    first = JobModel.enqueue(TEST_OK, {"value": "first"}, run_at=now - timedelta(minutes=3))
+    middle = JobModel.enqueue(TEST_OK, {"value": "middle"}, run_at=now - timedelta(minutes=2))
+    JobModel.enqueue(TEST_OK, {"value": "future"}, run_at=now + timedelta(hours=1))
+
+    claimed = [JobModel.claim("w1") for _ in range(4)]
+
+    assert [str(job["_id"]) for job in claimed[:3]] == [first, middle, late]
+    assert claimed[3] is None
+    assert all(job["status"] == JobModel.STATUS_RUNNING and job["attempts"] == 1 for job in claimed[:3])
+
+
+def test_backoff_schedule():
+    seconds = [JobQueueService._backoff(attempt).total_seconds() for attempt in range(1, 10)]
+    assert seconds == [30, 60, 120, 240, 480, 960, 1920, 3600, 3600]
+
+
+def test_failed_job_is_retried_with_backoff(queue):
+    job_id = JobQueueService.enqueue(TEST_FAIL, max_attempts=3)
+
+    before = datetime.now(timezone.utc)
+    assert JobQueueService.process_next("w1") is True
+
+    job = mongo.db.jobs.find_one({"_id": ObjectId(job_id)})
+    assert job["status"] == JobModel.STATUS_QUEUED
+    assert job["attempts"] == 1
+    assert job["locked_by"] is None
+    assert "RuntimeError: falhou" in job["last_error"]
+    delay = job["run_at"].replace(tzinfo=timezone.utc) - before
+    assert timedelta(seconds=29) <= delay <= timedelta(seconds=31)
+    # Ainda no backoff: nada para executar
+    assert JobQueueService.process_next("w1") is False
+
+
+def test_job_is_dead_lettered_after_max_attempts(queue):
+    job_id = JobQueueService.enqueue(TEST_FAIL, max_attempts=2)
+
+    JobQueueService.process_next("w1")
+    _make_due(job_id)
+    JobQueueService.process_next("w1")
+
+    assert mongo.db.jobs.count_documents({"_id": ObjectId(job_id)}) == 0
+    dead = mongo.db.jobs_dead_letter.find_one({"_id": ObjectId(job_id)})
+    assert dead["status"] == "dead"
+    assert dead["attempts"] == 2
+
+
+def test_requeue_dead(queue):
+    job_id = JobQueueService.enqueue(TEST_FAIL, max_attempts=1)
+    other_id = JobQueueService.enqueue(TEST_FAIL, max_attempts=1)
+    JobQueueService.process_next("w1")
+    JobQueueService.process_next("w1")
+    assert mongo.db.jobs_dead_letter.count_documents({}) == 2
+
+    assert JobModel.requeue_dead([job_id]) == 1
+
+    job = mongo.db.jobs.find_one({"_id": ObjectId(job_id)})
+    assert job["status"] == JobModel.STATUS_QUEUED
+    assert job["attempts"] == 0
+    assert "failed_at" not in job
+    assert mongo.db.jobs_dead_letter.find_one({"_id": ObjectId(other_id)}) is not None
+    assert JobModel.requeue_dead() == 1
+    assert mongo.db.jobs_dead_letter.count_documents({}) == 0
+
+
+def test_stale_worker_cannot_finish_reclaimed_job(queue):
+    job_id = JobQueueService.enqueue(TEST_OK, {"value": 1})
+    JobModel.claim("w1")
+    # Lock do w1 expirou: w2 reserva o job de novo
+    mongo.db.jobs.update_one(
+        {"_id": ObjectId(job_id)}, {"$set": {"locked_at": datetime.now(timezone.utc) - timedelta(hours=1)}}
+    )
+    JobModel.claim("w2", lock_timeout=300)
+
+    assert JobModel.complete(job_id, "w1") is False
+    assert JobModel.retry(job_id, "w1", "erro", datetime.now(timezone.utc)) is False
+    job = mongo.db.jobs.find_one({"_id": ObjectId(job_id)})
+    assert job["status"] == JobModel.STATUS_RUNNING
+    assert job["locked_by"] == "w2"
+
+    assert JobModel.complete(job_id, "w2") is True
+    assert mongo.db.jobs.find_one({"_id": ObjectId(job_id)})["status"] == JobModel.STATUS_DONE
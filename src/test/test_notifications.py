@@ -43,3 +43,101 @@ def test_notifications_mark_as_read(client, auth_headers):
         headers=auth_headers,
     )
     assert response.status_code in (200, 400)
+
+
+@pytest.fixture
+def expo_stub():
+    """Servidor HTTP local no lugar da API do Expo (falha a 1ª requisição com 500)."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            calls.append((self.path, payload))
+            if len(calls) == 1:
+                self.send_response(500)
+                self.end_headers()
+                return
+            if self.path == "/push/send":
+                data = [
+                    {"status": "error", "details": {"error": "DeviceNotRegistered"}}
+                    if message["to"] == "dead-token" else {"status": "ok", "id": f"ticket-{message['to']}"}
+                    for message in payload
+                ]
+            else:
+                data = {ticket_id: {"status": "ok"} for ticket_id in payload["ids"]}
+            body = json.dumps({"data": data}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", calls
+    server.shutdown()
+
+
+def test_expo_dispatcher_batches_and_retries(expo_stub):
+    from src.app.provider.expo_push import ExpoPushDispatcher
+
+    base_url, calls = expo_stub
+    dispatcher = ExpoPushDispatcher(
+        push_url=f"{base_url}/push/send", receipts_url=f"{base_url}/push/receipts", backoff=0
+    )
+    messages = [{"to": f"token-{i}", "title": "t", "body": "b"} for i in range(250)]
+    messages.append({"to": "dead-token", "title": "t", "body": "b"})
+
+    tickets = dispatcher.send(messages)
+
+    assert len(tickets) == len(messages)
+    assert tickets[-1]["details"]["error"] == "DeviceNotRegistered"
+    assert all(ticket["status"] == "ok" for ticket in tickets[:-1])
+    # 1 requisição com 500 (retry) + 3 lotes de até 100 mensagens
+    assert [len(payload) for _, payload in calls] == [100, 100, 100, 51]
+
+    receipts = dispatcher.get_receipts([tickets[0]["id"]])
+    assert receipts == {tickets[0]["id"]: {"status": "ok"}}
+
+
+def test_expo_dispatcher_non_json_response_fails_chunk():
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from src.app.provider.expo_push import ExpoPushDispatcher
+
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            calls.append(self.path)
+            body = b"<html>proxy</html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        dispatcher = ExpoPushDispatcher(push_url=f"http://127.0.0.1:{server.server_port}/push/send", backoff=0)
+        tickets = dispatcher.send([{"to": f"token-{i}", "title": "t", "body": "b"} for i in range(150)])
+    finally:
+        server.shutdown()
+
+    # Cada lote falha uma vez só (sem retry), sem derrubar o envio dos outros
+    assert calls == ["/push/send", "/push/send"]
+    assert len(tickets) == 150
+    assert all(ticket["details"]["error"] == "RequestFailed" for ticket in tickets)
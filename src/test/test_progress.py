@@ -40,6 +40,22 @@ def test_progress_pending_missing_user(client):
     assert response.status_code == 400
 
 
+def test_progress_queue(client):
+    response = client.get(
+        "/progress/queue",
+        query_string={"user_id": "507f1f77bcf86cd799439011", "limit": 10},
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert isinstance(data["cards"], list)
+    assert "next_cursor" in data
+
+
+def test_progress_queue_missing_user(client):
+    response = client.get("/progress/queue")
+    assert response.status_code == 400
+
+
 def test_progress_update_status(client):
     response = client.put(
         "/progress/update_status",
@@ -59,3 +75,111 @@ def test_progress_update_status_invalid(client):
         content_type="application/json",
     )
     assert response.status_code == 400
+
+
+def test_progress_update_status_batch_results(client):
+    response = client.put(
+        "/progress/update_status",
+        data=json.dumps({
+            "user_id": "507f1f77bcf86cd799439011",
+            "cards": [
+                {"card_id": "507f1f77bcf86cd799439013", "recall_level": 2},
+                {"card_id": "507f1f77bcf86cd799439014", "recall_level": "Easy"},
+                {"card_id": "507f1f77bcf86cd799439015"},
+            ],
+        }),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data["results"]) == 3
+    assert data["results"][2]["status"] == "invalid"
+
+
+def test_progress_pending_count_follows_reviews(client):
+    user_id = "507f1f77bcf86cd7994390aa"
+    collection = client.post(
+        "/collections/create",
+        data=json.dumps({"name": "Coleção Pendentes"}),
+        content_type="application/json",
+    ).get_json()
+    collection_id = collection.get("collection_id") or collection.get("id")
+    deck_id = client.post(
+        "/deck/create",
+        data=json.dumps({
+            "name": "Deck Pendentes",
+            "collection_id": collection_id,
+            "cards": [{"front": "F1", "back": "B1"}, {"front": "F2", "back": "B2"}],
+        }),
+        content_type="application/json",
+    ).get_json()["deck_id"]
+    client.post(
+        "/deck/save_deck",
+        data=json.dumps({"user_id": user_id, "deck_id": deck_id, "collection_id": collection_id}),
+        content_type="application/json",
+    )
+
+    def deck_listing():
+        response = client.get(
+            "/deck/get_by_collection_id",
+            query_string={"collection_id": collection_id, "user_id": user_id},
+        )
+        return next(d for d in response.get_json()["decks"] if d["_id"] == deck_id)
+
+    deck = deck_listing()
+    assert deck["pending_cards"] == 2
+
+    response = client.put(
+        "/progress/update_status",
+        data=json.dumps({"user_id": user_id, "cards": [{"card_id": deck["cards"][0]["_id"], "recall_level": 3}]}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert deck_listing()["pending_cards"] == 1
+
+
+def test_progress_lazy_deck_materializes_on_first_review(client):
+    from bson import ObjectId
+    from src.app.database.mongo import mongo
+    from src.app.models.deck_model import DeckModel
+    from src.app.models.user_progress_model import UserProgressModel
+
+    collection = client.post(
+        "/collections/create",
+        data=json.dumps({"name": "Coleção Lazy"}),
+        content_type="application/json",
+    ).get_json()
+    collection_id = collection.get("collection_id") or collection.get("id")
+    deck_id = client.post(
+        "/deck/create",
+        data=json.dumps({
+            "name": "Capítulo Lazy",
+            "collection_id": collection_id,
+            "cards": [{"front": "F1", "back": "B1"}, {"front": "F2", "back": "B2"}],
+        }),
+        content_type="application/json",
+    ).get_json()["deck_id"]
+    DeckModel.set_lazy_progress([deck_id])
+    user_id = str(mongo.db.users.insert_one({"name": "Leitor", "collections": [ObjectId(collection_id)]}).inserted_id)
+
+    def pending():
+        response = client.get("/progress/pending", query_string={"user_id": user_id, "deck_id": deck_id})
+        assert response.status_code == 200
+        return response.get_json()["pending_cards"]
+
+    # Sem progresso gravado: as duas cartas aparecem como novas
+    cards = pending()
+    assert len(cards) == 2
+    assert mongo.db.user_progress.count_documents({"deck_id": ObjectId(deck_id)}) == 0
+
+    response = client.put(
+        "/progress/update_status",
+        data=json.dumps({"user_id": user_id, "cards": [{"card_id": cards[0]["card_id"], "recall_level": 3}]}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert [c["card_id"] for c in pending()] == [cards[1]["card_id"]]
+    assert mongo.db.user_progress.count_documents({"deck_id": ObjectId(deck_id)}) == 1
+    # O lembrete diário conta a carta nova que ainda não tem progresso
+    reminder = {str(row["_id"]): row["pending"] for row in UserProgressModel.iter_pending_counts_by_user()}
+    assert reminder[user_id] == 1
@@ -0,0 +1,97 @@
+"""Testes dos algoritmos de agendamento das revisões (provider/scheduler.py)."""
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from src.app.database.mongo import mongo
+from src.app.models.user_progress_model import UserProgressModel
+from src.app.provider import scheduler as scheduling
+
+
+def _legacy_days(attempts, level):
+    """Intervalo do `calculate_next_review` original (antes dos schedulers)."""
+    if level == 0:
+        return 0
+    if level == 1:
+        return 1
+    factor = 2 if level == 3 else 1
+    return factor * (2 ** (attempts - 1))
+
+
+def _random_states(count, seed=7):
+    rng = random.Random(seed)
+    return {
+        "attempts": [rng.randint(0, 20) for _ in range(count)],
+        "ease": [rng.choice([None, rng.uniform(1.3, 3.0)]) for _ in range(count)],
+        "interval_days": [rng.choice([None, 0.0, float(rng.randint(1, 90))]) for _ in range(count)],
+        "repetitions": [rng.choice([None, rng.randint(0, 10)]) for _ in range(count)],
+    }, [rng.randint(0, 3) for _ in range(count)]
+
+
+@pytest.mark.parametrize("attempts", range(0, 21))
+@pytest.mark.parametrize("level", [0, 1, 2, 3])
+def test_doubling_reproduces_legacy_intervals(attempts, level):
+    days, state = scheduling.DoublingScheduler().review({"attempts": attempts}, level)
+    # Único desvio intencional: o teto de MAX_INTERVAL_DAYS (o original estourava o timedelta)
+    assert days == min(_legacy_days(attempts, level), scheduling.MAX_INTERVAL_DAYS)
+    assert state == {}
+
+
+@pytest.mark.parametrize("algorithm", sorted(scheduling.SCHEDULERS))
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_review_batch_matches_review(monkeypatch, algorithm, use_numpy):
+    if use_numpy and scheduling.np is None:
+        pytest.skip("numpy não instalado")
+    if not use_numpy:
+        monkeypatch.setattr(scheduling, "np", None)
+    engine = scheduling.get_scheduler(algorithm)
+    states, levels = _random_states(500)
+
+    days, new_state = engine.review_batch(states, levels)
+
+    for i, level in enumerate(levels):
+        expected_days, expected_state = engine.review({field: column[i] for field, column in states.items()}, level)
+        assert float(days[i]) == pytest.approx(expected_days)
+        for field, value in expected_state.items():
+            assert float(new_state[field][i]) == pytest.approx(value)
+
+
+@pytest.mark.parametrize("algorithm", sorted(scheduling.SCHEDULERS))
+def test_update_status_batch_matches_sequential_updates(app, algorithm):
+    """Revisões repetidas da mesma carta no lote = chamadas sucessivas de `update_status`."""
+    with app.app_context():
+        previous = app.config.get("SCHEDULER_ALGORITHM")
+        app.config["SCHEDULER_ALGORITHM"] = algorithm
+        batch_user, sequential_user, deck_id = ObjectId(), ObjectId(), ObjectId()
+        card_ids = [ObjectId() for _ in range(3)]
+        now = datetime.now(timezone.utc)
+        for user_id in (batch_user, sequential_user):
+            mongo.db.user_progress.insert_many([
+                {"user_id": user_id, "deck_id": deck_id, "card_id": card_id, "attempts": attempts,
+                 "last_reviewed": None, "next_review": now}
+                for card_id, attempts in zip(card_ids, (0, 2, 5))
+            ])
+        reviews = [
+            {"card_id": str(card_ids[card]), "recall_level": level}
+            for card, level in [(0, 2), (1, 3), (0, 3), (2, 0), (0, 1), (1, 2), (2, 2), (0, 2)]
+        ]
+
+        try:
+            results = UserProgressModel.update_status_batch(str(batch_user), reviews)
+            for review in reviews:
+                UserProgressModel.update_status(str(sequential_user), review["card_id"], review["recall_level"])
+
+            assert [r["status"] for r in results] == ["ok"] * len(reviews)
+            for card_id in card_ids:
+                batch = mongo.db.user_progress.find_one({"user_id": batch_user, "card_id": card_id})
+                sequential = mongo.db.user_progress.find_one({"user_id": sequential_user, "card_id": card_id})
+                for field in ("attempts", "ease", "interval_days", "repetitions"):
+                    assert batch.get(field) == sequential.get(field)
+                batch_delay = batch["next_review"] - batch["last_reviewed"]
+                sequential_delay = sequential["next_review"] - sequential["last_reviewed"]
+                assert abs(batch_delay - sequential_delay) < timedelta(seconds=1)
+        finally:
+            app.config["SCHEDULER_ALGORITHM"] = previous
+            mongo.db.user_progress.delete_many({"user_id": {"$in": [batch_user, sequential_user]}})
@@ -1,5 +1,11 @@
 """Testes das rotas de streak."""
+from datetime import date, timedelta
+
 import pytest
+from bson import ObjectId
+
+from src.app.database.mongo import mongo
+from src.app.models.user_streak_model import UserStreakModel
 
 
 def test_streak_get_requires_auth(client):
@@ -10,3 +16,90 @@ def test_streak_get_requires_auth(client):
 def test_streak_get(client, auth_headers):
     response = client.get("/streak/get", headers=auth_headers)
     assert response.status_code == 200
+
+
+# ----- resumo materializado x cálculo original sobre todo o histórico -----
+
+START = date(2026, 3, 2)
+
+
+def _baseline(study_dates, today):
+    """`get_streak_info` original: recalcula tudo a partir dos dias salvos."""
+    if not study_dates:
+        return {"current_streak": 0, "last_study_date": None, "week_study_days": [False] * 7}
+    current_streak = 0
+    check_date = today
+    while check_date in study_dates:
+        current_streak += 1
+        check_date -= timedelta(days=1)
+    return {
+        "current_streak": current_streak,
+        "last_study_date": max(study_dates).isoformat(),
+        "week_study_days": [today - timedelta(days=i) in study_dates for i in range(6, -1, -1)],
+    }
+
+
+def _longest(study_dates):
+    longest = run = 0
+    for day in sorted(study_dates):
+        run = run + 1 if day - timedelta(days=1) in study_dates else 1
+        longest = max(longest, run)
+    return longest
+
+
+def _assert_matches_baseline(user_id, study_dates):
+    last = max(study_dates)
+    for offset in (0, 1, 2, 6, 7, 8):
+        today = last + timedelta(days=offset)
+        info = UserStreakModel.get_streak_info(str(user_id), today=today)
+        expected = _baseline(study_dates, today)
+        assert {key: info[key] for key in expected} == expected, today
+        assert info["longest_streak"] == _longest(study_dates)
+
+
+@pytest.fixture
+def streak_user(app):
+    with app.app_context():
+        user_id = ObjectId()
+        yield user_id
+        mongo.db.user_streaks.delete_many({"user_id": user_id})
+        mongo.db.user_streak_summaries.delete_many({"_id": user_id})
+
+
+@pytest.mark.parametrize(
+    "offsets",
+    [
+        [0, 0],                      # mesmo dia registrado de novo
+        [0, 1, 2, 2, 3],             # gap = 1
+        [0, 1, 4, 5],                # gap > 1
+        [0, 1, 2, 9],                # gap >= 7
+        [0, 3, 10],                  # gap = 7 exato
+        [0, 2, 5, 6, 8, 9, 13],      # deslocamento de week_study_days
+    ],
+)
+def test_streak_summary_matches_full_history(streak_user, offsets):
+    study_dates = set()
+    for offset in offsets:
+        day = START + timedelta(days=offset)
+        UserStreakModel.record_study_day(str(streak_user), today=day)
+        study_dates.add(day)
+        _assert_matches_baseline(streak_user, study_dates)
+
+
+def test_streak_summary_migrates_legacy_history(streak_user):
+    legacy = {START + timedelta(days=offset) for offset in (0, 1, 2, 5, 6, 8, 9, 10)}
+    mongo.db.user_streaks.insert_many(
+        [{"user_id": streak_user, "date": day.isoformat()} for day in legacy]
+    )
+    assert mongo.db.user_streak_summaries.find_one({"_id": streak_user}) is None
+
+    # Primeira leitura migra via rebuild_summary
+    _assert_matches_baseline(streak_user, legacy)
+    assert mongo.db.user_streak_summaries.find_one({"_id": streak_user}) is not None
+
+    # Registros seguintes avançam o resumo migrado
+    for offset in (11, 13):
+        day = START + timedelta(days=offset)
+        UserStreakModel.record_study_day(str(streak_user), today=day)
+        legacy.add(day)
+        _assert_matches_baseline(streak_user, legacy)
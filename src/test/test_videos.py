@@ -27,3 +27,12 @@ def test_video_get_all(client):
 def test_video_get_with_language(client):
     response = client.get("/video/get", query_string={"language": "pt"})
     assert response.status_code == 201
+
+
+def test_video_get_all_etag(client):
+    response = client.get("/video/get")
+    etag = response.headers.get("ETag")
+    assert etag
+
+    cached = client.get("/video/get", headers={"If-None-Match": etag})
+    assert cached.status_code == 304